@@ -0,0 +1,712 @@
+"""
+Microbenchmarks do pipeline de captura do RESTORECELL Terminal.
+
+Uso:
+    python bench_restorecell.py [framer] [sanitizer] [pipeline] [timestamps] [filters] [search] [regex] [archive]
+                                [telemetry] [adb] [adb_shell]
+                                [adb_devices] [logcat] [adb_native] [idle]
+"""
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from capture_engine import (ACCENTED_CHARS, BAUD_RATES, CATEGORY_PATTERNS, TELEMETRY_FIELDS, AdbClient,
+                            AdbRunner, AdbShellPool, ArchiveSearch, CaptureEngine, LogcatEngine, TelemetryStore,
+                            REGEX_CAPTURE_MAX_LINE, REGEX_MAX_LINE, CategoryIndex, CategoryMatcher, LineFramer,
+                            LineStore, LogSanitizer, TimestampFormatter, TrigramIndex, compile_pattern,
+                            pattern_predicate, wall_clock)
+from tests.fake_adb import FakeAdbServer, write_fake_adb
+
+# Linha típica de log de boot (preloader/kernel)
+SAMPLE_LINE = b"[PMIC] vproc voltage = 800000 uV, i2c bus 3 ok, cpu freq 1800 MHz\r\n"
+
+# Intervalo entre leituras da thread serial (segundos)
+READ_INTERVAL = 0.01
+
+
+def legacy_split(chunks):
+    """Reprodução do loop original de read_serial (fatiamento repetido)"""
+    buffer = bytearray()
+    count = 0
+    for chunk in chunks:
+        buffer.extend(chunk)
+        while b'\n' in buffer:
+            line_end = buffer.find(b'\n')
+            line = buffer[:line_end + 1]
+            buffer = buffer[line_end + 1:]
+            if line:
+                count += 1
+    return count
+
+
+def framer_split(chunks):
+    """Separação de linhas com LineFramer"""
+    framer = LineFramer()
+    count = 0
+    for chunk in chunks:
+        count += len(framer.feed(chunk))
+    return count
+
+
+def make_chunks(total_bytes, chunk_size):
+    """Gera os chunks de um fluxo contínuo de linhas de exemplo"""
+    repeats = total_bytes // len(SAMPLE_LINE) + 1
+    data = (SAMPLE_LINE * repeats)[:total_bytes]
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+def measure(func, chunks, rounds=3):
+    """Retorna (linhas, melhor tempo) de várias execuções"""
+    best = float('inf')
+    lines = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        lines = func(chunks)
+        best = min(best, time.perf_counter() - start)
+    return lines, best
+
+
+def bench_framer():
+    """Linhas/s do framer em cada baud rate suportado"""
+    print("== LineFramer x fatiamento original ==")
+    print(f"{'baud':>8} {'chunk':>7} {'necessário':>12} {'original':>12} {'framer':>12}")
+    for baud in BAUD_RATES:
+        # 8N1: 10 bits por byte
+        bytes_per_second = baud // 10
+        required = bytes_per_second / len(SAMPLE_LINE)
+
+        # Leituras periódicas e rajada de 64 KB (dump do preloader)
+        for chunk_size in (max(1, int(bytes_per_second * READ_INTERVAL)), 65536):
+            chunks = make_chunks(max(bytes_per_second, 65536), chunk_size)
+            legacy_lines, legacy_time = measure(legacy_split, chunks)
+            framer_lines, framer_time = measure(framer_split, chunks)
+            assert legacy_lines == framer_lines
+            print(
+                f"{baud:>8} {chunk_size:>7} {required:>10.0f}/s "
+                f"{legacy_lines / legacy_time:>10.0f}/s "
+                f"{framer_lines / framer_time:>10.0f}/s"
+            )
+
+
+def legacy_sanitize(raw_data):
+    """Reprodução de sanitize_log_data + filtro de append_to_log originais"""
+    decoded = raw_data.decode('utf-8', errors='ignore')
+    cleaned = ''
+    for char in decoded:
+        if char.isprintable() or char in '\n\r\t':
+            if ord(char) < 128 or char in ACCENTED_CHARS:
+                cleaned += char
+            else:
+                cleaned += ' '
+    cleaned = ' '.join(cleaned.split())
+    if not cleaned.strip():
+        return None
+    safe_data = ''
+    for char in cleaned.strip():
+        if ord(char) < 128 or char in ACCENTED_CHARS:
+            safe_data += char
+        else:
+            safe_data += '?'
+    return safe_data
+
+
+def make_noisy_lines(count, noise=0.05, seed=0):
+    """Linhas de log com ruído de linha serial (bytes inválidos, controles, UTF-8)"""
+    rng = random.Random(seed)
+    extras = [b'\x00', b'\x1b[0m', b'\xff', b'\xc3', '\u00e7\u00e3o'.encode(), '\u20ac'.encode(),
+              b'\t', b'\r', b'\x7f', b'\xc2\x85', b'  ']
+    lines = []
+    for _ in range(count):
+        line = bytearray(SAMPLE_LINE.rstrip(b'\r\n'))
+        if rng.random() >= noise:
+            lines.append(bytes(line) + b'\r\n')
+            continue
+        for _ in range(rng.randint(1, 4)):
+            pos = rng.randint(0, len(line))
+            line[pos:pos] = rng.choice(extras)
+        lines.append(bytes(line) + b'\n')
+    return lines
+
+
+def bench_sanitizer():
+    """Throughput do LogSanitizer contra a sanitização caractere a caractere"""
+    print("== LogSanitizer x sanitize_log_data original ==")
+    sanitizer = LogSanitizer()
+    print(f"{'ruído':>6} {'original':>12} {'por linha':>12} {'por bloco':>12}")
+    for noise in (0.0, 0.05, 1.0):
+        lines = make_noisy_lines(20000, noise)
+        block = b''.join(lines)
+
+        # Compatibilidade byte a byte com a saída original
+        expected = [out for out in map(legacy_sanitize, lines) if out]
+        assert sanitizer.sanitize_lines(block) == expected
+        assert [sanitizer.sanitize(line) for line in lines] == list(map(legacy_sanitize, lines))
+
+        megabytes = len(block) / 1e6
+        _, legacy_time = measure(lambda data: [legacy_sanitize(line) for line in data], lines)
+        _, line_time = measure(lambda data: [sanitizer.sanitize(line) for line in data], lines)
+        _, block_time = measure(sanitizer.sanitize_lines, block)
+        print(
+            f"{noise:>6.0%} {megabytes / legacy_time:>7.1f} MB/s "
+            f"{megabytes / line_time:>7.1f} MB/s {megabytes / block_time:>7.1f} MB/s"
+        )
+
+
+def bench_pipeline():
+    """Linhas/s do pipeline completo do CaptureEngine, sem porta serial"""
+    print("== CaptureEngine.feed (framer + sanitizer + filtro) ==")
+    chunks = make_chunks(4 * 1024 * 1024, 4096)
+    for log_filter in ('Bruto', 'pmic'):
+        def run(data):
+            engine = CaptureEngine(log_filter=log_filter)
+            for chunk in data:
+                engine.feed(chunk)
+            return engine.lines_captured
+
+        lines = sum(chunk.count(b'\n') for chunk in chunks)
+        _, elapsed = measure(run, chunks)
+        print(f"filtro={log_filter:>5}: {lines / elapsed:>10.0f} linhas/s")
+
+
+def legacy_timestamps(batches):
+    """Reprodução do timestamp original: datetime.now().strftime por linha"""
+    count = 0
+    for lines in batches:
+        for line in lines:
+            timestamp = datetime.now().strftime('[%Y-%m-%d %H:%M:%S.%f]')
+            count += len(f"{timestamp} {line}") > 0
+    return count
+
+
+def batch_timestamps(batches):
+    """Um wall_clock por lote e formatação com prefixo em cache"""
+    formatter = TimestampFormatter()
+    count = 0
+    for lines in batches:
+        count += len(formatter.format_lines(lines, wall_clock()))
+    return count
+
+
+def capture_timestamps(batches):
+    """Custo no caminho de captura: apenas o wall_clock numérico por lote"""
+    count = 0
+    for lines in batches:
+        wall_clock()
+        count += len(lines)
+    return count
+
+
+def bench_timestamps():
+    """Custo do timestamp por linha: original x por lote"""
+    print("== Timestamps: strftime por linha x wall_clock por lote ==")
+    line = SAMPLE_LINE.decode().strip()
+    print(f"{'lote':>6} {'original':>14} {'formatado':>14} {'captura':>14}")
+    for batch_size in (1, 16, 256):
+        batches = [[line] * batch_size for _ in range(200000 // batch_size)]
+        total = batch_size * len(batches)
+        _, legacy_time = measure(legacy_timestamps, batches)
+        _, batch_time = measure(batch_timestamps, batches)
+        _, capture_time = measure(capture_timestamps, batches)
+        print(
+            f"{batch_size:>6} {total / legacy_time:>10.0f}/s {total / batch_time:>12.0f}/s "
+            f"{total / capture_time:>12.0f}/s"
+        )
+
+
+def legacy_filter(lines, active_filters):
+    """Reprodução do laço original de apply_filters (lower por filtro)"""
+    count = 0
+    for line in lines:
+        for filter_name in active_filters:
+            if filter_name in line.lower():
+                count += 1
+                break
+    return count
+
+
+def legacy_should_display(data, current_filter):
+    """Reprodução de should_display_log original (padrões montados a cada chamada)"""
+    filter_patterns = {
+        'vproc': ['vproc', 'voltage'], 'cpu': ['cpu', 'processor'], 'pmic': ['pmic', 'power'],
+        'i2c': ['i2c', 'bus'], 'clock': ['clock', 'freq'], 'rpmb': ['rpmb', 'secure'],
+        'ufs': ['ufs', 'storage'], 'emmc': ['emmc', 'mmc'], 'ram': ['ram', 'memory'],
+    }
+    data_lower = data.lower()
+    if current_filter.lower() in filter_patterns:
+        return any(pattern in data_lower for pattern in filter_patterns[current_filter.lower()])
+    return not any(pattern in data_lower for patterns in filter_patterns.values() for pattern in patterns)
+
+
+def bench_filters():
+    """Linhas/s dos filtros de categoria: laços originais x matcher compilado"""
+    print("== Filtros: substring por filtro x CategoryMatcher ==")
+    lines = [line.decode().strip() for line in make_noisy_lines(50000, noise=0.0)]
+    lines += ["usb gadget: configured", "mmcblk0: p1 p2 p3", "init: starting service"] * 10000
+    matcher = CategoryMatcher({name: patterns for name, patterns in CATEGORY_PATTERNS.items() if patterns})
+    total = len(lines)
+
+    for active in (['pmic'], ['vproc', 'cpu', 'emmc', 'ram']):
+        select = matcher.selector(active)
+        patterns = [p for name in active for p in CATEGORY_PATTERNS[name]]
+        assert legacy_filter(lines, patterns) == sum(1 for line in lines if select(line))
+        _, legacy_time = measure(lambda data: legacy_filter(data, patterns), lines)
+        _, select_time = measure(lambda data: [line for line in data if select(line)], lines)
+        _, match_time = measure(lambda data: [matcher.match(line) for line in data], lines)
+        print(
+            f"{'+'.join(active):>20}: original {total / legacy_time:>9.0f}/s, "
+            f"seletor {total / select_time:>9.0f}/s, categorias {total / match_time:>9.0f}/s"
+        )
+
+    select = matcher.selector((), others=True)
+    assert [legacy_should_display(line, 'Outros') for line in lines] == [bool(select(line)) for line in lines]
+    _, legacy_time = measure(lambda data: [legacy_should_display(line, 'Outros') for line in data], lines)
+    _, select_time = measure(lambda data: [select(line) for line in data], lines)
+    print(f"{'Outros':>20}: original {total / legacy_time:>9.0f}/s, seletor {total / select_time:>9.0f}/s")
+
+    # Troca de filtro com o índice de categorias gravado na ingestão
+    store = LineStore(0)
+    start = time.perf_counter()
+    store.extend(lines)
+    plain_time = time.perf_counter() - start
+    index = CategoryIndex(matcher)
+    indexed = LineStore(0, [index])
+    start = time.perf_counter()
+    indexed.extend(lines)
+    ingest_time = time.perf_counter() - start
+    print(f"ingestão: sem índice {total / plain_time:>9.0f}/s, com índice {total / ingest_time:>9.0f}/s")
+    for active, others in ((['pmic'], False), (['vproc', 'cpu', 'emmc', 'ram'], False), ([], True)):
+        select = matcher.selector(active, others)
+        expected = [item for item in store.items() if select(item[1])]
+        assert indexed.select_items(index.select(active, others)) == expected
+        _, scan_time = measure(lambda data: [item for item in data.items() if select(item[1])], store)
+        _, index_time = measure(lambda data: data.select_items(index.select(active, others)), indexed)
+        label = '+'.join(active) or 'Outros'
+        print(f"{label:>20}: releitura {scan_time * 1000:>7.1f} ms, índice {index_time * 1000:>7.1f} ms")
+
+
+def bench_search():
+    """Busca de substring: varredura linear x índice de trigramas"""
+    print("== Busca: varredura linear x TrigramIndex ==")
+    rng = random.Random(0)
+    words = ["vproc", "cpu", "pmic", "i2c", "clock", "ufs", "emmc", "ram", "init", "usb",
+             "thermal", "battery", "gpio", "dram", "boot", "lk", "kernel", "err", "ok", "0x1f"]
+    lines = [
+        f"[{i:08d}] " + ' '.join(rng.choice(words) for _ in range(8)) + f" id={rng.randrange(100000)}"
+        for i in range(200000)
+    ]
+
+    plain = LineStore(0)
+    start = time.perf_counter()
+    plain.extend(lines)
+    plain_time = time.perf_counter() - start
+    index = TrigramIndex()
+    indexed = LineStore(0, [index])
+    start = time.perf_counter()
+    indexed.extend(lines)
+    ingest_time = time.perf_counter() - start
+    print(
+        f"ingestão: sem índice {len(lines) / plain_time:>9.0f}/s, com índice "
+        f"{len(lines) / ingest_time:>9.0f}/s, índice {index.memory_usage() / 1e6:.1f} MB"
+    )
+
+    for term in ("id=4242", "thermal gpio", "0x1f err", "kernel"):
+        expected = plain.search(term)
+        assert indexed.search(term, index) == expected
+        _, scan_time = measure(lambda store: store.search(term), plain)
+        _, index_time = measure(lambda store: store.search(term, index), indexed)
+        print(
+            f"{term:>14}: {len(expected):>6} linhas, linear {scan_time * 1000:>7.1f} ms, "
+            f"índice {index_time * 1000:>7.1f} ms"
+        )
+
+
+def bench_regex():
+    """Filtros /regex/: re.search por linha x padrão do cache, e proteções"""
+    print("== Filtros por expressão regular ==")
+    rng = random.Random(0)
+    words = ["vproc", "cpu", "pmic", "i2c3", "i2c12", "timeout", "err", "fail", "ok", "0x1f"]
+    lines = [' '.join(rng.choice(words) for _ in range(8)) for _ in range(200000)]
+
+    for pattern in (r"/pmic.*(err|fail)/", r"/i2c\d+ timeout/"):
+        source = pattern[1:-1]
+        start = time.perf_counter()
+        expected = [line for line in lines if re.search(source, line, re.IGNORECASE)]
+        legacy_time = time.perf_counter() - start
+        select = pattern_predicate(pattern)
+        start = time.perf_counter()
+        assert [line for line in lines if select(line)] == expected
+        cached_time = time.perf_counter() - start
+        print(
+            f"{pattern:>20}: {len(expected):>6} linhas, re.search {legacy_time * 1000:>7.1f} ms, "
+            f"cache {cached_time * 1000:>7.1f} ms"
+        )
+
+    # Retrocesso exponencial recusado antes de tocar nas linhas
+    start = time.perf_counter()
+    try:
+        compile_pattern("/(a+)+$/")
+    except re.error as e:
+        print(f"/(a+)+$/ recusado em {(time.perf_counter() - start) * 1e6:.0f} us: {e}")
+
+    # Linha longa: a expressão só examina REGEX_MAX_LINE caracteres
+    select = pattern_predicate(r"/(a|b)*c/")
+    line = "ab" * 50000
+    start = time.perf_counter()
+    select(line)
+    print(f"linha de {len(line)} caracteres limitada a {REGEX_MAX_LINE}: "
+          f"{(time.perf_counter() - start) * 1000:.2f} ms")
+    
+    # Thread de captura: padrões no limite do aceito contra linhas montadas
+    # para forçar o retrocesso; o pior caso precisa ficar em milissegundos
+    for pattern in (r"/(a+)+/", r"/(a|aa){0,30}c/", r"/.*a.*b/", r"/\w+@\w+/"):
+        try:
+            compile_pattern(pattern, capture=True)
+        except re.error:
+            continue
+        raise AssertionError(f"{pattern} deveria ser recusado na captura")
+    hostile = ["a" * 4096, "ab" * 2048, "1" * 4096, "a1." * 1365, " " * 4096, "a " * 2048]
+    worst = 0.0
+    for pattern in (r"/pmic.*(err|fail)/", r"/.*c/", r"/\d{1,5}.*x/", r"/.{0,30}a.{0,30}b/",
+                    r"/(ab)*c/", r"/(\w|\d)*c/", r"/^.*a.*b/"):
+        matcher = CategoryMatcher({'filtro': [pattern]})
+        for line in hostile:
+            for _ in range(3):
+                start = time.perf_counter()
+                matcher.match(line)
+                worst = max(worst, time.perf_counter() - start)
+    print(f"pior linha na captura (padrões aceitos, {REGEX_CAPTURE_MAX_LINE} caracteres): "
+          f"{worst * 1000:.2f} ms")
+    assert worst < 0.02, f"regex na captura levou {worst * 1000:.1f} ms em uma linha"
+
+
+def bench_archive():
+    """Busca em arquivos salvos: leitura linha a linha x ArchiveSearch (mmap + processos)"""
+    print("== Busca em arquivos salvos ==")
+    rng = random.Random(0)
+    words = ["vproc", "cpu", "pmic", "i2c", "clock", "ufs", "emmc", "ram", "init", "usb",
+             "thermal", "battery", "gpio", "dram", "boot", "lk", "kernel", "err", "ok", "0x1f"]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for number in range(4):
+            path = os.path.join(directory, f"logs_restorecell_2024010{number}_000000.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                for block in range(20):
+                    f.write('\n'.join(
+                        f"[{block:04d}:{i:06d}] " + ' '.join(rng.choice(words) for _ in range(8))
+                        + f" id={rng.randrange(1000000)}"
+                        for i in range(50000)
+                    ) + '\n')
+            paths.append(path)
+        total = sum(os.path.getsize(path) for path in paths)
+
+        for term in ("id=424242", "thermal gpio"):
+            start = time.perf_counter()
+            expected = 0
+            for path in paths:
+                with open(path, encoding='utf-8') as f:
+                    expected += sum(1 for line in f if term in line.lower())
+            legacy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            job = ArchiveSearch(term, paths, range_bytes=16 * 1024 * 1024, max_hits=10 ** 9)
+            job.start()
+            while not job.finished:
+                time.sleep(0.01)
+            archive_time = time.perf_counter() - start
+            assert job.error is None and job.matched == expected
+            print(
+                f"{term:>14}: {expected:>6} linhas em {total / 1e6:.0f} MB, "
+                f"linha a linha {legacy_time * 1000:>7.1f} ms, ArchiveSearch {archive_time * 1000:>7.1f} ms"
+            )
+
+
+def bench_telemetry():
+    """Telemetria: extração na ingestão e estatísticas por coluna x reanálise do texto"""
+    print("== Telemetria colunar ==")
+    rng = random.Random(0)
+    words = ["init", "usb", "thermal", "battery", "gpio", "boot", "lk", "kernel", "ok", "done"]
+    lines = []
+    for i in range(200000):
+        kind = rng.randrange(20)
+        if kind == 0:
+            lines.append(f"[PMIC] vproc voltage = {rng.randrange(700000, 900000)} uV, cpu freq {rng.choice((1800, 2000))} MHz")
+        elif kind == 1:
+            lines.append(f"pmic reg[0x{rng.randrange(256):02x}] = 0x{rng.randrange(256):02x}")
+        elif kind == 2:
+            lines.append(f"mmc0: err = -{rng.randrange(1, 200)}")
+        else:
+            lines.append(' '.join(rng.choice(words) for _ in range(8)))
+
+    telemetry = TelemetryStore()
+    start = time.perf_counter()
+    for offset in range(0, len(lines), 100):
+        telemetry.extend(lines[offset:offset + 100], float(offset))
+    ingest_time = time.perf_counter() - start
+    print(
+        f"ingestão: {len(lines) / ingest_time:>9.0f} linhas/s, {len(telemetry.columns)} colunas, "
+        f"{telemetry.memory_usage() / 1e6:.1f} MB"
+    )
+
+    _, _, pattern, units = TELEMETRY_FIELDS['vproc_uv']
+    search = re.compile(pattern).search
+    start = time.perf_counter()
+    values = [float(match['value']) * units[match['unit']]
+              for match in (search(line.lower()) for line in lines) if match]
+    reparse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    stats = telemetry.stats('vproc_uv')
+    stats_time = time.perf_counter() - start
+    assert stats['count'] == len(values) and stats['max'] == max(values)
+    print(
+        f"vproc min/max/média: reanálise do texto {reparse_time * 1000:>7.1f} ms, "
+        f"coluna {stats_time * 1000:>7.2f} ms"
+    )
+
+
+def bench_adb():
+    """Comandos ADB: check_output sequencial na thread da interface x AdbRunner em paralelo"""
+    print("== Comandos ADB ==")
+    # adb simulado: 4 respostas espaçadas, como 'adb shell ping -c 4'
+    script = (
+        "import sys, time\n"
+        "for i in range(4):\n"
+        "    print(f'64 bytes from 8.8.8.8: icmp_seq={i} time=20 ms', flush=True)\n"
+        "    time.sleep(0.25)\n"
+    )
+    commands = 4
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_adb = os.path.join(tmp, "fake_adb.py")
+        with open(fake_adb, "w") as f:
+            f.write(script)
+        
+        start = time.perf_counter()
+        for _ in range(commands):
+            subprocess.check_output(f'"{sys.executable}" "{fake_adb}"', shell=True)
+        legacy_time = time.perf_counter() - start
+        print(f"check_output sequencial: {legacy_time:>6.2f} s com a interface travada, saída só no fim")
+        
+        first_line = []
+        runner = AdbRunner(adb=sys.executable)
+        start = time.perf_counter()
+        running = [
+            runner.run([fake_adb], on_lines=lambda lines, ts: first_line.append(time.perf_counter() - start))
+            for _ in range(commands)
+        ]
+        launch_time = time.perf_counter() - start
+        for command in running:
+            command.wait()
+        runner_time = time.perf_counter() - start
+        assert sum(command.lines for command in running) == commands * 4
+        print(
+            f"AdbRunner paralelo:      {runner_time:>6.2f} s no total, {launch_time * 1000:.1f} ms na interface, "
+            f"primeira linha em {min(first_line) * 1000:.0f} ms"
+        )
+
+
+def bench_adb_shell():
+    """adb shell: um processo por comando x sessões do AdbShellPool (somente POSIX)"""
+    print("== Sessões adb shell ==")
+    # adb simulado: 'shell' sem comando abre um shell interativo
+    script = (
+        f"#!{sys.executable}\n"
+        "import os, subprocess, sys\n"
+        "args = sys.argv[1:]\n"
+        "if args[:1] == ['-s']:\n"
+        "    args = args[2:]\n"
+        "if args == ['shell']:\n"
+        "    os.execvp('sh', ['sh'])\n"
+        "sys.exit(subprocess.call(['sh', '-c', ' '.join(args[1:])]))\n"
+    )
+    commands = 50
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_adb = os.path.join(tmp, "adb")
+        with open(fake_adb, "w") as f:
+            f.write(script)
+        os.chmod(fake_adb, 0o755)
+        
+        for label, runner in (("processo por comando", AdbRunner(adb=fake_adb)),
+                              ("sessões do pool", AdbRunner(adb=fake_adb, pool=AdbShellPool(fake_adb)))):
+            start = time.perf_counter()
+            for i in range(commands):
+                command = runner.run(['shell', 'echo', str(i)])
+                command.wait()
+                assert command.returncode == 0 and command.lines == 1
+            elapsed = time.perf_counter() - start
+            runner.close()
+            print(f"{label:<21}: {elapsed / commands * 1000:>7.2f} ms por comando")
+
+
+def bench_adb_devices():
+    """Vários aparelhos: um após o outro x AdbRunner.run_on_devices (somente POSIX)"""
+    print("== Diagnóstico em vários aparelhos ==")
+    # adb simulado: o aparelho N leva 0.1 * N s para responder
+    script = (
+        f"#!{sys.executable}\n"
+        "import sys, time\n"
+        "serial = sys.argv[2]\n"
+        "time.sleep(0.1 * int(serial[3:]))\n"
+        "print(f'{serial}: level: 87', flush=True)\n"
+    )
+    serials = [f"dev{n}" for n in range(1, 7)]
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_adb = os.path.join(tmp, "adb")
+        with open(fake_adb, "w") as f:
+            f.write(script)
+        os.chmod(fake_adb, 0o755)
+        runner = AdbRunner(adb=fake_adb)
+        
+        start = time.perf_counter()
+        for serial in serials:
+            runner.run(['shell', 'dumpsys', 'battery'], serial=serial).wait()
+        sequential_time = time.perf_counter() - start
+        
+        run = runner.run_on_devices(['shell', 'dumpsys', 'battery'], serials)
+        run.wait()
+        slowest = max(row[4] for row in run.summary())
+        assert all(row[1] == 'ok' for row in run.summary())
+        print(
+            f"{len(serials)} aparelhos: um após o outro {sequential_time:>5.2f} s, "
+            f"em paralelo {run.elapsed:>5.2f} s (aparelho mais lento: {slowest:.2f} s)"
+        )
+
+
+def bench_logcat():
+    """Logcat contínuo: vazão pelo pipeline e efeito das filterspecs (somente POSIX)"""
+    print("== Logcat contínuo ==")
+    # adb logcat simulado: 200 mil linhas; '*:W' mantém só W/E/F, como o logd
+    script = (
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "keep = 'VDIWEF' if '*:W' not in sys.argv else 'WEF'\n"
+        "out = sys.stdout\n"
+        "for i in range(200000):\n"
+        "    level = 'VDIWEF'[i % 6]\n"
+        "    if level in keep:\n"
+        "        out.write(f'10-18 12:00:00.{i % 1000:03d}  1234  5678 {level} ActivityManager: event {i}\\n')\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_adb = os.path.join(tmp, "adb")
+        with open(fake_adb, "w") as f:
+            f.write(script)
+        os.chmod(fake_adb, 0o755)
+        
+        for specs in ([], ['*:W']):
+            engine = LogcatEngine(filter_specs=specs, adb=fake_adb)
+            # O fim da saída simulada é registrado como desconexão
+            logging.disable(logging.ERROR)
+            start = time.perf_counter()
+            engine.start()
+            while engine.running:
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - start
+            engine.stop()
+            logging.disable(logging.NOTSET)
+            print(
+                f"filterspecs {' '.join(specs) or '(nenhuma)':<10}: {engine.lines_captured:>7} linhas, "
+                f"{engine.bytes_received / 1e6:>5.1f} MB pelo USB, "
+                f"{engine.lines_captured / elapsed:>9.0f} linhas/s"
+            )
+
+
+def bench_adb_native():
+    """Cliente do protocolo adb x processo adb por comando (somente POSIX)"""
+    print("== Cliente nativo do servidor adb ==")
+    server = FakeAdbServer()
+    client = AdbClient(port=server.port)
+    commands = 50
+    with tempfile.TemporaryDirectory() as tmp:
+        # adb simulado que repassa o comando ao shell local
+        fake_adb = write_fake_adb(tmp)
+        for label, runner in (("processo por comando", AdbRunner(adb=fake_adb)),
+                              ("cliente nativo", AdbRunner(adb=fake_adb, client=client))):
+            start = time.perf_counter()
+            for i in range(commands):
+                command = runner.run(['shell', 'echo', str(i)], serial=server.serials[1])
+                command.wait()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<21}: {elapsed / commands * 1000:>7.2f} ms por comando")
+    server.close()
+
+
+class PtyPort:
+    """Porta serial simulada por um pseudo-terminal (somente POSIX)"""
+
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        self.is_open = True
+
+    def fileno(self):
+        return self.master
+
+    def close(self):
+        self.is_open = False
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def bench_idle():
+    """CPU da thread de leitura com a linha ociosa e sob rajadas"""
+    print("== Leitura orientada a eventos (pty) ==")
+    if os.name != 'posix':
+        print("Disponível apenas em sistemas POSIX")
+        return
+
+    engine = CaptureEngine()
+    engine.serial_port = PtyPort()
+    engine.start()
+    try:
+        # Linha ociosa
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        time.sleep(2.0)
+        idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        idle = engine.metrics.snapshot()
+        print(f"ociosa: CPU {idle_cpu:.2%}, {idle['wakeups_per_second']:.1f} acordadas/s")
+
+        # Rajadas de 4 KB a cada 10 ms
+        engine.metrics.reset()
+        burst = SAMPLE_LINE * (4096 // len(SAMPLE_LINE))
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(200):
+            os.write(engine.serial_port.slave, burst)
+            time.sleep(READ_INTERVAL)
+        busy_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        busy = engine.metrics.snapshot()
+        print(
+            f"rajadas: CPU {busy_cpu:.2%}, {busy['wakeups_per_second']:.1f} acordadas/s, "
+            f"{busy['bytes_per_wakeup']:.0f} bytes/leitura, {engine.lines_captured} linhas"
+        )
+    finally:
+        engine.stop()
+
+
+BENCHMARKS = {
+    'framer': bench_framer,
+    'sanitizer': bench_sanitizer,
+    'pipeline': bench_pipeline,
+    'timestamps': bench_timestamps,
+    'filters': bench_filters,
+    'search': bench_search,
+    'regex': bench_regex,
+    'archive': bench_archive,
+    'telemetry': bench_telemetry,
+    'adb': bench_adb,
+    'adb_shell': bench_adb_shell,
+    'adb_devices': bench_adb_devices,
+    'logcat': bench_logcat,
+    'adb_native': bench_adb_native,
+    'idle': bench_idle,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
+        print()
@@ -0,0 +1,4116 @@
+"""
+Motor de captura do RESTORECELL Terminal, independente da interface gráfica.
+
+Contém as etapas do pipeline de captura (separação de linhas, sanitização,
+timestamp, filtros e armazenamento) e uma API Python simples para usar a
+captura sem Tk. Também pode ser executado diretamente:
+
+    python capture_engine.py --port /dev/ttyUSB0 --baud 921600 -o boot.txt
+"""
+import argparse
+import glob
+import gzip
+import json
+import logging
+import lzma
+import mmap
+import multiprocessing
+import os
+import re
+import selectors
+import shlex
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from itertools import compress, count, islice, repeat
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+import serial
+
+# Baud rates suportados pela interface
+BAUD_RATES = [9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600]
+
+# Tamanho máximo de cada leitura da porta
+READ_SIZE = 65536
+
+# Expressões regulares em filtros e buscas (escritas entre barras: /padrão/)
+REGEX_CACHE_SIZE = 128   # Padrões compilados mantidos no cache LRU
+REGEX_MAX_LINE = 1024    # Caracteres de cada linha examinados por uma regex
+REGEX_MAX_REPEATS = 2    # Repetições ilimitadas em sequência aceitas em um padrão
+# Filtros e gatilhos rodam na thread de captura: limites mais estreitos
+REGEX_CAPTURE_MAX_LINE = 256         # Caracteres examinados por linha na captura
+REGEX_CAPTURE_MAX_STEPS = 1 << 19    # Estimativa máxima de tentativas por linha
+
+# Busca em arquivos de log salvos
+ARCHIVE_PATTERN = 'logs_restorecell_*.txt'
+ARCHIVE_RANGE_BYTES = 32 * 1024 * 1024  # Faixa de arquivo entregue a cada processo
+ARCHIVE_BLOCK_BYTES = 4 * 1024 * 1024   # Bloco lido por vez dentro da faixa
+
+# Âncora do relógio: hora de parede no início + relógio monotônico
+_WALL_ANCHOR = time.time()
+_PERF_ANCHOR = time.perf_counter()
+
+
+def wall_clock():
+    """
+    Hora de parede (segundos desde epoch) derivada de um relógio monotônico
+    
+    Usa time.perf_counter ancorado em time.time na carga do módulo: alta
+    resolução, custo baixo e imune a ajustes do relógio do sistema durante
+    a captura.
+    """
+    return _WALL_ANCHOR + (time.perf_counter() - _PERF_ANCHOR)
+
+
+class TimestampFormatter:
+    """
+    Formata timestamps numéricos como '[%Y-%m-%d %H:%M:%S.%f]'.
+    
+    O prefixo de data e segundo é calculado uma vez por segundo e
+    reaproveitado; cada chamada só formata os microssegundos. Não é
+    compartilhado entre threads: cada consumidor usa a sua instância.
+    """
+    
+    def __init__(self):
+        self._second = None
+        self._prefix = ''
+    
+    def format(self, timestamp):
+        """Retorna o timestamp formatado, com colchetes"""
+        second = int(timestamp)
+        if second != self._second:
+            self._second = second
+            self._prefix = datetime.fromtimestamp(second).strftime('[%Y-%m-%d %H:%M:%S.')
+        micros = min(int((timestamp - second) * 1000000 + 0.5), 999999)
+        return f"{self._prefix}{micros:06d}]"
+    
+    def format_lines(self, lines, timestamp):
+        """Prefixa um lote de linhas que chegaram no mesmo instante"""
+        prefix = self.format(timestamp) + ' '
+        return [prefix + line for line in lines]
+
+
+class LineFramer:
+    """
+    Separa um fluxo de bytes em linhas terminadas por '\n'.
+    
+    Cada chunk é varrido uma única vez. As linhas são devolvidas como
+    memoryview sobre um único buffer reutilizável, que só é compactado
+    quando não há mais espaço no final. As views são válidas apenas até
+    a próxima chamada de feed().
+    """
+    
+    def __init__(self, capacity=65536):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0  # Início da linha pendente
+        self._end = 0    # Fim dos dados válidos
+    
+    @property
+    def pending(self):
+        """Quantidade de bytes aguardando o fim de linha"""
+        return self._end - self._start
+    
+    def feed(self, chunk):
+        """
+        Adiciona um chunk ao buffer e retorna as linhas completas
+        
+        Args:
+            chunk (bytes): Dados recebidos
+            
+        Returns:
+            list: Linhas completas (memoryview), incluindo o '\n'
+        """
+        pos, end = self._append(chunk)
+        
+        # Varre apenas os bytes novos
+        buf = self._buf
+        line_end = buf.find(b'\n', pos, end)
+        if line_end < 0:
+            return []
+        
+        view = self._view
+        lines = []
+        start = self._start
+        find = buf.find
+        while line_end >= 0:
+            pos = line_end + 1
+            lines.append(view[start:pos])
+            start = pos
+            line_end = find(b'\n', pos, end)
+        
+        self._consume(start)
+        return lines
+    
+    def feed_block(self, chunk):
+        """
+        Adiciona um chunk e retorna todas as linhas completas em um único bloco
+        
+        Args:
+            chunk (bytes): Dados recebidos
+            
+        Returns:
+            memoryview: Linhas completas contíguas, ou None se não houver
+        """
+        pos, end = self._append(chunk)
+        line_end = self._buf.rfind(b'\n', pos, end)
+        if line_end < 0:
+            return None
+        
+        block = self._view[self._start:line_end + 1]
+        self._consume(line_end + 1)
+        return block
+    
+    def flush(self):
+        """Retorna e descarta os bytes pendentes (linha sem '\n')"""
+        data = bytes(self._view[self._start:self._end])
+        self._start = self._end = 0
+        return data
+    
+    def _append(self, chunk):
+        """Copia o chunk para o final do buffer e retorna (início, fim) dos bytes novos"""
+        size = len(chunk)
+        if self._end + size > len(self._buf):
+            self._make_room(size)
+        pos = self._end
+        end = pos + size
+        self._buf[pos:end] = chunk
+        self._end = end
+        return pos, end
+    
+    def _consume(self, position):
+        """Marca como entregues os bytes anteriores a position"""
+        if position == self._end:
+            # Nada pendente: volta ao início sem copiar
+            self._start = self._end = 0
+        else:
+            self._start = position
+    
+    def _make_room(self, size):
+        """Compacta o buffer ou aumenta sua capacidade"""
+        pending = self._end - self._start
+        needed = pending + size
+        if needed <= len(self._buf):
+            # Mover linha pendente para o início
+            self._buf[:pending] = self._buf[self._start:self._end]
+        else:
+            # Novo buffer: views entregues anteriormente continuam válidas
+            capacity = max(len(self._buf) * 2, needed)
+            new_buf = bytearray(capacity)
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        self._start = 0
+        self._end = pending
+
+
+# Letras acentuadas aceitas pela área de log (Tcl/Tk)
+ACCENTED_CHARS = 'áéíóúàèìòùâêîôûãõñäëïöüçÁÉÍÓÚÀÈÌÒÙÂÊÎÔÛÃÕÑÄËÏÖÜÇ'
+
+
+class _SanitizeTable(dict):
+    """Tabela de str.translate preenchida sob demanda, um code point por vez"""
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if codepoint < 128:
+            # ASCII: manter printáveis e \t \n \r, remover controles
+            value = codepoint if char.isprintable() or char in '\t\n\r' else None
+        elif not char.isprintable():
+            value = None
+        elif char in ACCENTED_CHARS:
+            value = codepoint
+        else:
+            # Printável, mas não suportado pela área de log
+            value = ' '
+        self[codepoint] = value
+        return value
+
+
+class LogSanitizer:
+    """
+    Sanitiza blocos de log com uma tabela de tradução pré-calculada.
+    
+    Um bloco com várias linhas é decodificado e traduzido de uma só vez:
+    caracteres de controle são removidos, caracteres fora de ASCII e das
+    letras acentuadas viram espaço e espaços repetidos são colapsados.
+    A saída já é segura para inserir no Tcl/Tk.
+    """
+    
+    def __init__(self):
+        self._table = _SanitizeTable()
+    
+    def sanitize_lines(self, raw_data):
+        """
+        Sanitiza um bloco de linhas terminadas por '\n'
+        
+        Args:
+            raw_data (bytes): Bloco de dados brutos (bytes ou memoryview)
+            
+        Returns:
+            list: Linhas sanitizadas, sem as linhas vazias
+        """
+        text = str(raw_data, 'utf-8', errors='ignore')
+        table = self._table
+        lines = []
+        if text.isascii():
+            # Caminho rápido: o bloco inteiro é traduzido de uma vez
+            for line in text.translate(table).split('\n'):
+                line = ' '.join(line.split())
+                if line:
+                    lines.append(line)
+        else:
+            # Linhas ASCII continuam no caminho rápido do translate
+            for line in text.split('\n'):
+                line = ' '.join(line.translate(table).split())
+                if line:
+                    lines.append(line)
+        return lines
+    
+    def sanitize(self, raw_data):
+        """
+        Sanitiza uma única linha
+        
+        Args:
+            raw_data (bytes): Linha bruta
+            
+        Returns:
+            str: Linha sanitizada, ou None se ficar vazia
+        """
+        text = str(raw_data, 'utf-8', errors='ignore').translate(self._table)
+        return ' '.join(text.split()) or None
+
+
+class LineStore:
+    """
+    Armazena as linhas do log em um buffer circular limitado.
+    
+    Cada linha recebe um número de sequência crescente, que continua
+    válido depois que linhas antigas são descartadas, e o timestamp
+    numérico de chegada (wall_clock). Linhas do mesmo lote compartilham o
+    mesmo objeto float. O descarte é O(1) e o uso de memória é
+    contabilizado a cada inserção. Índices opcionais (CategoryIndex,
+    TrigramIndex) recebem cada linha uma única vez, na inserção.
+    """
+    
+    def __init__(self, max_lines=1000, indexes=()):
+        self._lines = deque()
+        self._times = deque()
+        self._max_lines = max_lines
+        self._first_seq = 0  # Sequência da linha mais antiga
+        self._size = 0       # Bytes ocupados pelas strings
+        self.indexes = []
+        for index in indexes:
+            self.add_index(index)
+    
+    @property
+    def max_lines(self):
+        """Limite de linhas (0 = sem limite)"""
+        return self._max_lines
+    
+    @max_lines.setter
+    def max_lines(self, value):
+        self._max_lines = value
+        self._evict()
+    
+    @property
+    def first_seq(self):
+        """Número de sequência da linha mais antiga ainda armazenada"""
+        return self._first_seq
+    
+    @property
+    def next_seq(self):
+        """Número de sequência que a próxima linha receberá"""
+        return self._first_seq + len(self._lines)
+    
+    def __len__(self):
+        return len(self._lines)
+    
+    def __iter__(self):
+        return iter(self._lines)
+    
+    def __getitem__(self, index):
+        """Acesso por posição (não por sequência); aceita fatias"""
+        if not isinstance(index, slice):
+            return self._lines[index]
+        
+        total = len(self._lines)
+        start, stop, step = index.indices(total)
+        if step != 1:
+            return list(self._lines)[index]
+        return self._slice(self._lines, start, stop)
+    
+    def _slice(self, items, start, stop):
+        """Fatia um deque a partir da ponta mais próxima"""
+        total = len(items)
+        if stop <= start:
+            return []
+        if start > total // 2:
+            # Mais perto do final: percorrer a partir da direita
+            window = list(islice(reversed(items), total - stop, total - start))
+            window.reverse()
+            return window
+        return list(islice(items, start, stop))
+    
+    def window(self, start, stop):
+        """
+        Retorna timestamps e linhas de um intervalo de posições
+        
+        Returns:
+            tuple: (lista de timestamps, lista de linhas)
+        """
+        start, stop, _ = slice(start, stop).indices(len(self._lines))
+        return self._slice(self._times, start, stop), self._slice(self._lines, start, stop)
+    
+    def items(self):
+        """Itera pares (timestamp, linha) da mais antiga para a mais nova"""
+        return zip(self._times, self._lines)
+    
+    def time_of(self, seq):
+        """Retorna o timestamp da linha com a sequência informada, ou None"""
+        index = seq - self._first_seq
+        if 0 <= index < len(self._times):
+            return self._times[index]
+        return None
+    
+    def append(self, line, timestamp=0.0):
+        """
+        Adiciona uma linha ao final do buffer
+        
+        Args:
+            line (str): Linha sem '\n'
+            timestamp (float): Instante de chegada (wall_clock)
+            
+        Returns:
+            int: Número de sequência atribuído à linha
+        """
+        seq = self.next_seq
+        for index in self.indexes:
+            index.add(seq, (line,))
+        self._lines.append(line)
+        self._times.append(timestamp)
+        self._size += sys.getsizeof(line)
+        self._evict()
+        return seq
+    
+    def extend(self, lines, timestamp=0.0):
+        """Adiciona várias linhas que chegaram no mesmo instante"""
+        for index in self.indexes:
+            index.add(self.next_seq, lines)
+        getsizeof = sys.getsizeof
+        self._lines.extend(lines)
+        self._times.extend(repeat(timestamp, len(lines)))
+        self._size += sum(getsizeof(line) for line in lines)
+        self._evict()
+    
+    def extend_items(self, items):
+        """Adiciona pares (timestamp, linha), mantendo o timestamp de cada uma"""
+        if self.indexes:
+            items = list(items)
+            lines = [line for _, line in items]
+            for index in self.indexes:
+                index.add(self.next_seq, lines)
+        getsizeof = sys.getsizeof
+        lines = self._lines
+        times = self._times
+        for timestamp, line in items:
+            times.append(timestamp)
+            lines.append(line)
+            self._size += getsizeof(line)
+        self._evict()
+    
+    def add_index(self, index):
+        """Associa um índice e indexa as linhas já armazenadas"""
+        index.clear(self._first_seq)
+        index.add(self._first_seq, self._lines)
+        self.indexes.append(index)
+    
+    def remove_index(self, index):
+        """Desassocia um índice"""
+        if index in self.indexes:
+            self.indexes.remove(index)
+    
+    def select_items(self, seqs):
+        """
+        Retorna os pares (timestamp, linha) das sequências informadas
+        
+        Args:
+            seqs (list): Sequências em ordem crescente (ex.: CategoryIndex.select)
+            
+        Returns:
+            list: Pares (timestamp, linha), na ordem do armazenamento
+        """
+        first = self._first_seq
+        total = len(self._lines)
+        flags = bytearray(total)
+        for seq in seqs:
+            index = seq - first
+            if 0 <= index < total:
+                flags[index] = 1
+        return list(compress(zip(self._times, self._lines), flags))
+    
+    def search(self, term, index=None):
+        """
+        Busca uma substring (sem diferenciar maiúsculas) nas linhas armazenadas
+        
+        Com um TrigramIndex, apenas as linhas candidatas são verificadas;
+        linhas fora da cobertura do índice (mais antigas que o limite de
+        memória ou ainda não indexadas) e termos com menos de 3
+        caracteres são verificados linearmente.
+        
+        Args:
+            term (str): Texto procurado ou /padrão/
+            index (TrigramIndex): Índice associado a este armazenamento
+            
+        Returns:
+            list: Pares (sequência, [posições do termo na linha]), em ordem
+        """
+        if not term:
+            return []
+        find = pattern_finder(term)
+        flags = self.search_flags(term.lower(), index)
+        if flags is None:
+            flags = repeat(1, len(self._lines))
+        
+        hits = []
+        for seq, line in compress(enumerate(self._lines, self._first_seq), flags):
+            positions = find(line)
+            if positions:
+                hits.append((seq, positions))
+        return hits
+    
+    def snapshot(self):
+        """
+        Cópia das linhas armazenadas, para uso fora do thread que as altera
+        
+        Returns:
+            tuple: (range de sequências, lista de timestamps, lista de linhas)
+        """
+        return range(self._first_seq, self.next_seq), list(self._times), list(self._lines)
+    
+    def search_flags(self, term, index):
+        """
+        Marca as posições que uma busca pelo termo precisa verificar
+        
+        Args:
+            term (str): Termo em minúsculas
+            index (TrigramIndex): Índice associado, ou None
+            
+        Returns:
+            bytearray: 1 para cada linha a verificar, ou None para todas
+                (também para /regex/, que o índice não atende)
+        """
+        if index is None or is_regex(term):
+            return None
+        candidates = index.candidates(term)
+        if candidates is None:
+            return None
+        
+        # Regiões fora da cobertura do índice + candidatos do índice
+        first = self._first_seq
+        total = len(self._lines)
+        flags = bytearray(total)
+        before = min(max(index.first_seq - first, 0), total)
+        flags[:before] = b'\x01' * before
+        after = min(max(index.next_seq - first, before), total)
+        flags[after:] = b'\x01' * (total - after)
+        for start, stop in candidates:
+            start = max(start - first, 0)
+            stop = min(stop - first, total)
+            if start < stop:
+                flags[start:stop] = b'\x01' * (stop - start)
+        return flags
+    
+    def get(self, seq):
+        """Retorna a linha com o número de sequência informado, ou None"""
+        index = seq - self._first_seq
+        if 0 <= index < len(self._lines):
+            return self._lines[index]
+        return None
+    
+    def text(self):
+        """Retorna todas as linhas como um único texto"""
+        if not self._lines:
+            return ''
+        return '\n'.join(self._lines) + '\n'
+    
+    def clear(self):
+        """Descarta todas as linhas mantendo a numeração"""
+        self._first_seq = self.next_seq
+        self._lines.clear()
+        self._times.clear()
+        self._size = 0
+        for index in self.indexes:
+            index.clear(self._first_seq)
+    
+    def memory_usage(self):
+        """Retorna o uso aproximado de memória em bytes"""
+        usage = sys.getsizeof(self._lines) + sys.getsizeof(self._times) + self._size
+        for index in self.indexes:
+            usage += index.memory_usage()
+        return usage
+    
+    def _evict(self):
+        """Remove as linhas mais antigas acima do limite"""
+        if self._max_lines <= 0:
+            return
+        lines = self._lines
+        times = self._times
+        getsizeof = sys.getsizeof
+        while len(lines) > self._max_lines:
+            self._size -= getsizeof(lines.popleft())
+            times.popleft()
+            self._first_seq += 1
+        for index in self.indexes:
+            index.trim(self._first_seq)
+
+
+def find_all(line, term):
+    """
+    Posições de todas as ocorrências (sem sobreposição) do termo na linha
+    
+    Args:
+        line (str): Linha de log
+        term (str): Termo em minúsculas
+        
+    Returns:
+        list: Deslocamentos na linha; vazio se não houver ocorrência
+    """
+    lowered = line.lower()
+    start = lowered.find(term)
+    if start < 0:
+        return []
+    positions = []
+    step = len(term)
+    while start >= 0:
+        positions.append(start)
+        start = lowered.find(term, start + step)
+    return positions
+
+
+def is_regex(text):
+    """Verifica se o texto de um filtro ou busca é uma expressão regular (/padrão/)"""
+    return len(text) > 2 and text[0] == '/' and text[-1] == '/'
+
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT,
+            getattr(sre_parse, 'POSSESSIVE_REPEAT', sre_parse.MAX_REPEAT))
+
+
+def _repeat_depth(pattern):
+    """Maior aninhamento de repetições ilimitadas (*, +, {n,}) do padrão analisado"""
+    depth = 0
+    for op, av in pattern:
+        inner = 0
+        for item in av if isinstance(av, (tuple, list)) else ():
+            subpatterns = item if isinstance(item, list) else [item]
+            for sub in subpatterns:
+                if isinstance(sub, sre_parse.SubPattern):
+                    inner = max(inner, _repeat_depth(sub))
+        if op in _REPEATS and av[1] == sre_parse.MAXREPEAT:
+            inner += 1
+        depth = max(depth, inner)
+    return depth
+
+
+def _repeat_count(pattern):
+    """Maior número de repetições ilimitadas em sequência (a.*b.*c tem 2; a|b conta o maior ramo)"""
+    total = 0
+    for op, av in pattern:
+        counts = []
+        for item in av if isinstance(av, (tuple, list)) else ():
+            subpatterns = item if isinstance(item, list) else [item]
+            for sub in subpatterns:
+                if isinstance(sub, sre_parse.SubPattern):
+                    counts.append(_repeat_count(sub))
+        if op == sre_parse.BRANCH:
+            total += max(counts, default=0)
+        elif op in _REPEATS and av[1] == sre_parse.MAXREPEAT:
+            total += sum(counts) + 1
+        elif op in _REPEATS:
+            total += sum(counts) * av[1]  # (.*a){3} equivale a três .*a seguidos
+        else:
+            total += sum(counts)
+    return total
+
+
+def _contains_branch(pattern):
+    for op, av in pattern:
+        if op == sre_parse.BRANCH:
+            return True
+        for item in av if isinstance(av, (tuple, list)) else ():
+            subpatterns = item if isinstance(item, list) else [item]
+            if any(isinstance(sub, sre_parse.SubPattern) and _contains_branch(sub)
+                   for sub in subpatterns):
+                return True
+    return False
+
+
+def _backtrack_factor(pattern, limit):
+    """
+    Estimativa das tentativas de cada posição inicial do padrão analisado
+    
+    Cada repetição multiplica pelo número de quantidades possíveis (até
+    limit, o comprimento da linha) e cada alternativa soma as tentativas
+    dos seus ramos. Um corpo de largura fixa e sem alternativas casa cada
+    quantidade de um único jeito; um corpo ambíguo, como em (a|aa){3},
+    multiplica pelas suas tentativas a cada volta, então só é aceito em
+    repetições limitadas: (a|aa)* e (a?a?)+ são recusadas.
+    
+    Raises:
+        re.error: Repetição ilimitada de corpo ambíguo
+    """
+    factor = 1
+    for op, av in pattern:
+        if op in _REPEATS:
+            low, high, body = av
+            width = body.getwidth()
+            if high > 1 and (width[0] != width[1] or _contains_branch(body)):
+                if high == sre_parse.MAXREPEAT:
+                    raise re.error("repetição ilimitada de trecho ambíguo (ex.: (a|aa)*, "
+                                   "(a?b?)+) não é permitida em filtros e gatilhos")
+                factor *= _backtrack_factor(body, limit) ** high
+            factor *= min(high, limit) - min(low, limit) + 1
+        elif op == sre_parse.BRANCH:
+            factor *= sum(_backtrack_factor(branch, limit) for branch in av[1])
+        else:
+            for item in av if isinstance(av, (tuple, list)) else ():
+                subpatterns = item if isinstance(item, list) else [item]
+                for sub in subpatterns:
+                    if isinstance(sub, sre_parse.SubPattern):
+                        factor *= _backtrack_factor(sub, limit)
+    return factor
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def compile_pattern(text, capture=False):
+    """
+    Compila um filtro ou busca /padrão/ (sem diferenciar maiúsculas)
+    
+    O cache LRU é compartilhado por filtros, buscas e destaques, de modo
+    que cada padrão é analisado e compilado uma única vez. O módulo re não
+    pode ser interrompido, então padrões de retrocesso caro são recusados:
+    
+    - repetições ilimitadas (*, +, {n,}) aninhadas, como (a+)+, cujo
+      retrocesso é exponencial;
+    - mais de REGEX_MAX_REPEATS repetições ilimitadas em sequência, como
+      .*a.*a.*b, cujo custo cresce com o comprimento da linha elevado ao
+      número de repetições.
+    
+    Repetições limitadas ({1,5}) não contam. Com duas repetições, o pior
+    caso (linha de 1024 caracteres repetidos) ainda leva segundos, aceitável
+    em buscas disparadas pelo usuário, mas não na thread de captura.
+    
+    Com capture=True (filtros de categoria e gatilhos, aplicados a cada
+    linha capturada, sobre REGEX_CAPTURE_MAX_LINE caracteres), os limites
+    são os de _backtrack_factor: repetições só de trechos de largura fixa
+    sem alternativas, e o produto das quantidades possíveis de cada
+    repetição, vezes o comprimento da linha, até REGEX_CAPTURE_MAX_STEPS.
+    Na prática cabe uma repetição ilimitada (/pmic.*(err|fail)/) mais
+    algumas curtas (ex.: {1,5}); o pior caso fica em milissegundos.
+    
+    Args:
+        text (str): Padrão entre barras
+        capture (bool): Aplicar os limites da thread de captura
+        
+    Returns:
+        re.Pattern: Expressão compilada
+        
+    Raises:
+        re.error: Padrão inválido ou recusado
+    """
+    source = text[1:-1]
+    parsed = sre_parse.parse(source)
+    if capture:
+        limit = REGEX_CAPTURE_MAX_LINE
+        # Ancorado no início (^): uma única posição inicial
+        starts = 1 if len(parsed) and parsed[0] == (sre_parse.AT, sre_parse.AT_BEGINNING) else limit
+        if starts * _backtrack_factor(parsed, limit) > REGEX_CAPTURE_MAX_STEPS:
+            raise re.error("repetições demais para filtros e gatilhos: use no máximo "
+                           "uma repetição ilimitada (ex.: /pmic.*err/)", source)
+        return re.compile(source, re.IGNORECASE)
+    if _repeat_depth(parsed) > 1:
+        raise re.error("repetições aninhadas (ex.: (a+)+) não são permitidas", source)
+    if _repeat_count(parsed) > REGEX_MAX_REPEATS:
+        raise re.error(f"mais de {REGEX_MAX_REPEATS} repetições ilimitadas "
+                       f"(ex.: .*a.*a.*b) não são permitidas", source)
+    return re.compile(source, re.IGNORECASE)
+
+
+def pattern_predicate(term):
+    """
+    Predicado line -> bool para um termo de busca
+    
+    Args:
+        term (str): Texto simples (sem diferenciar maiúsculas) ou /padrão/
+    """
+    if is_regex(term):
+        search = compile_pattern(term).search
+        return lambda line: search(line, 0, REGEX_MAX_LINE) is not None
+    term = term.lower()
+    return lambda line: term in line.lower()
+
+
+def pattern_finder(term):
+    """
+    Função line -> [posições das ocorrências] para um termo de busca
+    
+    Args:
+        term (str): Texto simples (sem diferenciar maiúsculas) ou /padrão/
+    """
+    if is_regex(term):
+        finditer = compile_pattern(term).finditer
+        return lambda line: [match.start() for match in finditer(line, 0, REGEX_MAX_LINE)
+                             if match.end() > match.start()]
+    term = term.lower()
+    return lambda line: find_all(line, term)
+
+
+def pattern_spans(line, term):
+    """
+    Intervalos (início, fim) das ocorrências de um termo na linha
+    
+    Args:
+        line (str): Linha de log
+        term (str): Texto simples (sem diferenciar maiúsculas) ou /padrão/
+    """
+    if is_regex(term):
+        return [match.span() for match in compile_pattern(term).finditer(line, 0, REGEX_MAX_LINE)
+                if match.end() > match.start()]
+    size = len(term)
+    return [(start, start + size) for start in find_all(line, term.lower())]
+
+
+class FormattedLines:
+    """
+    Visão somente leitura de um LineStore com timestamps formatados sob demanda.
+    
+    Fatiar a visão formata apenas as linhas pedidas, o que permite exibir
+    uma janela de um armazenamento grande sem formatar o restante.
+    """
+    
+    def __init__(self, store, show_timestamps=True):
+        self.store = store
+        self.show_timestamps = show_timestamps
+        self._formatter = TimestampFormatter()
+    
+    def __len__(self):
+        return len(self.store)
+    
+    def __iter__(self):
+        if not self.show_timestamps:
+            return iter(self.store)
+        fmt = self._formatter.format
+        return (f"{fmt(timestamp)} {line}" for timestamp, line in self.store.items())
+    
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("FormattedLines aceita apenas fatias")
+        times, lines = self.store.window(index.start, index.stop)
+        if not self.show_timestamps:
+            return lines
+        fmt = self._formatter.format
+        return [f"{fmt(timestamp)} {line}" for timestamp, line in zip(times, lines)]
+
+
+# Filtros de log por categoria
+LOG_FILTERS = [
+    'Bruto',
+    'vproc',
+    'cpu',
+    'pmic',
+    'i2c',
+    'clock',
+    'rpmb',
+    'ufs',
+    'emmc',
+    'ram',
+    'Outros'
+]
+
+# Palavras-chave de cada categoria
+CATEGORY_PATTERNS = {
+    'vproc': ['vproc', 'voltage'],
+    'cpu': ['cpu', 'processor'],
+    'pmic': ['pmic', 'power'],
+    'i2c': ['i2c', 'bus'],
+    'clock': ['clock', 'freq'],
+    'rpmb': ['rpmb', 'secure'],
+    'ufs': ['ufs', 'storage'],
+    'emmc': ['emmc', 'mmc'],
+    'ram': ['ram', 'memory'],
+    'outros': []  # Filtro especial tratado separadamente
+}
+
+
+class CategoryMatcher:
+    """
+    Casa todas as categorias de filtro em uma única passada por linha.
+    
+    Os padrões (substrings, sem diferenciar maiúsculas) são compilados uma
+    vez em uma expressão regular combinada, aplicada à linha convertida
+    para minúsculas uma única vez. Padrões /regex/ vêm do cache de
+    compile_pattern, com os limites da thread de captura (capture=True),
+    e são verificados à parte, sobre a linha original limitada a
+    REGEX_CAPTURE_MAX_LINE caracteres. match() informa, como máscara de
+    bits, todas as categorias encontradas na linha; selector() devolve um
+    predicado já compilado para um conjunto de categorias ativas.
+    """
+    
+    def __init__(self, categories):
+        """
+        Args:
+            categories (dict): Nome da categoria -> lista de padrões
+            
+        Raises:
+            re.error: Algum padrão /regex/ inválido ou recusado
+        """
+        self.names = list(categories)
+        self.bits = {name: 1 << index for index, name in enumerate(self.names)}
+        self.all_mask = (1 << len(self.names)) - 1
+        self.categories = {name: [p if is_regex(p) else p.lower() for p in patterns if p]
+                           for name, patterns in categories.items()}
+        
+        pattern_masks = {}
+        regex_masks = {}
+        for name, patterns in self.categories.items():
+            for pattern in patterns:
+                masks = regex_masks if is_regex(pattern) else pattern_masks
+                masks[pattern] = masks.get(pattern, 0) | self.bits[name]
+        self._masks = tuple(pattern_masks.items())
+        self._regex_masks = tuple((compile_pattern(pattern, capture=True).search, bits)
+                                  for pattern, bits in regex_masks.items())
+        
+        # Uma busca combinada descarta de uma vez as linhas sem nenhuma categoria
+        self._any = re.compile(self._alternation(pattern_masks)).search
+        self._known = self._searcher(list(pattern_masks) + list(regex_masks))
+        self._selectors = {}
+    
+    @staticmethod
+    def _alternation(patterns):
+        if not patterns:
+            return '(?!)'  # Nunca casa
+        return '|'.join(re.escape(p) for p in sorted(patterns, key=len, reverse=True))
+    
+    @classmethod
+    def _searcher(cls, patterns):
+        """Predicado line -> bool para uma lista de padrões, ou None se vazia"""
+        plain = [p for p in patterns if not is_regex(p)]
+        regexes = tuple(compile_pattern(p, capture=True).search for p in patterns if is_regex(p))
+        search = re.compile(cls._alternation(plain)).search if plain else None
+        if not regexes:
+            if search is None:
+                return None
+            return lambda line: search(line.lower()) is not None
+        
+        def searcher(line):
+            if search is not None and search(line.lower()) is not None:
+                return True
+            for regex_search in regexes:
+                if regex_search(line, 0, REGEX_CAPTURE_MAX_LINE) is not None:
+                    return True
+            return False
+        return searcher
+    
+    def match(self, line):
+        """
+        Retorna a máscara das categorias encontradas na linha
+        
+        Args:
+            line (str): Linha de log
+            
+        Returns:
+            int: Bits das categorias (0 se nenhuma casar)
+        """
+        mask = 0
+        for search, bits in self._regex_masks:
+            if search(line, 0, REGEX_CAPTURE_MAX_LINE) is not None:
+                mask |= bits
+        line = line.lower()
+        if self._any(line) is None:
+            return mask
+        # Padrões sobrepostos também contam: teste de substring por padrão
+        for pattern, bits in self._masks:
+            if pattern in line:
+                mask |= bits
+        return mask
+    
+    def mask_of(self, names):
+        """Máscara de um conjunto de nomes de categoria (nomes desconhecidos são ignorados)"""
+        mask = 0
+        for name in names:
+            mask |= self.bits.get(name, 0)
+        return mask
+    
+    def names_of(self, mask):
+        """Nomes das categorias presentes na máscara"""
+        return [name for name in self.names if mask & self.bits[name]]
+    
+    def selector(self, names, others=False):
+        """
+        Retorna um predicado line -> bool para as categorias informadas
+        
+        O predicado é compilado uma vez por conjunto de categorias e
+        reaproveitado nas chamadas seguintes.
+        
+        Args:
+            names (iterable): Categorias ativas
+            others (bool): Aceitar também linhas sem nenhuma categoria
+        """
+        key = (frozenset(names), others)
+        select = self._selectors.get(key)
+        if select is not None:
+            return select
+        
+        patterns = {p for name in key[0] for p in self.categories.get(name, ())}
+        active = self._searcher(patterns)
+        known = self._known
+        if others and known is None:
+            select = lambda line: True
+        elif others:
+            if active:
+                select = lambda line: active(line) or not known(line)
+            else:
+                select = lambda line: not known(line)
+        elif active:
+            select = active
+        else:
+            select = lambda line: False
+        
+        self._selectors[key] = select
+        return select
+
+
+# Categorias fixas (sem 'outros', que é a ausência de todas elas)
+CATEGORIES = CategoryMatcher({
+    name: patterns for name, patterns in CATEGORY_PATTERNS.items() if patterns
+})
+
+
+class CategoryIndex:
+    """
+    Máscara de categorias de cada linha, calculada na ingestão.
+    
+    Usado junto de um LineStore: cada linha é classificada uma única vez
+    pelo CategoryMatcher. As máscaras ficam em um array compacto e, para
+    cada categoria (e para as linhas sem nenhuma), há uma lista de
+    sequências também em array. Selecionar linhas por categoria percorre
+    apenas as listas envolvidas, sem reler o texto.
+    """
+    
+    def __init__(self, matcher):
+        self.matcher = matcher
+        count = len(matcher.names)
+        self._typecode = 'B' if count <= 8 else 'H' if count <= 16 else 'L' if count <= 32 else 'Q'
+        self.clear()
+    
+    def clear(self, first_seq=0):
+        """Descarta o índice; a próxima linha terá a sequência informada"""
+        self.first_seq = first_seq  # Sequência de _masks[_offset]
+        self._masks = array(self._typecode)
+        self._offset = 0
+        # Bit da categoria (0 = sem categoria) -> sequências em ordem
+        self._postings = {bit: array('q') for bit in [0] + list(self.matcher.bits.values())}
+        self._starts = dict.fromkeys(self._postings, 0)
+    
+    @property
+    def next_seq(self):
+        """Sequência que a próxima linha classificada receberá"""
+        return self.first_seq + len(self._masks) - self._offset
+    
+    def add(self, first_seq, lines):
+        """
+        Classifica um lote de linhas consecutivas
+        
+        Args:
+            first_seq (int): Sequência da primeira linha do lote
+            lines (iterable): Linhas do lote
+        """
+        if first_seq != self.next_seq:
+            # Buraco na numeração: o índice recomeça a partir deste lote
+            self.clear(first_seq)
+        match = self.matcher.match
+        masks = self._masks
+        postings = self._postings
+        none = postings[0]
+        for seq, line in enumerate(lines, first_seq):
+            mask = match(line)
+            masks.append(mask)
+            if not mask:
+                none.append(seq)
+                continue
+            while mask:
+                bit = mask & -mask
+                postings[bit].append(seq)
+                mask ^= bit
+    
+    def trim(self, first_seq):
+        """Descarta as linhas com sequência menor que first_seq"""
+        drop = min(first_seq, self.next_seq) - self.first_seq
+        if drop <= 0:
+            return
+        self.first_seq += drop
+        self._offset += drop
+        if self._offset > 4096 and self._offset * 2 > len(self._masks):
+            del self._masks[:self._offset]
+            self._offset = 0
+        
+        for bit, seqs in self._postings.items():
+            start = bisect_left(seqs, first_seq, self._starts[bit])
+            if start > 4096 and start * 2 > len(seqs):
+                del seqs[:start]
+                start = 0
+            self._starts[bit] = start
+    
+    def mask(self, seq):
+        """Máscara da linha com a sequência informada (0 se fora do índice)"""
+        index = seq - self.first_seq
+        if 0 <= index < len(self._masks) - self._offset:
+            return self._masks[self._offset + index]
+        return 0
+    
+    def select(self, names, others=False):
+        """
+        Sequências das linhas que pertencem a alguma das categorias
+        
+        Args:
+            names (iterable): Categorias ativas
+            others (bool): Incluir as linhas sem nenhuma categoria
+            
+        Returns:
+            list: Sequências em ordem crescente
+        """
+        bits = [self.matcher.bits[name] for name in names if name in self.matcher.bits]
+        if others:
+            bits.append(0)
+        lists = [self._postings[bit][self._starts[bit]:] for bit in bits]
+        if not lists:
+            return []
+        if len(lists) == 1:
+            return lists[0].tolist()
+        return sorted(set().union(*lists))
+    
+    def count(self, name):
+        """Quantidade de linhas da categoria (None = sem categoria)"""
+        bit = 0 if name is None else self.matcher.bits[name]
+        return len(self._postings[bit]) - self._starts[bit]
+    
+    def memory_usage(self):
+        """Retorna o uso aproximado de memória em bytes"""
+        usage = self._masks.itemsize * len(self._masks)
+        for seqs in self._postings.values():
+            usage += seqs.itemsize * len(seqs)
+        return usage
+
+
+class TrigramIndex:
+    """
+    Índice de trigramas para busca de substrings nas linhas de um LineStore.
+    
+    Atualizado incrementalmente: como índice do LineStore (a cada lote)
+    ou por update(), que indexa as linhas novas aos poucos, fora do
+    caminho de ingestão. As linhas são agrupadas em blocos de block_size
+    linhas consecutivas e, para cada trigrama (sem diferenciar
+    maiúsculas), o índice guarda em array os blocos que o contêm; agrupar
+    reduz o custo de ingestão e a memória. Uma busca verifica apenas as
+    linhas dos blocos que têm todos os trigramas do termo. Linhas fora da
+    cobertura (ainda não indexadas, ou descartadas ao passar de
+    max_bytes) são verificadas linearmente por LineStore.search.
+    """
+    
+    # Custo aproximado de cada trigrama no dicionário (chave + array vazio)
+    KEY_OVERHEAD = 160
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024, block_size=16):
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.clear()
+    
+    def clear(self, first_seq=0):
+        """Descarta o índice; a próxima linha terá a sequência informada"""
+        self.first_seq = first_seq          # Primeira sequência coberta
+        self._next_seq = first_seq
+        self._first_block = first_seq // self.block_size
+        self._counts = array('I')           # Entradas de cada bloco coberto
+        self._offset = 0
+        self._postings = {}                 # Trigrama -> blocos (4 bytes cada)
+        self._block = None                  # Bloco em preenchimento
+        self._block_grams = set()           # Trigramas já registrados nele
+        self._live = 0                      # Entradas de blocos cobertos
+        self._dead = 0                      # Entradas de blocos já descartados
+    
+    @property
+    def next_seq(self):
+        """Sequência que a próxima linha indexada receberá"""
+        return self._next_seq
+    
+    def add(self, first_seq, lines):
+        """
+        Indexa um lote de linhas consecutivas
+        
+        Args:
+            first_seq (int): Sequência da primeira linha do lote
+            lines (iterable): Linhas do lote
+        """
+        if first_seq != self._next_seq:
+            # Buraco na numeração: o índice recomeça a partir deste lote
+            self.clear(first_seq)
+        lines = list(lines)
+        postings = self._postings
+        size = self.block_size
+        seq = first_seq
+        position = 0
+        while position < len(lines):
+            block = seq // size
+            take = min(len(lines) - position, (block + 1) * size - seq)
+            
+            # Trigramas do trecho do bloco (os que cruzam '\n' nunca são consultados)
+            text = '\n'.join(lines[position:position + take]).lower()
+            grams = {text[i:i + 3] for i in range(len(text) - 2)}
+            if block != self._block:
+                self._block = block
+                self._block_grams = set()
+                self._counts.append(0)
+            else:
+                grams -= self._block_grams
+            self._block_grams |= grams
+            
+            for gram in grams:
+                blocks = postings.get(gram)
+                if blocks is None:
+                    blocks = postings[gram] = array('I')
+                blocks.append(block)
+            self._counts[-1] += len(grams)
+            self._live += len(grams)
+            position += take
+            seq += take
+        
+        self._next_seq = seq
+        if self.memory_usage() > self.max_bytes:
+            self._shrink()
+    
+    def update(self, store, max_lines=None):
+        """
+        Indexa as linhas do store que ainda não estão no índice
+        
+        Args:
+            store (LineStore): Armazenamento acompanhado pelo índice
+            max_lines (int): Limite de linhas indexadas nesta chamada
+            
+        Returns:
+            int: Linhas que continuam pendentes
+        """
+        if not store.first_seq <= self._next_seq <= store.next_seq:
+            # Armazenamento limpo ou índice atrasado além do descarte
+            self.clear(store.first_seq)
+        self.trim(store.first_seq)
+        
+        start = self._next_seq - store.first_seq
+        stop = len(store)
+        if max_lines is not None:
+            stop = min(stop, start + max_lines)
+        if stop > start:
+            self.add(self._next_seq, store[start:stop])
+        return store.next_seq - self._next_seq
+    
+    def trim(self, first_seq):
+        """Descarta as linhas com sequência menor que first_seq"""
+        if first_seq <= self.first_seq:
+            return
+        self.first_seq = min(first_seq, self._next_seq)
+        
+        # Apenas blocos inteiramente descartados saem do índice
+        drop = min(self.first_seq // self.block_size - self._first_block,
+                   len(self._counts) - self._offset)
+        if drop <= 0:
+            return
+        dropped = sum(self._counts[self._offset:self._offset + drop])
+        self._first_block += drop
+        self._offset += drop
+        self._live -= dropped
+        self._dead += dropped
+        if self._offset == len(self._counts):
+            self._block = None
+        if self._offset > 4096 and self._offset * 2 > len(self._counts):
+            del self._counts[:self._offset]
+            self._offset = 0
+        if self._dead > 65536 and self._dead > self._live:
+            self._compact()
+    
+    def candidates(self, term):
+        """
+        Intervalos de sequências cobertas que podem conter o termo
+        
+        Args:
+            term (str): Termo em minúsculas
+            
+        Returns:
+            list: Pares (início, fim) em ordem crescente, ou None quando o
+                índice não ajuda: termo com menos de 3 caracteres ou
+                presente em mais da metade dos blocos
+        """
+        if len(term) < 3:
+            return None
+        grams = {term[i:i + 3] for i in range(len(term) - 2)}
+        lists = []
+        for gram in grams:
+            blocks = self._postings.get(gram)
+            if blocks is None:
+                return []
+            lists.append(blocks)
+        lists.sort(key=len)
+        
+        covered = len(self._counts) - self._offset
+        first_block = self._first_block
+        first = lists[0]
+        start = bisect_left(first, first_block)
+        if (len(first) - start) * 2 > covered:
+            return None
+        result = set(first[start:])
+        for blocks in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(blocks[bisect_left(blocks, first_block):])
+        
+        if len(result) * 2 > covered:
+            return None
+        size = self.block_size
+        return [(block * size, (block + 1) * size) for block in sorted(result)]
+    
+    def memory_usage(self):
+        """Retorna o uso aproximado de memória em bytes"""
+        return ((self._live + self._dead) * 4
+                + len(self._postings) * self.KEY_OVERHEAD
+                + self._counts.itemsize * len(self._counts))
+    
+    def _shrink(self):
+        """Descarta a metade mais antiga da cobertura para respeitar max_bytes"""
+        target = self._live // 2
+        dropped = 0
+        drop = 0
+        counts = self._counts
+        # O bloco em preenchimento nunca é descartado aqui
+        for position in range(self._offset, len(counts) - 1):
+            if dropped >= target:
+                break
+            dropped += counts[position]
+            drop += 1
+        self.trim((self._first_block + drop) * self.block_size)
+        self._compact()
+    
+    def _compact(self):
+        """Remove das listas os blocos que saíram da cobertura"""
+        first_block = self._first_block
+        for gram in list(self._postings):
+            blocks = self._postings[gram]
+            start = bisect_left(blocks, first_block)
+            if start == len(blocks):
+                del self._postings[gram]
+            elif start:
+                del blocks[:start]
+        self._dead = 0
+
+
+class SearchJob:
+    """
+    Busca executada em uma thread própria sobre uma cópia das linhas.
+    
+    A cópia (sequências, timestamps e linhas) é tirada pelo dono do
+    LineStore antes de start(), de modo que a captura continua
+    alimentando o armazenamento durante a busca. Os resultados são
+    entregues aos poucos, na ordem do log: take() retira os lotes já
+    prontos e matched/occurrences acompanham o progresso. cancel()
+    interrompe a busca entre um lote e outro.
+    """
+    
+    def __init__(self, term, seqs, times, lines, flags=None, select=None,
+                 chunk_lines=20000):
+        """
+        Args:
+            term (str): Texto procurado (sem diferenciar maiúsculas) ou /padrão/
+            seqs (sequence): Sequência de cada linha (range ou lista)
+            times (list): Timestamp de cada linha
+            lines (list): Linhas a verificar
+            flags (bytearray): Linhas candidatas (None = todas)
+            select (callable): Predicado adicional; linhas aprovadas por ele
+                entram no resultado mesmo sem o termo
+            chunk_lines (int): Linhas verificadas por lote
+            
+        Raises:
+            re.error: /padrão/ inválido ou recusado
+        """
+        self.term = term if is_regex(term) else term.lower()
+        self._find = pattern_finder(term) if term else None
+        self.seqs = seqs
+        self.times = times
+        self.lines = lines
+        self.flags = flags
+        self.select = select
+        self.chunk_lines = chunk_lines
+        
+        # Progresso (escrito apenas pela thread da busca)
+        self.matched = 0
+        self.occurrences = 0
+        self.scanned = 0
+        self.finished = False
+        self.error = None
+        
+        self._results = deque()
+        self._cancelled = threading.Event()
+        self._thread = None
+    
+    @property
+    def next_seq(self):
+        """Sequência seguinte à última linha da cópia"""
+        return self.seqs[-1] + 1 if len(self.seqs) else None
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    def start(self):
+        """Inicia a busca em segundo plano"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        """Interrompe a busca no próximo lote"""
+        self._cancelled.set()
+    
+    def take(self):
+        """
+        Retira os resultados prontos
+        
+        Returns:
+            list: Tuplas (sequência, timestamp, linha, posições do termo)
+        """
+        results = []
+        while self._results:
+            results.extend(self._results.popleft())
+        return results
+    
+    def _run(self):
+        try:
+            find = self._find
+            select = self.select
+            seqs, times, lines = self.seqs, self.times, self.lines
+            total = len(lines)
+            for start in range(0, total, self.chunk_lines):
+                if self._cancelled.is_set():
+                    return
+                stop = min(start + self.chunk_lines, total)
+                positions_range = range(start, stop)
+                if self.flags is not None:
+                    positions_range = compress(positions_range, self.flags[start:stop])
+                
+                batch = []
+                occurrences = 0
+                for position in positions_range:
+                    line = lines[position]
+                    found = find(line) if find is not None else []
+                    if found or (select is not None and select(line)):
+                        batch.append((seqs[position], times[position], line, found))
+                        occurrences += len(found)
+                if batch:
+                    self._results.append(batch)
+                    self.matched += len(batch)
+                    self.occurrences += occurrences
+                self.scanned = stop
+        except Exception as e:
+            self.error = e
+            logging.error(f"Erro na busca: {str(e)}")
+        finally:
+            self.finished = True
+    
+    @property
+    def progress(self):
+        """Percentual já verificado"""
+        return self.scanned * 100 // max(1, len(self.lines))
+
+
+def find_archives(directory, pattern=ARCHIVE_PATTERN):
+    """Arquivos de log salvos no diretório, do mais antigo ao mais novo"""
+    return sorted(path for path in glob.glob(os.path.join(directory, pattern))
+                  if os.path.isfile(path))
+
+
+def _align_line(mm, pos, size):
+    """Início da primeira linha que começa em pos ou depois"""
+    if pos <= 0:
+        return 0
+    newline = mm.find(b'\n', pos - 1, size)
+    return size if newline < 0 else newline + 1
+
+
+def _decode_line(raw):
+    return raw.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def _lines_before(mm, start, count):
+    """Até count linhas imediatamente anteriores à posição start (início de linha)"""
+    lines = []
+    end = start - 1
+    while count > len(lines) and end >= 0:
+        begin = mm.rfind(b'\n', 0, end) + 1
+        lines.append(_decode_line(mm[begin:end]))
+        end = begin - 1
+    lines.reverse()
+    return lines
+
+
+def _lines_after(mm, start, size, count):
+    """Até count linhas a partir da posição start (início de linha)"""
+    lines = []
+    while count > len(lines) and start < size:
+        end = mm.find(b'\n', start, size)
+        if end < 0:
+            end = size
+        lines.append(_decode_line(mm[start:end]))
+        start = end + 1
+    return lines
+
+
+def _candidate_rows(text, needle):
+    """Índices das linhas do bloco (já em minúsculas) que contêm o termo"""
+    counted = 0
+    row = 0
+    index = text.find(needle)
+    while index >= 0:
+        line_start = text.rfind('\n', 0, index) + 1
+        row += text.count('\n', counted, line_start)
+        counted = line_start
+        yield row
+        line_end = text.find('\n', index)
+        if line_end < 0:
+            return
+        index = text.find(needle, line_end)
+
+
+def search_archive_range(path, start, stop, term, context=2, max_hits=10000):
+    """
+    Busca um termo em uma faixa de bytes de um arquivo de log
+    
+    Executada pelos processos do pool de ArchiveSearch. O arquivo é
+    mapeado com mmap e lido em blocos de ARCHIVE_BLOCK_BYTES, de modo que
+    a memória usada não depende do tamanho do arquivo. A faixa cobre as
+    linhas que começam entre start e stop; as linhas de contexto podem
+    vir de fora dela.
+    
+    Args:
+        path (str): Arquivo de log
+        start (int): Byte inicial da faixa
+        stop (int): Byte final da faixa
+        term (str): Texto procurado (sem diferenciar maiúsculas) ou /padrão/
+        context (int): Linhas de contexto antes e depois de cada ocorrência
+        max_hits (int): Máximo de linhas encontradas na faixa
+        
+    Returns:
+        tuple: (linhas da faixa, [(linha relativa, texto, posições, antes,
+            depois)], True se max_hits interrompeu a faixa)
+    """
+    find = pattern_finder(term)
+    needle = None if is_regex(term) else term.lower()
+    hits = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0, hits, False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            begin = _align_line(mm, start, size)
+            end = _align_line(mm, stop, size)
+            tail = _lines_before(mm, begin, context) if context else []
+            waiting = []  # Ocorrências ainda sem todo o contexto posterior
+            line_base = 0
+            pos = begin
+            while pos < end:
+                # Bloco terminado em fim de linha
+                block_end = min(pos + ARCHIVE_BLOCK_BYTES, end)
+                if block_end < end:
+                    newline = mm.rfind(b'\n', pos, block_end)
+                    if newline < 0:
+                        newline = mm.find(b'\n', block_end, end)
+                    block_end = end if newline < 0 else newline + 1
+                text = mm[pos:block_end].decode('utf-8', errors='replace')
+                if '\r' in text:
+                    text = text.replace('\r\n', '\n')
+                lines = text.split('\n')
+                if text.endswith('\n'):
+                    lines.pop()
+                
+                for hit in waiting:
+                    hit[4].extend(lines[:context - len(hit[4])])
+                waiting = [hit for hit in waiting if len(hit[4]) < context]
+                
+                # Linhas candidatas: busca no bloco inteiro quando possível
+                lowered = text.lower() if needle is not None else None
+                if lowered is not None and len(lowered) == len(text):
+                    candidates = _candidate_rows(lowered, needle)
+                else:
+                    candidates = range(len(lines))
+                
+                for row in candidates:
+                    line = lines[row]
+                    positions = find(line)
+                    if not positions:
+                        continue
+                    if row >= context:
+                        before = lines[row - context:row]
+                    else:
+                        before = tail[len(tail) - (context - row):] + lines[:row]
+                    after = lines[row + 1:row + 1 + context]
+                    hit = (line_base + row, line, positions, before, after)
+                    hits.append(hit)
+                    if len(after) < context:
+                        waiting.append(hit)
+                    if len(hits) >= max_hits:
+                        for hit in waiting:
+                            hit[4].extend(_lines_after(mm, block_end, size, context - len(hit[4])))
+                        return line_base + row + 1, hits, True
+                
+                if context:
+                    tail = (tail + lines[-context:])[-context:]
+                line_base += len(lines)
+                pos = block_end
+            
+            # Contexto posterior além do fim da faixa
+            for hit in waiting:
+                hit[4].extend(_lines_after(mm, end, size, context - len(hit[4])))
+    return line_base, hits, False
+
+
+class ArchiveSearch:
+    """
+    Busca em arquivos de log salvos, com um pool de processos.
+    
+    Cada arquivo é dividido em faixas de bytes (ARCHIVE_RANGE_BYTES) e
+    cada faixa é verificada por search_archive_range em um processo do
+    pool. Os resultados de um arquivo são entregues na ordem das faixas,
+    já com o número absoluto da linha, assim que as faixas anteriores
+    terminam. O acompanhamento segue o SearchJob: start(), cancel(),
+    take(), matched/occurrences/finished/error e progress.
+    """
+    
+    def __init__(self, term, paths, context=2, workers=None,
+                 range_bytes=ARCHIVE_RANGE_BYTES, max_hits=10000):
+        """
+        Args:
+            term (str): Texto procurado (sem diferenciar maiúsculas) ou /padrão/
+            paths (list): Arquivos a verificar
+            context (int): Linhas de contexto antes e depois de cada ocorrência
+            workers (int): Processos do pool (None = número de CPUs)
+            range_bytes (int): Tamanho de cada faixa de arquivo
+            max_hits (int): Máximo de linhas entregues; a busca para ao atingi-lo
+            
+        Raises:
+            ValueError: Termo vazio
+            re.error: /padrão/ inválido ou recusado
+        """
+        if not term:
+            raise ValueError("Termo de busca vazio")
+        pattern_finder(term)  # Valida o padrão antes de iniciar os processos
+        self.term = term
+        self.paths = list(paths)
+        self.context = context
+        self.workers = workers
+        self.range_bytes = range_bytes
+        self.max_hits = max_hits
+        
+        # Progresso (escrito apenas pela thread da busca)
+        self.total_bytes = 0
+        self.scanned_bytes = 0
+        self.matched = 0
+        self.occurrences = 0
+        self.truncated = False
+        self.finished = False
+        self.error = None
+        
+        self._results = deque()
+        self._cancelled = threading.Event()
+        self._thread = None
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    @property
+    def progress(self):
+        """Percentual de bytes já verificados"""
+        return self.scanned_bytes * 100 // max(1, self.total_bytes)
+    
+    def start(self):
+        """Inicia a busca em segundo plano"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        """Interrompe a busca; faixas já em andamento terminam e são descartadas"""
+        self._cancelled.set()
+    
+    def take(self):
+        """
+        Retira os resultados prontos
+        
+        Returns:
+            list: Tuplas (arquivo, número da linha, linha, posições do
+                termo, linhas anteriores, linhas posteriores)
+        """
+        results = []
+        while self._results:
+            results.extend(self._results.popleft())
+        return results
+    
+    def _run(self):
+        pool = None
+        try:
+            ranges = {}
+            for path in self.paths:
+                size = os.path.getsize(path)
+                self.total_bytes += size
+                ranges[path] = [(start, min(start + self.range_bytes, size))
+                                for start in range(0, size, self.range_bytes)]
+            if not any(ranges.values()):
+                return
+            
+            # spawn: o processo da interface tem várias threads, fork não é seguro
+            pool = ProcessPoolExecutor(max_workers=self.workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+            futures = {}
+            for path, path_ranges in ranges.items():
+                for number, (start, stop) in enumerate(path_ranges):
+                    future = pool.submit(search_archive_range, path, start, stop,
+                                         self.term, self.context, self.max_hits)
+                    futures[future] = (path, number, stop - start)
+            
+            # Faixas concluídas fora de ordem aguardam as anteriores do mesmo arquivo
+            done = {path: {} for path in ranges}
+            next_range = dict.fromkeys(ranges, 0)
+            line_base = dict.fromkeys(ranges, 1)
+            for future in as_completed(futures):
+                if self._cancelled.is_set():
+                    return
+                path, number, size = futures[future]
+                done[path][number] = future.result()
+                self.scanned_bytes += size
+                
+                while next_range[path] in done[path]:
+                    line_count, hits, truncated = done[path].pop(next_range[path])
+                    next_range[path] += 1
+                    base = line_base[path]
+                    line_base[path] += line_count
+                    hits = hits[:self.max_hits - self.matched]
+                    if hits:
+                        self._results.append([
+                            (path, base + row, line, positions, before, after)
+                            for row, line, positions, before, after in hits
+                        ])
+                        self.matched += len(hits)
+                        self.occurrences += sum(len(hit[2]) for hit in hits)
+                    if truncated or self.matched >= self.max_hits:
+                        self.truncated = True
+                        return
+        except Exception as e:
+            self.error = e
+            logging.error(f"Erro na busca em arquivos: {str(e)}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.finished = True
+
+
+# Telemetria extraída das linhas: campo -> (categoria, palavras-chave,
+# expressão, multiplicadores por unidade). A expressão é aplicada à linha em
+# minúsculas quando alguma palavra-chave aparece nela; o grupo 'value' é o
+# número (decimal ou 0x...), 'unit' escolhe o multiplicador e 'key', quando
+# existe, completa o nome da coluna (ex.: 'pmic_reg:0x1a').
+TELEMETRY_FIELDS = {
+    'vproc_uv': (
+        'vproc', ('vproc',),
+        r'vproc[^\n]{0,40}?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>uv|mv|v)\b',
+        {'uv': 1, 'mv': 1000, 'v': 1000000},
+    ),
+    'freq_mhz': (
+        'clock', ('freq', 'clk', 'clock'),
+        r'(?:freq|clk|clock)[^\n]{0,40}?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>ghz|mhz|khz|hz)\b',
+        {'ghz': 1000, 'mhz': 1, 'khz': 0.001, 'hz': 0.000001},
+    ),
+    'pmic_reg': (
+        'pmic', ('pmic',),
+        r'pmic[^\n]{0,40}?reg(?:ister)?\s*\[?(?P<key>0x[0-9a-f]+)\]?\s*[=:]\s*(?P<value>0x[0-9a-f]+|\d+)',
+        None,
+    ),
+    'size_mb': (
+        None, ('ram', 'ufs', 'emmc'),
+        r'\bd?(?P<key>ram|ufs|emmc)\b[^\n]{0,40}?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[kmgt])i?b\b',
+        {'k': 1 / 1024, 'm': 1, 'g': 1024, 't': 1024 * 1024},
+    ),
+    'error_code': (
+        'outros', ('err', 'ret', 'status'),
+        r'\b(?:err(?:or)?|ret|status)(?:\s*code)?\s*[=:]\s*(?P<value>-?\d+|0x[0-9a-f]+)\b',
+        None,
+    ),
+}
+
+# Início de boot: (texto em minúsculas, estágio). Um marcador de estágio
+# menor ou igual ao último visto indica um novo boot.
+BOOT_MARKERS = (
+    ('preloader start', 0),
+    ('u-boot ', 1),
+    ('welcome to lk', 1),
+    ('booting linux', 2),
+)
+
+TELEMETRY_MAGIC = b'RCTELEMETRY1\n'
+
+
+class TelemetryColumn:
+    """Uma série numérica: timestamps e valores em arrays compactos ('d')"""
+    
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.times = array('d')
+        self.values = array('d')
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def copy(self):
+        """Cópia independente da série"""
+        column = TelemetryColumn(self.name, self.category)
+        column.times = self.times[:]
+        column.values = self.values[:]
+        return column
+    
+    def stats(self, start=None, stop=None):
+        """
+        Estatísticas dos valores com timestamp em [start, stop)
+        
+        Returns:
+            dict: count, min, max e mean, ou None se não houver valores
+        """
+        first = 0 if start is None else bisect_left(self.times, start)
+        last = len(self.times) if stop is None else bisect_left(self.times, stop)
+        if first >= last:
+            return None
+        values = self.values[first:last]
+        return {
+            'count': len(values),
+            'min': min(values),
+            'max': max(values),
+            'mean': sum(values) / len(values),
+        }
+
+
+class TelemetryStore:
+    """
+    Valores numéricos dos logs de boot em um armazenamento colunar.
+    
+    extend() é um consumidor de CaptureEngine: cada lote passa por uma
+    busca combinada das palavras-chave de TELEMETRY_FIELDS e apenas as
+    linhas que contêm alguma delas são analisadas. Cada campo vira uma
+    TelemetryColumn (timestamps e valores em arrays), com a categoria do
+    campo; os marcadores de BOOT_MARKERS delimitam os boots para as
+    estatísticas. As colunas são gravadas com save() e lidas com load(),
+    de modo que sessões diferentes são comparadas sem reler o texto.
+    
+    extend() roda na thread de captura e altera as colunas sob _lock;
+    stats(), boot_stats(), memory_usage() e save() trabalham sobre cópias
+    tiradas sob o mesmo lock, porque o descarte dos valores antigos
+    altera times e values em dois passos.
+    """
+    
+    def __init__(self, fields=None, boot_markers=BOOT_MARKERS, max_rows=1000000):
+        """
+        Args:
+            fields (dict): Campos no formato de TELEMETRY_FIELDS
+            boot_markers (tuple): Pares (texto, estágio) de início de boot
+            max_rows (int): Valores mantidos por coluna (os mais antigos saem)
+        """
+        fields = TELEMETRY_FIELDS if fields is None else fields
+        self.max_rows = max_rows
+        self.boot_markers = boot_markers
+        self._fields = tuple(
+            (name, category, keywords, re.compile(pattern).search, units)
+            for name, (category, keywords, pattern, units) in fields.items()
+        )
+        keywords = {keyword for _, _, keywords, _, _ in self._fields for keyword in keywords}
+        keywords.update(marker for marker, _ in boot_markers)
+        self._any = re.compile('|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))).search
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Descarta todas as colunas e boots"""
+        with self._lock:
+            self.columns = {}
+            self.boots = array('d')  # Timestamp de início de cada boot
+            self._boot_stage = None
+    
+    def extend(self, lines, timestamp):
+        """
+        Extrai a telemetria de um lote de linhas
+        
+        Args:
+            lines (list): Linhas sanitizadas
+            timestamp (float): Chegada do lote
+        """
+        any_keyword = self._any
+        for line in lines:
+            line = line.lower()
+            if any_keyword(line) is None:
+                continue
+            for marker, stage in self.boot_markers:
+                if marker in line:
+                    if self._boot_stage is None or stage <= self._boot_stage:
+                        with self._lock:
+                            self.boots.append(timestamp)
+                    self._boot_stage = stage
+                    break
+            for name, category, keywords, search, units in self._fields:
+                for keyword in keywords:
+                    if keyword in line:
+                        break
+                else:
+                    continue
+                match = search(line)
+                if match is not None:
+                    self._record(name, category, match, units, timestamp)
+    
+    def _record(self, name, category, match, units, timestamp):
+        groups = match.groupdict()
+        value = groups['value']
+        value = int(value, 16) if value.startswith('0x') else float(value)
+        if units:
+            value *= units[groups['unit']]
+        key = groups.get('key')
+        if key is not None:
+            name = f"{name}:{key}"
+            category = category or key
+        
+        with self._lock:
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = TelemetryColumn(name, category)
+            column.times.append(timestamp)
+            column.values.append(value)
+            if len(column.values) > self.max_rows:
+                drop = len(column.values) - self.max_rows // 2
+                del column.times[:drop]
+                del column.values[:drop]
+    
+    def columns_list(self, category=None):
+        """
+        Colunas existentes (lista copiada), opcionalmente de uma categoria
+        
+        As colunas continuam recebendo valores; use column() ou stats()
+        para ler os arrays.
+        """
+        with self._lock:
+            columns = list(self.columns.values())
+        return [column for column in columns
+                if category is None or column.category == category]
+    
+    def column(self, name):
+        """Cópia consistente de uma coluna, ou None"""
+        with self._lock:
+            column = self.columns.get(name)
+            return column.copy() if column is not None else None
+    
+    def stats(self, name):
+        """Estatísticas de uma coluna na sessão inteira, ou None"""
+        column = self.column(name)
+        return column.stats() if column is not None else None
+    
+    def boot_stats(self, name):
+        """
+        Estatísticas de uma coluna em cada boot
+        
+        Returns:
+            list: Pares (início do boot, estatísticas ou None); valores
+                anteriores ao primeiro boot formam um boot de início None
+        """
+        with self._lock:
+            column = self.columns.get(name)
+            if column is None:
+                return []
+            column = column.copy()
+            starts = list(self.boots)
+        bounds = ([None] if not starts or (len(column.times) and column.times[0] < starts[0])
+                  else []) + starts
+        return [
+            (start, column.stats(start, bounds[index + 1] if index + 1 < len(bounds) else None))
+            for index, start in enumerate(bounds)
+        ]
+    
+    def memory_usage(self):
+        """Bytes ocupados pelas colunas"""
+        with self._lock:
+            return sum(
+                column.times.itemsize * len(column.times) + column.values.itemsize * len(column.values)
+                for column in self.columns.values()
+            ) + self.boots.itemsize * len(self.boots)
+    
+    def save(self, path):
+        """
+        Grava as colunas e os boots em um arquivo binário
+        
+        Formato: TELEMETRY_MAGIC, uma linha JSON com os metadados e os
+        arrays em sequência, na ordem de bytes da máquina indicada no JSON.
+        """
+        # Cópias: a captura pode continuar acrescentando durante a gravação
+        with self._lock:
+            boots = self.boots[:]
+            columns = [(column.name, column.category, column.times[:], column.values[:])
+                       for column in self.columns.values()]
+        header = {
+            'byteorder': sys.byteorder,
+            'boots': len(boots),
+            'columns': [[name, category, len(values)] for name, category, _, values in columns],
+        }
+        with open(path, 'wb') as f:
+            f.write(TELEMETRY_MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            boots.tofile(f)
+            for _, _, times, values in columns:
+                times.tofile(f)
+                values.tofile(f)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Lê um arquivo gravado por save()
+        
+        Raises:
+            ValueError: Arquivo não é de telemetria
+        """
+        store = cls(fields={})
+        with open(path, 'rb') as f:
+            if f.readline() != TELEMETRY_MAGIC:
+                raise ValueError(f"Arquivo de telemetria inválido: {path}")
+            header = json.loads(f.readline().decode('utf-8'))
+            swap = header['byteorder'] != sys.byteorder
+            
+            def read(count):
+                data = array('d')
+                data.fromfile(f, count)
+                if swap:
+                    data.byteswap()
+                return data
+            
+            store.boots = read(header['boots'])
+            for name, category, count in header['columns']:
+                column = TelemetryColumn(name, category)
+                column.times = read(count)
+                column.values = read(count)
+                store.columns[name] = column
+        return store
+
+
+def compare_sessions(paths, name):
+    """
+    Estatísticas de uma coluna em vários arquivos de telemetria
+    
+    Args:
+        paths (list): Arquivos gravados por TelemetryStore.save()
+        name (str): Coluna comparada
+        
+    Returns:
+        list: Pares (arquivo, estatísticas ou None)
+    """
+    return [(path, TelemetryStore.load(path).stats(name)) for path in paths]
+
+
+def category_selector(current_filter):
+    """
+    Predicado compilado para um dos valores de LOG_FILTERS
+    
+    Returns:
+        callable: line -> bool, ou None para o modo 'Bruto'
+    """
+    if current_filter == 'Bruto':
+        return None
+    name = current_filter.lower()
+    if name == 'outros':
+        return CATEGORIES.selector((), others=True)
+    return CATEGORIES.selector((name,))
+
+
+def supports_select(engine):
+    """Verifica se a porta do engine pode ser aguardada por descritor (POSIX)"""
+    if os.name != 'posix':
+        return False
+    try:
+        engine.fileno()
+        return True
+    except Exception:
+        return False
+
+
+class ReadMetrics:
+    """
+    Métricas da thread de leitura.
+    
+    Conta quantas vezes a leitura acordou (com ou sem dados) e quantos
+    bytes vieram em cada acordada, para medir o custo de espera da porta.
+    """
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Zera os contadores"""
+        self.started = time.monotonic()
+        self.wakeups = 0      # Retornos da espera, com ou sem dados
+        self.data_reads = 0   # Retornos com dados
+        self.bytes = 0
+        self.max_read = 0
+    
+    def record(self, size):
+        """Registra uma acordada que trouxe size bytes (0 = timeout)"""
+        self.wakeups += 1
+        if size:
+            self.data_reads += 1
+            self.bytes += size
+            if size > self.max_read:
+                self.max_read = size
+    
+    def snapshot(self):
+        """
+        Retorna as métricas acumuladas
+        
+        Returns:
+            dict: wakeups, data_reads, bytes, wakeups_per_second,
+                  bytes_per_wakeup, max_read e elapsed (segundos)
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'wakeups': self.wakeups,
+            'data_reads': self.data_reads,
+            'bytes': self.bytes,
+            'wakeups_per_second': self.wakeups / elapsed,
+            'bytes_per_wakeup': self.bytes / self.data_reads if self.data_reads else 0.0,
+            'max_read': self.max_read,
+            'elapsed': elapsed,
+        }
+
+
+def should_display(data, current_filter):
+    """
+    Verifica se uma linha passa pelo filtro de categoria
+    
+    Args:
+        data (str): Linha de log
+        current_filter (str): Um dos valores de LOG_FILTERS
+        
+    Returns:
+        bool: True se a linha deve ser exibida
+    """
+    # Modo bruto mostra tudo
+    select = category_selector(current_filter)
+    if select is None:
+        return True
+    
+    # "Outros" captura logs que não se encaixam em nenhuma categoria
+    return select(data)
+
+
+class CaptureEngine:
+    """
+    Motor de captura serial sem interface gráfica.
+    
+    Lê a porta em uma thread própria, separa as linhas, sanitiza e aplica o
+    filtro de categoria. Cada leitura recebe um único timestamp numérico
+    (wall_clock), tomado na chegada do chunk. Os lotes de linhas prontas são
+    entregues aos consumidores registrados com add_consumer (janela Tk,
+    stdout, arquivo...) junto com esse timestamp, sempre a partir da thread
+    de captura; a formatação fica por conta de quem exibe ou exporta.
+    """
+    
+    def __init__(self, port=None, baudrate=115200, log_filter='Bruto', timeout=0.1):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.log_filter = log_filter
+        
+        self.serial_port = None
+        self.framer = LineFramer()
+        self.sanitizer = LogSanitizer()
+        self.consumers = []
+        
+        # Callbacks opcionais, chamados da thread de captura
+        self.on_rx = None     # on_rx(quantidade_de_bytes)
+        self.on_error = None  # on_error(exceção)
+        
+        # Estatísticas
+        self.bytes_received = 0
+        self.lines_captured = 0
+        self.error = None
+        self.metrics = ReadMetrics()
+        
+        self.running = False
+        self._thread = None
+    
+    def add_consumer(self, consumer):
+        """
+        Registra um consumidor de linhas
+        
+        Args:
+            consumer (callable): Chamado como consumer(linhas, timestamp)
+                para cada lote, com o timestamp numérico da chegada
+        """
+        self.consumers.append(consumer)
+    
+    def remove_consumer(self, consumer):
+        """Remove um consumidor registrado"""
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+    
+    def open(self):
+        """Abre a porta serial configurada"""
+        self.serial_port = serial.Serial(
+            port=self.port,
+            baudrate=self.baudrate,
+            timeout=self.timeout
+        )
+        return self.serial_port
+    
+    def start(self):
+        """Inicia a thread de captura, abrindo a porta se necessário"""
+        if self.running:
+            return
+        if self.serial_port is None:
+            self.open()
+        self.running = True
+        self.metrics.reset()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Para a captura e fecha a porta"""
+        self.running = False
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        self._thread = None
+        
+        try:
+            if self.serial_port and self.serial_port.is_open:
+                self.serial_port.close()
+        finally:
+            self.serial_port = None
+    
+    def write(self, data):
+        """Envia texto para a porta serial"""
+        if self.serial_port and self.serial_port.is_open:
+            self.serial_port.write(data.encode())
+    
+    def fileno(self):
+        """Descritor da porta para uso em selectors (somente POSIX)"""
+        return self.serial_port.fileno()
+    
+    def read_ready(self):
+        """
+        Lê e processa os bytes disponíveis após o selector sinalizar a porta
+        
+        Raises:
+            serial.SerialException: Se a porta foi desconectada
+        """
+        chunk = os.read(self.fileno(), READ_SIZE)
+        arrival = wall_clock()
+        if not chunk:
+            raise serial.SerialException(
+                "device reports readiness to read but returned no data "
+                "(device disconnected?)"
+            )
+        self.metrics.record(len(chunk))
+        if self.on_rx:
+            self.on_rx(len(chunk))
+        self.feed(chunk, arrival)
+    
+    def feed(self, chunk, timestamp=None):
+        """
+        Processa bytes recebidos e entrega as linhas completas
+        
+        Pode ser usado sem porta serial (benchmarks, reprocessamento).
+        
+        Args:
+            chunk (bytes): Dados brutos
+            timestamp (float): Instante de chegada (padrão: agora)
+            
+        Returns:
+            list: Linhas processadas neste chunk
+        """
+        self.bytes_received += len(chunk)
+        block = self.framer.feed_block(chunk)
+        if block is None:
+            return []
+        
+        if timestamp is None:
+            timestamp = wall_clock()
+        lines = self.process_lines(self.sanitizer.sanitize_lines(block))
+        if lines:
+            self.lines_captured += len(lines)
+            for consumer in self.consumers:
+                consumer(lines, timestamp)
+        return lines
+    
+    def process_lines(self, lines):
+        """Aplica o filtro de categoria às linhas sanitizadas"""
+        select = category_selector(self.log_filter)
+        if select is not None:
+            lines = [line for line in lines if select(line)]
+        return lines
+    
+    def _read_loop(self):
+        """
+        Thread de leitura serial orientada a eventos.
+        
+        Em POSIX espera no descritor da porta com um selector; nos demais
+        sistemas faz uma leitura bloqueante do primeiro byte. Nos dois casos
+        a espera dura no máximo self.timeout, que limita o tempo de resposta
+        ao stop() sem consumir CPU com a linha ociosa.
+        """
+        selector = None
+        if supports_select(self):
+            selector = selectors.DefaultSelector()
+            selector.register(self.fileno(), selectors.EVENT_READ)
+        
+        try:
+            while self.running:
+                try:
+                    if selector:
+                        if not selector.select(timeout=self.timeout):
+                            self.metrics.record(0)
+                            continue
+                        self.read_ready()
+                        continue
+                    
+                    # Aguardar o primeiro byte e ler o restante disponível
+                    chunk = self.serial_port.read(1)
+                    arrival = wall_clock()
+                    if chunk and self.serial_port.in_waiting:
+                        chunk += self.serial_port.read(min(self.serial_port.in_waiting, READ_SIZE))
+                    self.metrics.record(len(chunk))
+                    if not chunk:
+                        continue
+                    if self.on_rx:
+                        self.on_rx(len(chunk))
+                    
+                    # Processar linhas completas
+                    self.feed(chunk, arrival)
+                    
+                except Exception as e:
+                    if not self.running:
+                        # Porta fechada durante o stop()
+                        break
+                    logging.error(f"Erro na leitura serial: {str(e)}")
+                    self.error = e
+                    self.running = False
+                    if self.on_error:
+                        self.on_error(e)
+                    break
+        finally:
+            if selector:
+                selector.close()
+
+
+class CaptureHub:
+    """
+    Captura simultânea de várias portas seriais, uma sessão por porta.
+    
+    Cada porta tem seu próprio CaptureEngine (filtros, timestamps e
+    consumidores). Em sistemas POSIX uma única thread aguarda em um
+    selector pelas portas e só acorda quando alguma tem dados, então o
+    custo não cresce com uma thread por porta. Onde as portas não expõem
+    descritor (Windows), cada sessão usa a thread do próprio engine.
+    """
+    
+    def __init__(self):
+        self.sessions = {}
+        self.running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        # Porta sendo lida pela thread do selector, fora do lock
+        self._reading = None
+        self._idle = threading.Condition(self._lock)
+        # Criados na primeira sessão e fechados em stop()
+        self._selector = None
+        self._wakeup_r = self._wakeup_w = None
+    
+    def _open(self):
+        """Cria o selector e o par de sockets de aviso, se necessário"""
+        if self._selector is not None:
+            return
+        self._selector = selectors.DefaultSelector()
+        
+        # Par de sockets para acordar o selector quando as portas mudam
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+    
+    def add_session(self, engine):
+        """
+        Abre a porta do engine (se necessário) e inicia sua captura
+        
+        Args:
+            engine (CaptureEngine): Sessão configurada com porta e baud rate
+            
+        Returns:
+            CaptureEngine: A própria sessão
+        """
+        if engine.port in self.sessions:
+            raise ValueError(f"Porta {engine.port} já está em captura")
+        if engine.serial_port is None:
+            engine.open()
+        
+        with self._lock:
+            self._open()
+            self.sessions[engine.port] = engine
+            if supports_select(engine):
+                engine.running = True
+                self._selector.register(engine.fileno(), selectors.EVENT_READ, engine)
+            else:
+                engine.start()
+        
+        self._start_thread()
+        self._wakeup()
+        return engine
+    
+    def remove_session(self, port):
+        """Para a captura de uma porta e fecha a sessão"""
+        with self._lock:
+            engine = self.sessions.pop(port, None)
+            if engine is None:
+                return
+            self._unregister(engine)
+            # Não fechar a porta no meio de uma leitura dela
+            if threading.current_thread() is not self._thread:
+                while self._reading is engine:
+                    self._idle.wait()
+        engine.stop()
+    
+    def stop(self):
+        """
+        Encerra todas as sessões e a thread de leitura
+        
+        O selector e o par de sockets também são fechados; uma nova
+        add_session() os cria de novo.
+        """
+        for port in list(self.sessions):
+            self.remove_session(port)
+        self.running = False
+        self._wakeup()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+            if self._thread.is_alive():
+                # A thread ainda usa o selector: ele fica aberto
+                logging.warning("Thread de captura multiporta não encerrou")
+                return
+        self._thread = None
+        with self._lock:
+            if self._selector is not None:
+                self._selector.close()
+                self._wakeup_r.close()
+                self._wakeup_w.close()
+                self._selector = None
+                self._wakeup_r = self._wakeup_w = None
+    
+    def _start_thread(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._select_loop, daemon=True)
+        self._thread.start()
+    
+    def _wakeup(self):
+        wakeup_w = self._wakeup_w
+        if wakeup_w is None:
+            return
+        try:
+            wakeup_w.send(b'\0')
+        except OSError:
+            pass
+    
+    def _unregister(self, engine):
+        for key in list(self._selector.get_map().values()):
+            if key.data is engine:
+                self._selector.unregister(key.fileobj)
+    
+    def _select_loop(self):
+        """Thread única de leitura de todas as portas multiplexadas"""
+        selector = self._selector
+        while self.running:
+            events = selector.select(timeout=1.0)
+            for key, _ in events:
+                engine = key.data
+                if engine is None:
+                    # Apenas acordar: descartar os bytes de aviso
+                    try:
+                        self._wakeup_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                
+                # Sob o lock, apenas a verificação: a leitura e os consumidores
+                # da porta rodam fora dele, sem atrasar as outras portas nem
+                # add_session/remove_session
+                with self._lock:
+                    if self.sessions.get(engine.port) is not engine:
+                        continue
+                    self._reading = engine
+                error = None
+                try:
+                    engine.read_ready()
+                except Exception as e:
+                    error = e
+                finally:
+                    with self._lock:
+                        self._reading = None
+                        self._idle.notify_all()
+                        removed = self.sessions.get(engine.port) is not engine
+                        if error is not None and not removed:
+                            self._unregister(engine)
+                
+                if error is not None and not removed:
+                    logging.error(f"Erro na leitura serial ({engine.port}): {str(error)}")
+                    engine.error = error
+                    engine.running = False
+                    if engine.on_error:
+                        engine.on_error(error)
+
+
+# Compressores disponíveis para segmentos fechados
+COMPRESSORS = {
+    'gzip': ('.gz', gzip.open),
+    'lzma': ('.xz', lzma.open),
+}
+
+
+class RotatingLogWriter:
+    """
+    Grava em disco, em segundo plano, todas as linhas capturadas.
+    
+    write_lines() apenas enfileira o lote e retorna, então pode ser usado
+    como consumidor de um CaptureEngine sem que a captura espere pelo
+    disco. Uma thread própria formata os timestamps, grava os lotes
+    acumulados em blocos grandes, troca de arquivo por tamanho ou por tempo
+    e, opcionalmente, comprime os segmentos fechados com gzip ou lzma.
+    """
+    
+    def __init__(self, directory='.', prefix='logs_restorecell',
+                 max_bytes=64 * 1024 * 1024, max_seconds=3600, compression=None,
+                 flush_interval=0.5, buffer_size=1024 * 1024, max_pending=1000000,
+                 timestamps=True):
+        if compression and compression not in COMPRESSORS:
+            raise ValueError(f"Compressão desconhecida: {compression}")
+        
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes          # 0 = sem rotação por tamanho
+        self.max_seconds = max_seconds      # 0 = sem rotação por tempo
+        self.compression = compression
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.max_pending = max_pending
+        self.timestamps = timestamps
+        self._formatter = TimestampFormatter()
+        
+        # Estatísticas
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.dropped_lines = 0
+        self.segments = []
+        
+        self.running = False
+        self._pending = deque()
+        self._enqueued = 0  # Alterado apenas por write_lines()
+        self._dequeued = 0  # Alterado apenas pela thread de gravação
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._file = None
+        self._path = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+        self._compressors = []
+    
+    @property
+    def current_path(self):
+        """Caminho do segmento aberto no momento"""
+        return self._path
+    
+    def start(self):
+        """Inicia a thread de gravação"""
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+    
+    def write_lines(self, lines, timestamp=None):
+        """
+        Enfileira um lote de linhas para gravação (não bloqueia)
+        
+        Args:
+            lines (list): Linhas já processadas, sem '\n'
+            timestamp (float): Instante de chegada do lote (wall_clock)
+        """
+        if self._enqueued - self._dequeued >= self.max_pending:
+            # Disco não acompanha: descartar e contabilizar
+            self.dropped_lines += len(lines)
+            return
+        self._pending.append((timestamp, lines))
+        self._enqueued += len(lines)
+    
+    def close(self):
+        """Grava o que estiver pendente e fecha o segmento atual"""
+        self.running = False
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10.0)
+        self._thread = None
+        
+        # Aguardar compressões em andamento
+        for thread in self._compressors:
+            thread.join()
+        self._compressors.clear()
+    
+    def _write_loop(self):
+        """Thread de gravação: acumula lotes e grava em blocos"""
+        try:
+            while self.running:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._flush_pending()
+            self._flush_pending()
+        except Exception as e:
+            logging.error(f"Erro ao gravar log em disco: {str(e)}")
+        finally:
+            self._close_segment()
+    
+    def _flush_pending(self):
+        pending = self._pending
+        if not pending:
+            if self._file and self._segment_expired():
+                self._close_segment()
+            return
+        
+        chunks = []
+        count = 0
+        while pending:
+            timestamp, lines = pending.popleft()
+            count += len(lines)
+            if self.timestamps and timestamp is not None:
+                prefix = self._formatter.format(timestamp) + ' '
+                chunks.append(prefix + ('\n' + prefix).join(lines))
+            else:
+                chunks.append('\n'.join(lines))
+        self._dequeued += count
+        
+        data = '\n'.join(chunks) + '\n'
+        if self._file is None or self._segment_expired():
+            self._open_segment()
+        self._file.write(data)
+        self._file.flush()
+        
+        size = len(data.encode('utf-8')) if not data.isascii() else len(data)
+        self._segment_bytes += size
+        self.bytes_written += size
+        self.lines_written += count
+    
+    def _segment_expired(self):
+        if self.max_bytes and self._segment_bytes >= self.max_bytes:
+            return True
+        if self.max_seconds and time.monotonic() - self._segment_started >= self.max_seconds:
+            return True
+        return False
+    
+    def _open_segment(self):
+        self._close_segment()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{timestamp}.txt")
+        suffix = 1
+        while os.path.exists(path) or any(os.path.exists(path + ext) for ext, _ in COMPRESSORS.values()):
+            path = os.path.join(self.directory, f"{self.prefix}_{timestamp}_{suffix}.txt")
+            suffix += 1
+        
+        self._file = open(path, 'w', encoding='utf-8', newline='', buffering=self.buffer_size)
+        self._path = path
+        self._segment_bytes = 0
+        self._segment_started = time.monotonic()
+        self.segments.append(path)
+    
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        path = self._path
+        self._file = None
+        self._path = None
+        
+        if self.compression:
+            # Comprimir fora da thread de gravação
+            thread = threading.Thread(target=self._compress, args=(path,), daemon=True)
+            thread.start()
+            self._compressors = [t for t in self._compressors if t.is_alive()]
+            self._compressors.append(thread)
+    
+    def _compress(self, path):
+        extension, opener = COMPRESSORS[self.compression]
+        try:
+            with open(path, 'rb') as source, opener(path + extension, 'wb') as target:
+                shutil.copyfileobj(source, target, self.buffer_size)
+            os.remove(path)
+            index = self.segments.index(path)
+            self.segments[index] = path + extension
+        except Exception as e:
+            logging.error(f"Erro ao comprimir {path}: {str(e)}")
+
+
+# Padrões de gatilho sugeridos (falhas que interessam em uma bancada)
+TRIGGER_PATTERNS = ['kernel panic', 'pmic fault']
+
+
+class TriggerCapture:
+    """
+    Captura por gatilho, como em um analisador lógico.
+    
+    write_lines() é um consumidor de CaptureEngine. Enquanto armado, as
+    linhas dos últimos pre_seconds ficam em um anel limitado a max_bytes;
+    nenhuma linha dentro da janela é descartada antes desse limite. Quando
+    uma linha casa um dos padrões (texto ou /regex/), o anel é congelado,
+    as linhas dos post_seconds seguintes são acrescentadas e o conjunto é
+    gravado em um arquivo de snapshot por uma thread própria; em seguida o
+    gatilho é rearmado. Um timer encerra a janela posterior mesmo que a
+    placa pare de enviar linhas. A memória fica limitada a duas vezes
+    max_bytes, qualquer que seja a duração da captura.
+    """
+    
+    def __init__(self, patterns=None, directory='.', prefix='logs_restorecell_trigger',
+                 pre_seconds=30, post_seconds=10, max_bytes=8 * 1024 * 1024,
+                 timestamps=True, on_snapshot=None):
+        """
+        Args:
+            patterns (list): Padrões que disparam o gatilho
+            directory (str): Diretório dos snapshots
+            prefix (str): Início do nome dos arquivos de snapshot
+            pre_seconds (float): Janela anterior ao disparo
+            post_seconds (float): Janela posterior ao disparo
+            max_bytes (int): Memória máxima de cada janela
+            timestamps (bool): Prefixar as linhas com o timestamp
+            on_snapshot (callable): Chamado com o caminho de cada snapshot
+                gravado (na thread de gravação)
+            
+        Raises:
+            re.error: Algum padrão /regex/ inválido ou recusado
+        """
+        self.patterns = list(TRIGGER_PATTERNS if patterns is None else patterns)
+        self.directory = directory
+        self.prefix = prefix
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_bytes = max_bytes
+        self.timestamps = timestamps
+        self.on_snapshot = on_snapshot
+        self._select = CategoryMatcher({'gatilho': self.patterns}).selector(('gatilho',))
+        
+        # Estatísticas
+        self.triggers = 0
+        self.snapshots = []
+        
+        self._lock = threading.Lock()
+        self._ring = deque()   # (timestamp, linha) da janela anterior
+        self._ring_bytes = 0
+        self._post = None      # Disparo em andamento
+        self._timer = None
+        self._writers = []
+    
+    @property
+    def triggered(self):
+        """Indica se a janela posterior de um disparo está em andamento"""
+        return self._post is not None
+    
+    def write_lines(self, lines, timestamp):
+        """
+        Recebe um lote de linhas (consumidor do engine)
+        
+        Args:
+            lines (list): Linhas sanitizadas
+            timestamp (float): Chegada do lote
+        """
+        getsizeof = sys.getsizeof
+        with self._lock:
+            ring = self._ring
+            for line in lines:
+                post = self._post
+                if post is not None:
+                    if timestamp < post['deadline'] and post['bytes'] < self.max_bytes:
+                        post['after'].append((timestamp, line))
+                        post['bytes'] += getsizeof(line)
+                        continue
+                    self._finish()
+                
+                ring.append((timestamp, line))
+                self._ring_bytes += getsizeof(line)
+                oldest = timestamp - self.pre_seconds
+                while ring and (self._ring_bytes > self.max_bytes or ring[0][0] < oldest):
+                    self._ring_bytes -= getsizeof(ring.popleft()[1])
+                
+                if self._select(line):
+                    self._fire(line, timestamp)
+    
+    def _fire(self, line, timestamp):
+        """Congela a janela anterior e abre a posterior (com o lock)"""
+        self.triggers += 1
+        self._post = {
+            'time': timestamp,
+            'line': line,
+            'deadline': timestamp + self.post_seconds,
+            'before': list(self._ring),
+            'after': [],
+            'bytes': 0,
+        }
+        self._ring.clear()
+        self._ring_bytes = 0
+        self._timer = threading.Timer(self.post_seconds, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _on_timer(self):
+        with self._lock:
+            if self._post is not None:
+                self._finish()
+    
+    def _finish(self):
+        """Encerra o disparo e grava o snapshot em segundo plano (com o lock)"""
+        post = self._post
+        self._post = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        writer = threading.Thread(target=self._write_snapshot, args=(post,), daemon=True)
+        self._writers = [thread for thread in self._writers if thread.is_alive()]
+        self._writers.append(writer)
+        writer.start()
+    
+    def _write_snapshot(self, post):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.fromtimestamp(post['time']).strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(self.directory, f"{self.prefix}_{stamp}.txt")
+            suffix = 1
+            while os.path.exists(path):
+                path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{suffix}.txt")
+                suffix += 1
+            
+            formatter = TimestampFormatter()
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(
+                    f"# Gatilho: {post['line']}\n"
+                    f"# Disparo: {formatter.format(post['time'])} "
+                    f"(-{self.pre_seconds:g}s / +{self.post_seconds:g}s)\n"
+                )
+                for timestamp, line in post['before'] + post['after']:
+                    if self.timestamps:
+                        line = f"{formatter.format(timestamp)} {line}"
+                    f.write(line + '\n')
+            
+            self.snapshots.append(path)
+            logging.info(f"Snapshot do gatilho gravado em: {path}")
+            if self.on_snapshot:
+                self.on_snapshot(path)
+        except Exception as e:
+            logging.error(f"Erro ao gravar snapshot do gatilho: {str(e)}")
+    
+    def close(self):
+        """Grava o disparo em andamento, se houver, e aguarda as gravações"""
+        with self._lock:
+            if self._post is not None:
+                self._finish()
+            writers = list(self._writers)
+            self._writers.clear()
+        for thread in writers:
+            thread.join(timeout=10.0)
+
+
+# Comandos ADB
+ADB_BINARY = 'adb'
+ADB_TIMEOUT = 30.0  # Segundos até um comando ADB ser encerrado
+
+
+class AdbCommand:
+    """
+    Comando adb executado em uma thread própria, sem shell.
+    
+    A saída (stdout e stderr juntos) passa pelo mesmo LineFramer e
+    LogSanitizer da captura serial e é entregue linha a linha, conforme
+    chega, como on_lines(linhas, timestamp): a mesma assinatura dos
+    consumidores do CaptureEngine. cancel() e o tempo limite encerram o
+    processo; on_done(comando) é chamado da thread do comando ao final.
+    """
+    
+    def __init__(self, args, on_lines=None, on_done=None, timeout=ADB_TIMEOUT,
+                 adb=ADB_BINARY, serial=None):
+        """
+        Args:
+            args (list): Argumentos do adb (ex.: ['shell', 'dumpsys', 'battery'])
+            on_lines (callable): Consumidor das linhas de saída
+            on_done (callable): Chamado com o próprio comando ao terminar
+            timeout (float): Segundos até encerrar o processo (None = sem limite)
+            adb (str): Executável do adb
+            serial (str): Aparelho alvo (-s); None = aparelho padrão do adb
+        """
+        self.args = list(args)
+        self.adb = adb
+        self.serial = serial
+        self.on_lines = on_lines
+        self.on_done = on_done
+        self.timeout = timeout
+        
+        # Resultado (escrito apenas pela thread do comando)
+        self.returncode = None
+        self.error = None
+        self.lines = 0
+        self.timed_out = False
+        self.finished = False
+        self.started = None
+        self.ended = None
+        
+        self._process = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+    
+    @property
+    def argv(self):
+        """Linha de comando completa passada ao sistema"""
+        serial = ['-s', self.serial] if self.serial else []
+        return [self.adb] + serial + self.args
+    
+    @property
+    def command_line(self):
+        """Linha de comando para exibição"""
+        return subprocess.list2cmdline(self.argv)
+    
+    @property
+    def shell_command(self):
+        """Comando enviado ao shell (o adb junta os argumentos com espaço)"""
+        return ' '.join(self.args[1:])
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    @property
+    def elapsed(self):
+        """Segundos desde o início (até o fim, se já terminou)"""
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+    
+    @property
+    def status(self):
+        """Situação do comando para exibição"""
+        if not self.finished:
+            return "em andamento"
+        if self.timed_out:
+            return f"tempo esgotado após {self.timeout:g} s"
+        if self.cancelled:
+            return "cancelado"
+        if self.error is not None:
+            return f"erro: {str(self.error)}"
+        return "ok" if self.returncode == 0 else f"código {self.returncode}"
+    
+    def start(self):
+        """Inicia o comando em segundo plano"""
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def cancel(self):
+        """Encerra o processo, se ainda estiver rodando"""
+        self._cancelled.set()
+        self._kill()
+    
+    def wait(self, timeout=None):
+        """
+        Aguarda o fim do comando
+        
+        Returns:
+            bool: True se o comando terminou
+        """
+        return self._done.wait(timeout)
+    
+    def _kill(self):
+        with self._lock:
+            process = self._process
+        if process is not None and process.poll() is None:
+            try:
+                if os.name == 'posix':
+                    # Grupo inteiro: filhos do adb também seguram o pipe
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except OSError:
+                pass
+    
+    def _expire(self):
+        self.timed_out = True
+        self._kill()
+    
+    def _run(self):
+        timer = None
+        try:
+            # Sem janela de console no Windows; grupo próprio no POSIX
+            flags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+            process = subprocess.Popen(
+                self.argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                creationflags=flags,
+                start_new_session=(os.name == 'posix')
+            )
+            with self._lock:
+                self._process = process
+            if self._cancelled.is_set():
+                self._kill()
+            if self.timeout:
+                timer = threading.Timer(self.timeout, self._expire)
+                timer.daemon = True
+                timer.start()
+            
+            framer = LineFramer()
+            sanitizer = LogSanitizer()
+            read = process.stdout.read1
+            while True:
+                chunk = read(READ_SIZE)
+                if not chunk:
+                    break
+                arrival = wall_clock()
+                block = framer.feed_block(chunk)
+                if block is not None:
+                    self._deliver(sanitizer.sanitize_lines(block), arrival)
+            
+            # Última linha sem '\n'
+            rest = framer.flush()
+            if rest:
+                self._deliver(sanitizer.sanitize_lines(rest), wall_clock())
+            
+            process.stdout.close()
+            self.returncode = process.wait()
+            if self.timed_out:
+                self.error = subprocess.TimeoutExpired(self.argv, self.timeout)
+        except Exception as e:
+            self.error = e
+            logging.error(f"Erro ao executar comando ADB: {str(e)}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._finish()
+    
+    def _finish(self):
+        """Marca o fim do comando e avisa on_done"""
+        self.ended = time.monotonic()
+        self.finished = True
+        self._done.set()
+        if self.on_done:
+            try:
+                self.on_done(self)
+            except Exception as e:
+                logging.error(f"Erro ao finalizar comando ADB: {str(e)}")
+    
+    def _deliver(self, lines, timestamp):
+        if lines:
+            self.lines += len(lines)
+            if self.on_lines:
+                self.on_lines(lines, timestamp)
+
+
+class AdbRunner:
+    """
+    Executa vários comandos adb ao mesmo tempo, cada um em sua thread.
+    
+    Mantém a lista dos comandos em andamento para que a interface possa
+    cancelá-los todos (ao trocar de modo ou fechar a janela). Com um
+    AdbShellPool, comandos 'shell <comando>' reaproveitam sessões abertas;
+    com um AdbClient e o servidor adb no ar, os demais comandos suportados
+    (e 'shell' sem pool) falam direto com o servidor; o resto inicia o
+    binário adb.
+    """
+    
+    def __init__(self, adb=ADB_BINARY, timeout=ADB_TIMEOUT, pool=None, client=None):
+        self.adb = adb
+        self.timeout = timeout
+        self.pool = pool
+        self.client = client
+        self._commands = []
+        self._lock = threading.Lock()
+    
+    def run(self, args, on_lines=None, on_done=None, timeout=None, serial=None):
+        """
+        Inicia um comando adb
+        
+        Args:
+            args (list): Argumentos do adb, sem o executável
+            on_lines (callable): Consumidor das linhas de saída
+            on_done (callable): Chamado com o comando ao terminar
+            timeout (float): Tempo limite (padrão: o do runner)
+            serial (str): Aparelho alvo (None = aparelho padrão do adb)
+            
+        Returns:
+            AdbCommand: Comando já iniciado
+        """
+        options = dict(
+            on_lines=on_lines,
+            on_done=lambda cmd: self._finished(cmd, on_done),
+            timeout=self.timeout if timeout is None else timeout,
+            serial=serial
+        )
+        if self.pool is not None and len(args) > 1 and args[0] == 'shell':
+            command = PooledShellCommand(args, self.pool, **options)
+        elif (self.client is not None and NativeAdbCommand.supports(args)
+                and self.client.available()):
+            command = NativeAdbCommand(args, self.client, adb=self.adb, **options)
+        else:
+            command = AdbCommand(args, adb=self.adb, **options)
+        with self._lock:
+            self._commands.append(command)
+        return command.start()
+    
+    def run_on_devices(self, args, serials, on_lines=None, on_done=None, timeout=None):
+        """
+        Inicia o mesmo comando em vários aparelhos ao mesmo tempo
+        
+        Args:
+            args (list): Argumentos do adb, sem o executável nem -s
+            serials (list): Números de série dos aparelhos
+            on_lines (callable): Recebe (serial, linhas, timestamp)
+            on_done (callable): Chamado com o AdbDeviceRun quando todos terminarem
+            timeout (float): Tempo limite de cada aparelho
+            
+        Returns:
+            AdbDeviceRun: Execução já iniciada em todos os aparelhos
+        """
+        device_run = AdbDeviceRun(args, serials, on_done)
+        for serial in device_run.serials:
+            consumer = None
+            if on_lines:
+                consumer = lambda lines, timestamp, serial=serial: on_lines(serial, lines, timestamp)
+            device_run.commands[serial] = self.run(
+                args, on_lines=consumer, on_done=device_run._finished,
+                timeout=timeout, serial=serial
+            )
+        return device_run
+    
+    @property
+    def running(self):
+        """Comandos ainda em andamento"""
+        with self._lock:
+            return list(self._commands)
+    
+    def cancel_all(self):
+        """Encerra todos os comandos em andamento"""
+        for command in self.running:
+            command.cancel()
+    
+    def close(self):
+        """Cancela os comandos e encerra as sessões do pool"""
+        self.cancel_all()
+        if self.pool is not None:
+            self.pool.close()
+    
+    def _finished(self, command, on_done):
+        with self._lock:
+            if command in self._commands:
+                self._commands.remove(command)
+        if on_done:
+            on_done(command)
+
+
+# Sessões 'adb shell' reaproveitadas entre comandos
+ADB_SHELL_POOL_SIZE = 2       # Sessões abertas por dispositivo
+ADB_SHELL_IDLE_CHECK = 30.0   # Sessão ociosa há mais tempo é testada antes do uso
+ADB_SHELL_PING_TIMEOUT = 2.0  # Segundos para a sessão responder ao teste
+
+
+def frame_shell_command(command, marker):
+    """
+    Envolve um comando do shell do aparelho com o marcador de fim
+    
+    O comando roda em um subshell (um 'exit' nele não impede o marcador)
+    com stdin em /dev/null (não consome a entrada da sessão nem espera
+    pelo pty), e o printf começa com '\\n' para que o marcador fique em uma
+    linha própria mesmo quando a saída não termina em quebra de linha.
+    
+    Args:
+        command (str): Comando do shell (ex.: 'dumpsys battery')
+        marker (str): Marcador só com letras e dígitos
+        
+    Returns:
+        str: Texto a enviar ao shell, terminado em '\\n'
+    """
+    return f"( {command}\n) </dev/null 2>&1; printf '\\n{marker} %d\\n' $?\n"
+
+
+def marker_returncode(line, marker):
+    """
+    Código de saída de uma linha 'marcador código'
+    
+    Returns:
+        int: Código de saída, ou None se a linha não é o marcador
+    """
+    if not line.startswith(marker + ' '):
+        return None
+    try:
+        return int(line[len(marker) + 1:])
+    except ValueError:
+        return None
+
+
+class AdbShellSession:
+    """
+    Processo 'adb shell' de longa duração que executa vários comandos.
+    
+    Cada comando é escrito na entrada do shell seguido de um marcador
+    único com o código de saída; a saída é lida até o marcador, de modo
+    que o processo adb e o shell do aparelho são abertos uma só vez. A
+    sessão executa um comando por vez; quem a usa em paralelo é o
+    AdbShellPool.
+    """
+    
+    _ids = count()
+    
+    def __init__(self, adb=ADB_BINARY, serial=None):
+        """
+        Args:
+            adb (str): Executável do adb
+            serial (str): Número de série do aparelho (None = aparelho padrão)
+        """
+        self.adb = adb
+        self.serial = serial
+        self.process = None
+        self.commands = 0
+        self.last_used = 0.0
+        
+        # Marcador só com letras e dígitos: passa intacto pelo sanitizador
+        self._marker = f"RESTORECELLEND{os.getpid()}X{next(self._ids)}X"
+        self._framer = LineFramer()
+        self._sanitizer = LogSanitizer()
+    
+    @property
+    def argv(self):
+        """Linha de comando do processo da sessão"""
+        serial = ['-s', self.serial] if self.serial else []
+        return [self.adb] + serial + ['shell']
+    
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+    
+    def open(self):
+        """Inicia o processo adb shell"""
+        self.process = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0),
+            start_new_session=(os.name == 'posix')
+        )
+        self.last_used = time.monotonic()
+        return self
+    
+    def close(self):
+        """Encerra o processo (interrompe o comando em andamento)"""
+        process = self.process
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                if os.name == 'posix':
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except OSError:
+                pass
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            process.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            pass
+    
+    def execute(self, command, on_lines=None):
+        """
+        Executa um comando no shell do aparelho e aguarda o marcador
+        
+        Args:
+            command (str): Comando do shell (ex.: 'dumpsys battery')
+            on_lines (callable): Recebe (linhas, timestamp) conforme chegam
+            
+        Returns:
+            int: Código de saída do comando
+            
+        Raises:
+            ConnectionError: Se a sessão terminou antes do marcador
+        """
+        self.commands += 1
+        marker = f"{self._marker}{self.commands}"
+        
+        framed = frame_shell_command(command, marker)
+        try:
+            self.process.stdin.write(framed.encode())
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ConnectionError(f"sessão adb shell encerrada: {str(e)}")
+        
+        framer = self._framer
+        sanitize = self._sanitizer.sanitize_lines
+        read = self.process.stdout.read1
+        while True:
+            try:
+                chunk = read(READ_SIZE)
+            except (OSError, ValueError):
+                chunk = b''
+            if not chunk:
+                raise ConnectionError("sessão adb shell encerrada")
+            arrival = wall_clock()
+            block = framer.feed_block(chunk)
+            if block is None:
+                continue
+            lines = sanitize(block)
+            
+            # Nada é escrito depois do marcador: ele é sempre a última linha
+            # (a linha vazia do '\n' inicial já foi removida pelo sanitizador)
+            returncode = marker_returncode(lines[-1], marker) if lines else None
+            if returncode is not None:
+                if len(lines) > 1 and on_lines:
+                    on_lines(lines[:-1], arrival)
+                self.last_used = time.monotonic()
+                return returncode
+            if lines and on_lines:
+                on_lines(lines, arrival)
+    
+    def ping(self, timeout=ADB_SHELL_PING_TIMEOUT):
+        """
+        Verifica se a sessão ainda responde
+        
+        Returns:
+            bool: True se o shell respondeu dentro do tempo limite
+        """
+        if not self.alive:
+            return False
+        timer = threading.Timer(timeout, self.close)
+        timer.daemon = True
+        timer.start()
+        try:
+            return self.execute('true') == 0
+        except Exception:
+            return False
+        finally:
+            timer.cancel()
+
+
+class AdbShellPool:
+    """
+    Sessões adb shell abertas por aparelho, emprestadas a um comando por vez.
+    
+    Até size sessões por número de série; um comando que chega com todas
+    ocupadas aguarda a próxima livre. Sessões que morreram (aparelho
+    reiniciado ou desconectado) são descartadas na devolução ou antes do
+    empréstimo, e as ociosas há mais de idle_check segundos são testadas
+    com um comando vazio; uma nova sessão é aberta no lugar quando preciso.
+    """
+    
+    def __init__(self, adb=ADB_BINARY, size=ADB_SHELL_POOL_SIZE,
+                 idle_check=ADB_SHELL_IDLE_CHECK):
+        self.adb = adb
+        self.size = size
+        self.idle_check = idle_check
+        self.spawned = 0  # Sessões abertas desde a criação (inclui reaberturas)
+        
+        self._idle = {}   # serial -> [AdbShellSession]
+        self._count = {}  # serial -> sessões existentes (ociosas + emprestadas)
+        self._cond = threading.Condition()
+        self._closed = False
+    
+    def acquire(self, serial=None, timeout=None):
+        """
+        Empresta uma sessão saudável do aparelho, abrindo uma se necessário
+        
+        Args:
+            serial (str): Número de série (None = aparelho padrão)
+            timeout (float): Espera máxima por uma sessão livre
+            
+        Returns:
+            AdbShellSession: Sessão reservada; devolver com release()
+            
+        Raises:
+            TimeoutError: Se nenhuma sessão ficou livre a tempo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                session = None
+                while session is None:
+                    if self._closed:
+                        raise ConnectionError("pool de sessões adb encerrado")
+                    idle = self._idle.get(serial)
+                    if idle:
+                        session = idle.pop()
+                    elif self._count.get(serial, 0) < self.size:
+                        self._count[serial] = self._count.get(serial, 0) + 1
+                        break
+                    else:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError("nenhuma sessão adb shell livre")
+                        self._cond.wait(remaining)
+            
+            if session is None:
+                # Vaga reservada: abrir fora do lock
+                try:
+                    session = AdbShellSession(self.adb, serial).open()
+                except Exception:
+                    self._discard(serial)
+                    raise
+                self.spawned += 1
+                return session
+            
+            # Ociosa: conferir antes de emprestar
+            if session.alive and (time.monotonic() - session.last_used < self.idle_check
+                                  or session.ping()):
+                return session
+            session.close()
+            self._discard(serial)
+    
+    def release(self, session, broken=False):
+        """
+        Devolve uma sessão emprestada
+        
+        Args:
+            session (AdbShellSession): Sessão obtida com acquire()
+            broken (bool): Comando interrompido; a sessão é descartada
+        """
+        if broken or not session.alive or self._closed:
+            session.close()
+            self._discard(session.serial)
+            return
+        with self._cond:
+            self._idle.setdefault(session.serial, []).append(session)
+            self._cond.notify()
+    
+    def close(self):
+        """Encerra todas as sessões ociosas; as emprestadas ao serem devolvidas"""
+        with self._cond:
+            self._closed = True
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for session in sessions:
+            session.close()
+            self._discard(session.serial)
+    
+    def _discard(self, serial):
+        with self._cond:
+            self._count[serial] = max(0, self._count.get(serial, 0) - 1)
+            self._cond.notify()
+
+
+class PooledShellCommand(AdbCommand):
+    """
+    'adb shell <comando>' executado em uma sessão do AdbShellPool.
+    
+    Mesma interface do AdbCommand (on_lines, on_done, timeout, cancel());
+    o tempo limite conta desde o início, incluindo a espera por uma sessão
+    livre. Cancelar ou estourar o tempo encerra a sessão usada, que o pool
+    substitui no próximo empréstimo.
+    """
+    
+    def __init__(self, args, pool, serial=None, **kwargs):
+        """
+        Args:
+            args (list): Argumentos do adb, começando por 'shell'
+            pool (AdbShellPool): Pool de onde a sessão é emprestada
+            serial (str): Número de série do aparelho (None = padrão)
+        """
+        super().__init__(args, adb=pool.adb, serial=serial, **kwargs)
+        self.pool = pool
+        self._session = None
+    
+    def _kill(self):
+        with self._lock:
+            session = self._session
+        if session is not None:
+            session.close()
+    
+    def _run(self):
+        timer = None
+        session = None
+        broken = True
+        # Um único prazo: a espera por uma sessão livre conta no tempo limite
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        try:
+            try:
+                session = self.pool.acquire(self.serial, timeout=self.timeout or None)
+            except TimeoutError:
+                self.timed_out = True
+                raise
+            with self._lock:
+                self._session = session
+            if self._cancelled.is_set():
+                self._kill()
+            if deadline is not None:
+                timer = threading.Timer(max(0.0, deadline - time.monotonic()), self._expire)
+                timer.daemon = True
+                timer.start()
+            
+            self.returncode = session.execute(self.shell_command, self._deliver)
+            broken = False
+        except Exception as e:
+            if self.timed_out:
+                self.error = subprocess.TimeoutExpired(self.argv, self.timeout)
+            elif not self._cancelled.is_set():
+                self.error = e
+                logging.error(f"Erro ao executar comando ADB: {str(e)}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if session is not None:
+                with self._lock:
+                    self._session = None
+                self.pool.release(session, broken)
+            self._finish()
+
+
+def parse_adb_devices(lines):
+    """
+    Interpreta a saída de 'adb devices'
+    
+    Args:
+        lines (iterable): Linhas da saída (já sanitizadas ou não)
+        
+    Returns:
+        list: Pares (serial, estado), ex.: ('R58M123', 'device')
+    """
+    devices = []
+    for line in lines:
+        fields = line.split()
+        # Cabeçalho, mensagens do servidor ('* daemon started ...') e linhas vazias
+        if len(fields) < 2 or line.startswith(('List of devices', '*')):
+            continue
+        devices.append((fields[0], fields[1]))
+    return devices
+
+
+class AdbDeviceRun:
+    """
+    O mesmo comando adb executado em vários aparelhos em paralelo.
+    
+    Cada aparelho tem seu AdbCommand (ou sessão do pool) em commands; a
+    execução termina quando o mais lento termina, e on_done(execução) é
+    chamado uma vez, da thread do último comando.
+    """
+    
+    def __init__(self, args, serials, on_done=None):
+        self.args = list(args)
+        self.serials = list(dict.fromkeys(serials))
+        self.commands = {}  # serial -> AdbCommand
+        self.on_done = on_done
+        self.started = time.monotonic()
+        self.ended = None
+        
+        self._pending = len(self.serials)
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self.serials:
+            self._done.set()
+    
+    @property
+    def finished(self):
+        return self._done.is_set()
+    
+    @property
+    def elapsed(self):
+        """Segundos da execução inteira (até o aparelho mais lento)"""
+        return (self.ended or time.monotonic()) - self.started
+    
+    def wait(self, timeout=None):
+        """Aguarda todos os aparelhos; True se terminaram"""
+        return self._done.wait(timeout)
+    
+    def cancel(self):
+        """Encerra o comando em todos os aparelhos"""
+        for command in list(self.commands.values()):
+            command.cancel()
+    
+    def summary(self):
+        """
+        Resultado de cada aparelho
+        
+        Returns:
+            list: Tuplas (serial, situação, código de saída, linhas, segundos)
+        """
+        rows = []
+        for serial in self.serials:
+            command = self.commands.get(serial)
+            if command is None:
+                continue
+            rows.append((serial, command.status, command.returncode,
+                         command.lines, command.elapsed))
+        return rows
+    
+    def _finished(self, command):
+        with self._lock:
+            # O comando pode terminar antes de run() devolvê-lo
+            self.commands[command.serial] = command
+            self._pending -= 1
+            last = self._pending == 0
+        if not last:
+            return
+        self.ended = time.monotonic()
+        self._done.set()
+        if self.on_done:
+            self.on_done(self)
+
+
+# Protocolo do servidor adb (o mesmo que o binário adb usa)
+ADB_SERVER_HOST = '127.0.0.1'
+ADB_SERVER_PORT = 5037
+ADB_SERVER_TIMEOUT = 2.0   # Segundos para conectar e ler as respostas do servidor
+ADB_SERVER_RECHECK = 5.0   # Segundos até testar de novo um servidor indisponível
+
+
+class AdbClient:
+    """
+    Cliente do servidor adb via TCP (localhost:5037), sem iniciar o binário.
+    
+    Cada requisição é o tamanho em 4 dígitos hexadecimais seguido do nome
+    do serviço; o servidor responde OKAY ou FAIL + mensagem. Serviços
+    host:* são atendidos pelo próprio servidor. Para falar com um
+    aparelho, a conexão é direcionada com host:transport e o serviço
+    seguinte (shell:, reboot:) vira um fluxo de bytes até o fechamento.
+    
+    available() guarda o resultado por ADB_SERVER_RECHECK segundos, para
+    que quem usa o cliente volte ao binário (que também inicia o
+    servidor) sem tentar conectar a cada comando.
+    """
+    
+    def __init__(self, host=ADB_SERVER_HOST, port=ADB_SERVER_PORT,
+                 timeout=ADB_SERVER_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._available = None
+        self._checked = 0.0
+    
+    def connect(self):
+        """
+        Abre uma conexão com o servidor
+        
+        Raises:
+            OSError: Servidor inacessível (também marca o cliente como indisponível)
+        """
+        try:
+            return socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError:
+            self._available = False
+            self._checked = time.monotonic()
+            raise
+    
+    def available(self):
+        """True se o servidor adb respondeu (resultado reaproveitado por alguns segundos)"""
+        now = time.monotonic()
+        if self._available is None or now - self._checked >= ADB_SERVER_RECHECK:
+            try:
+                self.version()
+                self._available = True
+            except OSError:
+                self._available = False
+            self._checked = now
+        return self._available
+    
+    def request(self, sock, service):
+        """
+        Envia um serviço e confere a resposta
+        
+        Raises:
+            ConnectionError: Se o servidor respondeu FAIL
+        """
+        data = service.encode('utf-8')
+        sock.sendall(b'%04x' % len(data) + data)
+        status = self._recv_exact(sock, 4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            message = self._read_block(sock).decode('utf-8', errors='replace')
+            raise ConnectionError(f"adb: {message}")
+        raise ConnectionError(f"resposta inesperada do servidor adb: {status!r}")
+    
+    def version(self):
+        """Versão do protocolo do servidor"""
+        with self.connect() as sock:
+            self.request(sock, 'host:version')
+            return int(self._read_block(sock), 16)
+    
+    def devices(self):
+        """
+        Aparelhos conhecidos pelo servidor
+        
+        Returns:
+            list: Pares (serial, estado), como parse_adb_devices
+        """
+        with self.connect() as sock:
+            self.request(sock, 'host:devices')
+            text = self._read_block(sock).decode('utf-8', errors='replace')
+        return parse_adb_devices(text.splitlines())
+    
+    def open_service(self, service, serial=None):
+        """
+        Abre um serviço de um aparelho (ex.: 'shell:dumpsys battery')
+        
+        Args:
+            service (str): Serviço do adbd
+            serial (str): Aparelho (None = o único conectado)
+            
+        Returns:
+            socket.socket: Conexão com o fluxo do serviço, sem tempo limite
+        """
+        sock = self.connect()
+        try:
+            self.request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+            self.request(sock, service)
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+    
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("servidor adb fechou a conexão")
+            data += chunk
+        return data
+    
+    @classmethod
+    def _read_block(cls, sock):
+        """Resposta com tamanho em 4 dígitos hexadecimais"""
+        size = int(cls._recv_exact(sock, 4), 16)
+        return cls._recv_exact(sock, size)
+
+
+class NativeAdbCommand(AdbCommand):
+    """
+    Comando adb atendido pelo AdbClient, sem iniciar o binário.
+    
+    Mesma interface do AdbCommand. Cobre 'devices', 'reboot' e
+    'shell <comando>'; o código de saída do shell vem de um marcador
+    impresso depois do comando, já que o serviço shell: não o informa.
+    Se o servidor recusar a conexão (parou depois do último teste do
+    AdbClient), o comando é executado pelo binário adb, que o reinicia.
+    """
+    
+    def __init__(self, args, client, **kwargs):
+        """
+        Args:
+            args (list): Argumentos do adb (ver supports())
+            client (AdbClient): Cliente do servidor adb
+        """
+        super().__init__(args, **kwargs)
+        self.client = client
+        self._sock = None
+    
+    @staticmethod
+    def supports(args):
+        """True se os argumentos têm equivalente direto no protocolo"""
+        return list(args) in (['devices'], ['reboot']) or (len(args) > 1 and args[0] == 'shell')
+    
+    def _kill(self):
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # Processo do binário, se o comando voltou para ele
+        super()._kill()
+    
+    def _run(self):
+        timer = None
+        sock = None
+        fallback = False
+        try:
+            if self.timeout:
+                timer = threading.Timer(self.timeout, self._expire)
+                timer.daemon = True
+                timer.start()
+            
+            if self.args == ['devices']:
+                lines = ['List of devices attached']
+                lines += [f"{serial} {state}" for serial, state in self.client.devices()]
+                self._deliver(lines, wall_clock())
+                self.returncode = 0
+                return
+            
+            marker = None
+            service = 'reboot:'
+            if self.args[0] == 'shell':
+                marker = f"RESTORECELLEND{os.getpid()}X{next(AdbShellSession._ids)}X"
+                service = "shell:" + frame_shell_command(self.shell_command, marker)
+            sock = self.client.open_service(service, self.serial)
+            with self._lock:
+                self._sock = sock
+            if self._cancelled.is_set():
+                self._kill()
+            
+            returncode = None if marker else 0
+            framer = LineFramer()
+            sanitizer = LogSanitizer()
+            while True:
+                chunk = sock.recv(READ_SIZE)
+                if not chunk:
+                    break
+                arrival = wall_clock()
+                block = framer.feed_block(chunk)
+                if block is None:
+                    continue
+                lines = sanitizer.sanitize_lines(block)
+                if marker and lines:
+                    code = marker_returncode(lines[-1], marker)
+                    if code is not None:
+                        returncode = code
+                        lines.pop()
+                self._deliver(lines, arrival)
+            rest = framer.flush()
+            if rest:
+                self._deliver(sanitizer.sanitize_lines(rest), wall_clock())
+            
+            if self.timed_out:
+                self.error = subprocess.TimeoutExpired(self.argv, self.timeout)
+            elif not self._cancelled.is_set():
+                self.returncode = returncode if returncode is not None else -1
+        except ConnectionRefusedError:
+            # Nada foi lido ainda: repetir pelo binário
+            fallback = not self._cancelled.is_set()
+        except Exception as e:
+            if self.timed_out:
+                self.error = subprocess.TimeoutExpired(self.argv, self.timeout)
+            elif not self._cancelled.is_set():
+                self.error = e
+                logging.error(f"Erro ao executar comando ADB: {str(e)}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if sock is not None:
+                with self._lock:
+                    self._sock = None
+                sock.close()
+            if not fallback:
+                self._finish()
+        
+        if fallback:
+            logging.info("Servidor adb indisponível; executando pelo binário adb")
+            super()._run()
+
+
+# Captura contínua do adb logcat
+LOGCAT_FORMAT = 'threadtime'
+LOGCAT_SPEC = re.compile(r'^[^\s:]+:[VDIWEFS]$')
+
+
+def parse_logcat_specs(text):
+    """
+    Valida filterspecs do logcat (ex.: 'ActivityManager:I *:S')
+    
+    Args:
+        text (str): Especificações separadas por espaço ('' = sem filtro)
+        
+    Returns:
+        list: Especificações no formato tag:prioridade
+        
+    Raises:
+        ValueError: Se alguma especificação for inválida
+    """
+    specs = []
+    for spec in text.split():
+        tag, _, priority = spec.rpartition(':')
+        normalized = f"{tag}:{priority.upper()}"
+        if not LOGCAT_SPEC.match(normalized):
+            raise ValueError(f"filterspec inválida: {spec} (use tag:V/D/I/W/E/F/S)")
+        specs.append(normalized)
+    return specs
+
+
+class LogcatEngine(CaptureEngine):
+    """
+    Captura do 'adb logcat' pelo mesmo pipeline da porta serial.
+    
+    O processo adb logcat ocupa o lugar da porta: os bytes da sua saída
+    passam por feed() (LineFramer, LogSanitizer e filtro de categoria) e
+    chegam aos mesmos consumidores (janela, gravação em disco, gatilho).
+    As filterspecs são aplicadas pelo logd no aparelho, então as linhas
+    descartadas por elas nem atravessam o USB. Com um AdbClient e o
+    servidor adb no ar, o logcat é aberto como serviço shell: direto no
+    servidor, sem processo intermediário.
+    """
+    
+    def __init__(self, serial=None, filter_specs=(), log_filter='Bruto', adb=ADB_BINARY,
+                 client=None):
+        """
+        Args:
+            serial (str): Aparelho (-s); None = aparelho padrão do adb
+            filter_specs (list): Filterspecs do logcat (ver parse_logcat_specs)
+            log_filter (str): Filtro de categoria aplicado às linhas
+            adb (str): Executável do adb
+            client (AdbClient): Cliente do servidor adb (None = sempre o binário)
+        """
+        super().__init__(port=f"logcat:{serial}" if serial else "logcat",
+                         log_filter=log_filter)
+        self.serial = serial
+        self.filter_specs = list(filter_specs)
+        self.adb = adb
+        self.client = client
+        self.process = None
+        self.sock = None
+        self._read = None
+    
+    @property
+    def argv(self):
+        """Linha de comando do adb logcat"""
+        serial = ['-s', self.serial] if self.serial else []
+        return [self.adb] + serial + ['logcat', '-v', LOGCAT_FORMAT] + self.filter_specs
+    
+    def open(self):
+        """Abre o logcat pelo servidor adb ou, se indisponível, pelo binário"""
+        if self.client is not None and self.client.available():
+            # Argumentos entre aspas, como o binário adb faz: o shell do
+            # aparelho não expande '*:S' nem quebra specs com espaço ou ';'
+            argv = ['logcat', '-v', LOGCAT_FORMAT] + self.filter_specs
+            service = 'shell:exec ' + ' '.join(shlex.quote(arg) for arg in argv)
+            self.sock = self.client.open_service(service, self.serial)
+            self._read = self.sock.recv
+            return self.sock
+        
+        self.process = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0),
+            start_new_session=(os.name == 'posix')
+        )
+        self._read = self.process.stdout.read1
+        return self.process
+    
+    def start(self):
+        """Inicia a thread de leitura, abrindo o logcat se necessário"""
+        if self.running:
+            return
+        if self._read is None:
+            self.open()
+        self.running = True
+        self.metrics.reset()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Encerra o adb logcat e a thread de leitura"""
+        self.running = False
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                if os.name == 'posix':
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except OSError:
+                pass
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        self._thread = None
+        if sock is not None:
+            sock.close()
+        if process is not None:
+            process.stdout.close()
+            try:
+                process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                pass
+        self.process = None
+        self.sock = None
+        self._read = None
+    
+    def write(self, data):
+        """O logcat é somente leitura"""
+    
+    def fileno(self):
+        if self.sock is not None:
+            return self.sock.fileno()
+        return self.process.stdout.fileno()
+    
+    def _read_loop(self):
+        """Lê a saída do logcat conforme chega (read1/recv devolvem o que houver)"""
+        read = self._read
+        try:
+            while self.running:
+                chunk = read(READ_SIZE)
+                arrival = wall_clock()
+                if not chunk:
+                    raise ConnectionError("adb logcat encerrado (aparelho desconectado?)")
+                self.metrics.record(len(chunk))
+                if self.on_rx:
+                    self.on_rx(len(chunk))
+                self.feed(chunk, arrival)
+        except Exception as e:
+            if not self.running:
+                # Processo encerrado pelo stop()
+                return
+            logging.error(f"Erro na leitura do logcat: {str(e)}")
+            self.error = e
+            self.running = False
+            if self.on_error:
+                self.on_error(e)
+
+
+def main(argv=None):
+    """Captura serial pela linha de comando, sem interface gráfica"""
+    parser = argparse.ArgumentParser(
+        description="Captura UART do RESTORECELL Terminal sem interface gráfica"
+    )
+    parser.add_argument('--headless', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', required=True, help="Porta serial (ex.: COM3, /dev/ttyUSB0)")
+    parser.add_argument('--baud', type=int, default=115200, help="Baud rate (padrão: 115200)")
+    parser.add_argument('-o', '--output', help="Arquivo de saída (padrão: stdout)")
+    parser.add_argument('--filter', default='Bruto', choices=LOG_FILTERS, help="Filtro de categoria")
+    parser.add_argument('--no-timestamps', action='store_true', help="Não adicionar timestamps")
+    parser.add_argument('--stats', action='store_true', help="Mostrar métricas de leitura ao sair")
+    parser.add_argument('--output-dir', help="Gravar segmentos rotativos neste diretório")
+    parser.add_argument('--rotate-mb', type=int, default=64, help="Tamanho máximo de cada segmento (MB)")
+    parser.add_argument('--rotate-minutes', type=int, default=60, help="Duração máxima de cada segmento (min)")
+    parser.add_argument('--compress', choices=sorted(COMPRESSORS), help="Comprimir segmentos fechados")
+    parser.add_argument('--telemetry', help="Gravar a telemetria extraída neste arquivo ao sair")
+    parser.add_argument('--trigger', action='append',
+                        help="Padrão de gatilho (repetível); grava snapshots em torno de cada disparo")
+    parser.add_argument('--trigger-dir', default='.', help="Diretório dos snapshots do gatilho")
+    parser.add_argument('--pre-seconds', type=float, default=30, help="Janela antes do disparo (s)")
+    parser.add_argument('--post-seconds', type=float, default=10, help="Janela depois do disparo (s)")
+    args = parser.parse_args(argv)
+    
+    engine = CaptureEngine(
+        port=args.port,
+        baudrate=args.baud,
+        log_filter=args.filter
+    )
+    
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    formatter = TimestampFormatter()
+    
+    def write_lines(lines, timestamp):
+        if not args.no_timestamps:
+            lines = formatter.format_lines(lines, timestamp)
+        output.write('\n'.join(lines) + '\n')
+        output.flush()
+    
+    # Com --output-dir, a saída padrão só é usada se pedida com -o
+    if args.output or not args.output_dir:
+        engine.add_consumer(write_lines)
+    
+    writer = None
+    if args.output_dir:
+        writer = RotatingLogWriter(
+            directory=args.output_dir,
+            max_bytes=args.rotate_mb * 1024 * 1024,
+            max_seconds=args.rotate_minutes * 60,
+            compression=args.compress,
+            timestamps=not args.no_timestamps
+        )
+        writer.start()
+        engine.add_consumer(writer.write_lines)
+    
+    telemetry = None
+    if args.telemetry:
+        telemetry = TelemetryStore()
+        engine.add_consumer(telemetry.extend)
+    
+    trigger = None
+    if args.trigger:
+        trigger = TriggerCapture(
+            args.trigger,
+            directory=args.trigger_dir,
+            pre_seconds=args.pre_seconds,
+            post_seconds=args.post_seconds,
+            timestamps=not args.no_timestamps
+        )
+        engine.add_consumer(trigger.write_lines)
+    
+    try:
+        engine.start()
+    except Exception as e:
+        print(f"Erro ao conectar: {str(e)}", file=sys.stderr)
+        if writer:
+            writer.close()
+        return 1
+    
+    try:
+        while engine.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        if writer:
+            writer.close()
+        if output is not sys.stdout:
+            output.close()
+        if telemetry is not None:
+            telemetry.save(args.telemetry)
+        if trigger is not None:
+            trigger.close()
+        if args.stats:
+            stats = engine.metrics.snapshot()
+            print(
+                f"{stats['bytes']} bytes em {stats['data_reads']} leituras "
+                f"({stats['bytes_per_wakeup']:.1f} bytes/leitura, "
+                f"{stats['wakeups_per_second']:.1f} acordadas/s, "
+                f"{engine.lines_captured} linhas)",
+                file=sys.stderr
+            )
+    
+    return 1 if engine.error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
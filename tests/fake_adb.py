@@ -0,0 +1,118 @@
+"""
+Servidor adb e binário adb simulados para os testes e o benchmark.
+"""
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """
+    Servidor adb simulado em localhost: host:version, host:devices, host:transport e shell:
+
+    Cada serviço recebido é registrado em services, na ordem de chegada.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    serials = ('emulator-5554', 'R58M123')
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeAdbHandler)
+        self.port = self.server_address[1]
+        self.services = []
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        """Para de atender e libera a porta (conexões seguintes são recusadas)"""
+        self.shutdown()
+        self.server_close()
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+
+    def read_request(self):
+        size = int(self.recv_exact(4), 16)
+        service = self.recv_exact(size).decode()
+        self.server.services.append(service)
+        return service
+
+    def recv_exact(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def reply(self, payload=None, status=b'OKAY'):
+        self.request.sendall(status)
+        if payload is not None:
+            data = payload.encode()
+            self.request.sendall(b'%04x' % len(data) + data)
+
+    def handle(self):
+        try:
+            service = self.read_request()
+            if service == 'host:version':
+                self.reply('0029')
+            elif service == 'host:devices':
+                self.reply(''.join(f"{serial}\tdevice\n" for serial in self.server.serials))
+            elif service.startswith('host:transport'):
+                serial = service.partition('host:transport:')[2]
+                if serial and serial not in self.server.serials:
+                    self.reply(f"device '{serial}' not found", status=b'FAIL')
+                    return
+                self.reply()
+                service = self.read_request()
+                if not service.startswith(('shell:', 'reboot:')):
+                    self.reply(f"unknown service {service}", status=b'FAIL')
+                    return
+                self.reply()
+                if service.startswith('shell:exec logcat'):
+                    # logcat simulado: algumas linhas e o fluxo fica aberto
+                    for i in range(5):
+                        self.request.sendall(f"10-18 12:00:00.000  1  2 W Tag: event {i}\n".encode())
+                    self.request.recv(1)
+                elif service.startswith('shell:'):
+                    # Saída repassada conforme é produzida, como o adbd
+                    process = subprocess.Popen(['sh', '-c', service[6:]], stdout=subprocess.PIPE,
+                                               stderr=subprocess.STDOUT)
+                    try:
+                        for chunk in iter(lambda: process.stdout.read1(65536), b''):
+                            self.request.sendall(chunk)
+                    finally:
+                        process.kill()
+                        process.wait()
+            else:
+                self.reply(f"unknown host service {service}", status=b'FAIL')
+        except ConnectionError:
+            pass
+
+
+def write_fake_adb(directory):
+    """
+    Grava um binário adb simulado que repassa 'shell <comando>' ao shell local
+
+    'shell' sem comando abre um sh interativo, como as sessões do AdbShellPool.
+
+    Returns:
+        str: Caminho do executável
+    """
+    path = os.path.join(directory, "adb")
+    with open(path, "w") as f:
+        f.write(
+            f"#!{sys.executable}\n"
+            "import os, subprocess, sys\n"
+            "args = sys.argv[1:]\n"
+            "if args[:1] == ['-s']:\n"
+            "    args = args[2:]\n"
+            "if args == ['shell']:\n"
+            "    os.execvp('sh', ['sh'])\n"
+            "sys.exit(subprocess.call(['sh', '-c', ' '.join(args[1:])]))\n"
+        )
+    os.chmod(path, 0o755)
+    return path
@@ -0,0 +1,195 @@
+"""
+Cliente do protocolo do servidor adb (AdbClient, NativeAdbCommand) contra um servidor simulado.
+"""
+import logging
+import os
+import socket
+import time
+
+import pytest
+
+import capture_engine
+from capture_engine import AdbClient, AdbRunner, LogcatEngine, NativeAdbCommand
+from tests.fake_adb import FakeAdbServer, write_fake_adb
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="servidor simulado usa sh")
+
+
+@pytest.fixture
+def server():
+    server = FakeAdbServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    return AdbClient(port=server.port)
+
+
+@pytest.fixture
+def runner(client, tmp_path):
+    runner = AdbRunner(adb=write_fake_adb(str(tmp_path)), client=client)
+    yield runner
+    runner.close()
+
+
+def run(runner, args, **kwargs):
+    lines = []
+    command = runner.run(args, on_lines=lambda new, ts: lines.extend(new), **kwargs)
+    assert command.wait(10), command.status
+    return command, lines
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# available() e cache
+
+def test_available_with_server(client):
+    assert client.available()
+    assert client.version() == 0x29
+
+
+def test_available_without_server():
+    assert not AdbClient(port=closed_port()).available()
+
+
+def test_available_is_cached(server, client):
+    assert client.available()
+    server.close()
+    assert client.available()
+
+
+def test_available_rechecks_after_interval(server, client, monkeypatch):
+    assert client.available()
+    server.close()
+    monkeypatch.setattr(capture_engine, 'ADB_SERVER_RECHECK', 0.0)
+    assert not client.available()
+
+
+def test_refused_connection_marks_unavailable(server, client):
+    assert client.available()
+    server.close()
+    with pytest.raises(ConnectionRefusedError):
+        client.connect()
+    assert not client.available()
+
+
+# Handshake OKAY/FAIL
+
+def test_devices(server, client):
+    assert client.devices() == [(serial, 'device') for serial in server.serials]
+    assert server.services == ['host:devices']
+
+
+def test_fail_reply_raises_with_message(client):
+    with client.connect() as sock:
+        with pytest.raises(ConnectionError, match="unknown host service host:nada"):
+            client.request(sock, 'host:nada')
+
+
+def test_transport_unknown_serial(server, client):
+    with pytest.raises(ConnectionError, match="device 'nao-existe' not found"):
+        client.open_service('shell:true', 'nao-existe')
+    assert server.services == ['host:transport:nao-existe']
+
+
+def test_transport_any_and_service(server, client):
+    with client.open_service('shell:echo oi') as sock:
+        assert sock.recv(100) == b'oi\n'
+    assert server.services == ['host:transport-any', 'shell:echo oi']
+
+
+def test_transport_unknown_service(server, client):
+    with pytest.raises(ConnectionError, match="unknown service sync:"):
+        client.open_service('sync:', server.serials[0])
+
+
+# NativeAdbCommand: enquadramento da saída e códigos de saída
+
+def test_shell_commands_use_native_client_without_pool(runner):
+    command, _ = run(runner, ['shell', 'true'])
+    assert isinstance(command, NativeAdbCommand)
+
+
+def test_output_without_trailing_newline(runner):
+    command, lines = run(runner, ['shell', 'printf', 'foo'])
+    assert (lines, command.returncode) == (['foo'], 0)
+
+
+def test_empty_output(runner):
+    command, lines = run(runner, ['shell', 'true'])
+    assert (lines, command.returncode) == ([], 0)
+
+
+def test_exit_code(runner):
+    command, lines = run(runner, ['shell', 'echo', 'a;', 'exit', '3'])
+    assert (lines, command.returncode) == (['a'], 3)
+
+
+def test_stdin_is_closed(runner):
+    command, _ = run(runner, ['shell', 'cat'], timeout=5)
+    assert command.returncode == 0 and command.elapsed < 1
+
+
+def test_devices_command(server, runner):
+    command, lines = run(runner, ['devices'])
+    assert isinstance(command, NativeAdbCommand)
+    assert lines == ['List of devices attached'] + [f"{serial} device" for serial in server.serials]
+
+
+def test_unknown_serial_is_an_error(runner):
+    logging.disable(logging.ERROR)
+    try:
+        command, _ = run(runner, ['shell', 'echo', 'x'], serial='nao-existe')
+    finally:
+        logging.disable(logging.NOTSET)
+    assert isinstance(command.error, ConnectionError) and 'not found' in str(command.error)
+    assert command.returncode is None
+
+
+def test_cancel(runner):
+    command = runner.run(['shell', 'sleep', '5'])
+    command.cancel()
+    assert command.wait(2) and command.cancelled and command.error is None
+
+
+def test_timeout(runner):
+    command, _ = run(runner, ['shell', 'sleep', '5'], timeout=0.3)
+    assert command.timed_out and command.elapsed < 1
+
+
+# Logcat pelo serviço shell:
+
+def test_logcat_service_quotes_filter_specs(server, client):
+    engine = LogcatEngine(serial=server.serials[0], filter_specs=['*:W', 'ActivityManager:I'],
+                          client=client)
+    received = []
+    engine.add_consumer(lambda lines, ts: received.extend(lines))
+    engine.start()
+    deadline = time.monotonic() + 5
+    while len(received) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    engine.stop()
+    assert engine.process is None and len(received) == 5
+    assert server.services[-2:] == [
+        f"host:transport:{server.serials[0]}",
+        "shell:exec logcat -v threadtime '*:W' ActivityManager:I",
+    ]
+
+
+# Volta para o binário
+
+def test_fallback_to_binary_on_refused_connection(server, client, runner):
+    assert client.available()
+    server.close()
+    command, lines = run(runner, ['shell', 'echo', 'binario'])
+    assert isinstance(command, NativeAdbCommand)
+    assert (lines, command.returncode) == (['binario'], 0)
+    # Com o cliente marcado como indisponível, os seguintes vão direto ao binário
+    command, _ = run(runner, ['shell', 'true'])
+    assert type(command) is capture_engine.AdbCommand and command.returncode == 0
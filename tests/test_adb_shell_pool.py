@@ -0,0 +1,42 @@
+"""
+Comandos 'adb shell' nas sessões do AdbShellPool, com um binário adb simulado.
+"""
+import os
+import subprocess
+
+import pytest
+
+from capture_engine import AdbRunner, AdbShellPool, PooledShellCommand
+from tests.fake_adb import write_fake_adb
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="adb simulado usa sh")
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = AdbRunner(pool=AdbShellPool(adb=write_fake_adb(str(tmp_path)), size=1))
+    yield runner
+    runner.close()
+
+
+def test_runs_in_session(runner):
+    lines = []
+    command = runner.run(['shell', 'echo', 'a;', 'exit', '3'], on_lines=lambda new, ts: lines.extend(new))
+    assert isinstance(command, PooledShellCommand)
+    assert command.wait(10) and (lines, command.returncode) == (['a'], 3)
+
+
+def test_timeout_while_waiting_for_session(runner):
+    busy = runner.run(['shell', 'sleep', '5'], timeout=10)
+    command = runner.run(['shell', 'echo', 'x'], timeout=0.5)
+    assert command.wait(5)
+    assert command.timed_out and isinstance(command.error, subprocess.TimeoutExpired)
+    assert command.elapsed < 1
+    busy.cancel()
+
+
+def test_wait_for_session_counts_in_timeout(runner):
+    runner.run(['shell', 'sleep', '0.4'], timeout=10)
+    command = runner.run(['shell', 'sleep', '5'], timeout=0.8)
+    assert command.wait(5)
+    assert command.timed_out and command.elapsed < 1.1
@@ -0,0 +1,98 @@
+"""
+CaptureHub: leitura multiplexada de várias portas por um selector.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from capture_engine import CaptureHub
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="selector sobre descritores POSIX")
+
+
+class PipePort:
+    """Sessão simulada: um pipe no lugar da porta serial"""
+
+    def __init__(self, port, delay=0.0):
+        self.port = port
+        self.delay = delay
+        self.serial_port = object()
+        self.running = False
+        self.on_error = None
+        self.received = b''
+        self.reading = threading.Event()
+        self.stopped_while_reading = False
+        self._read, self.write = os.pipe()
+
+    def fileno(self):
+        return self._read
+
+    def read_ready(self):
+        self.reading.set()
+        time.sleep(self.delay)
+        self.received += os.read(self._read, 100)
+        self.reading.clear()
+
+    def stop(self):
+        self.stopped_while_reading = self.reading.is_set()
+        self.running = False
+        os.close(self._read)
+        os.close(self.write)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_reads_each_port():
+    hub = CaptureHub()
+    ports = [hub.add_session(PipePort(f"p{i}")) for i in range(3)]
+    for port in ports:
+        os.write(port.write, port.port.encode())
+    assert wait_for(lambda: all(port.received == port.port.encode() for port in ports))
+    hub.stop()
+
+
+def test_slow_port_does_not_block_add_session():
+    hub = CaptureHub()
+    slow = hub.add_session(PipePort('lenta', delay=1.0))
+    os.write(slow.write, b'x')
+    assert slow.reading.wait(2)
+    start = time.monotonic()
+    hub.add_session(PipePort('rapida'))
+    assert time.monotonic() - start < 0.5
+    hub.stop()
+
+
+def test_remove_session_waits_for_read_in_progress():
+    hub = CaptureHub()
+    slow = hub.add_session(PipePort('lenta', delay=0.3))
+    os.write(slow.write, b'x')
+    assert slow.reading.wait(2)
+    hub.remove_session('lenta')
+    assert not slow.stopped_while_reading and slow.received == b'x'
+    hub.stop()
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="conta descritores por /proc")
+def test_stop_closes_selector_and_can_restart():
+    before = open_fds()
+    hub = CaptureHub()
+    hub.add_session(PipePort('a'))
+    hub.stop()
+    hub.stop()
+    assert open_fds() == before
+    port = hub.add_session(PipePort('b'))
+    os.write(port.write, b'y')
+    assert wait_for(lambda: port.received == b'y')
+    hub.stop()
+    assert open_fds() == before
@@ -0,0 +1,34 @@
+"""
+Proteções de compile_pattern contra retrocesso caro.
+"""
+import re
+
+import pytest
+
+from capture_engine import CategoryMatcher, compile_pattern
+
+
+@pytest.mark.parametrize('pattern', [r"/(a+)+/", r"/.*a.*a.*b/", r"/(.*a){3}/"])
+def test_rejected_everywhere(pattern):
+    with pytest.raises(re.error):
+        compile_pattern(pattern)
+
+
+@pytest.mark.parametrize('pattern', [r"/a.*b.*c/", r"/(a|aa)*c/", r"/(a|aa){0,30}c/", r"/\w+@\w+/"])
+def test_rejected_on_capture_thread(pattern):
+    with pytest.raises(re.error):
+        compile_pattern(pattern, capture=True)
+    with pytest.raises(re.error):
+        CategoryMatcher({'filtro': [pattern]})
+
+
+@pytest.mark.parametrize('pattern', [r"/pmic.*(err|fail)/", r"/i2c\d+ timeout/", r"/\d{1,5}.*x/",
+                                     r"/(ab)*c/", r"/^.*a.*b/", r"/(err|fail|panic)$/"])
+def test_accepted_on_capture_thread(pattern):
+    compile_pattern(pattern, capture=True)
+
+
+def test_capture_matcher_limits_line_length():
+    matcher = CategoryMatcher({'filtro': [r"/fim$/"]})
+    assert matcher.match("x" * 10 + "fim") == 1
+    assert matcher.match("x" * 1000 + "fim") == 0
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog
 import serial.tools.list_ports
 from serial import Serial
 import threading
@@ -19,7 +19,598 @@ import shutil
 import tempfile
 import sys
 from pathlib import Path
+from collections import deque
 import logging
+import multiprocessing
+
+from capture_engine import (
+    ARCHIVE_PATTERN,
+    BAUD_RATES,
+    CATEGORY_PATTERNS,
+    LOG_FILTERS,
+    AdbClient,
+    AdbRunner,
+    AdbShellPool,
+    ArchiveSearch,
+    CategoryIndex,
+    CategoryMatcher,
+    CaptureEngine,
+    CaptureHub,
+    COMPRESSORS,
+    FormattedLines,
+    LineStore,
+    LogcatEngine,
+    LogSanitizer,
+    RotatingLogWriter,
+    SearchJob,
+    TelemetryStore,
+    TimestampFormatter,
+    TRIGGER_PATTERNS,
+    TriggerCapture,
+    TrigramIndex,
+    compile_pattern,
+    find_archives,
+    is_regex,
+    parse_adb_devices,
+    parse_logcat_specs,
+    pattern_predicate,
+    pattern_spans,
+    should_display,
+    wall_clock,
+)
+import capture_engine
+
+
+def highlight_ranges(lines, term, first_row=1):
+    """
+    Índices do Tk das ocorrências de um termo, prontos para um único tag_add
+    
+    Args:
+        lines (list): Linhas exibidas, na ordem do widget
+        term (str): Termo procurado (sem diferenciar maiúsculas) ou /padrão/
+        first_row (int): Linha do widget correspondente a lines[0]
+        
+    Returns:
+        list: Pares início/fim intercalados ("linha.coluna")
+    """
+    ranges = []
+    for row, line in enumerate(lines, start=first_row):
+        for start, end in pattern_spans(line, term):
+            ranges.extend((f"{row}.{start}", f"{row}.{end}"))
+    return ranges
+
+
+class VirtualLogView(ttk.Frame):
+    """
+    Área de log virtualizada.
+    
+    Mantém no widget de texto apenas as linhas visíveis de uma fonte
+    (LineStore, FormattedLines ou lista de linhas) e traduz a posição da
+    barra de rolagem em deslocamento de linha, de modo que o custo de
+    desenhar não depende do tamanho da sessão.
+    """
+    
+    def __init__(self, parent, **text_options):
+        super().__init__(parent)
+        
+        self.text = tk.Text(self, wrap=tk.NONE, **text_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.text.tag_configure("highlight", background="yellow", foreground="black")
+        
+        self.source = []
+        self.offset = 0          # Índice da primeira linha visível
+        self.follow_tail = True  # Acompanhar novas linhas
+        self.highlight_term = None
+        
+        # Rolagem por mouse e teclado
+        self.text.bind('<MouseWheel>', self.on_mousewheel)
+        self.text.bind('<Button-4>', lambda e: self.scroll_lines(-3))
+        self.text.bind('<Button-5>', lambda e: self.scroll_lines(3))
+        self.text.bind('<Prior>', lambda e: self.scroll_lines(-self.visible_count()))
+        self.text.bind('<Next>', lambda e: self.scroll_lines(self.visible_count()))
+        self.text.bind('<Control-Home>', lambda e: self.scroll_to(0))
+        self.text.bind('<Control-End>', lambda e: self.scroll_to(len(self.source)))
+        self.text.bind('<Configure>', lambda e: self.render())
+    
+    def set_source(self, source, highlight_term=None):
+        """
+        Define as linhas exibidas
+        
+        Args:
+            source: LineStore, FormattedLines ou lista de linhas
+            highlight_term (str): Termo destacado nas linhas visíveis
+        """
+        self.source = source
+        self.highlight_term = highlight_term
+        self.follow_tail = True
+        self.refresh()
+    
+    def refresh(self):
+        """Redesenha após mudanças na fonte, acompanhando o final se necessário"""
+        if self.follow_tail:
+            self.offset = max(0, len(self.source) - self.visible_count())
+        self.render()
+    
+    def visible_count(self):
+        """Quantidade de linhas que cabem na área visível"""
+        linespace = int(self.text.tk.call('font', 'metrics', self.text.cget('font'), '-linespace'))
+        return max(1, self.text.winfo_height() // max(1, linespace))
+    
+    def scroll_to(self, offset):
+        """Posiciona a primeira linha visível"""
+        total = len(self.source)
+        visible = self.visible_count()
+        self.offset = max(0, min(offset, total - visible))
+        self.follow_tail = self.offset + visible >= total
+        self.render()
+        return 'break'
+    
+    def scroll_lines(self, count):
+        """Rola count linhas (negativo para cima)"""
+        return self.scroll_to(self.offset + count)
+    
+    def on_scrollbar(self, action, value, unit=None):
+        """Converte comandos da barra de rolagem em deslocamento de linha"""
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * len(self.source)))
+        elif action == tk.SCROLL:
+            step = self.visible_count() if unit == tk.PAGES else 1
+            self.scroll_lines(int(value) * step)
+    
+    def on_mousewheel(self, event):
+        """Rolagem pela roda do mouse (Windows/macOS)"""
+        return self.scroll_lines(-3 if event.delta > 0 else 3)
+    
+    def render(self):
+        """Desenha somente a janela visível de linhas"""
+        total = len(self.source)
+        visible = self.visible_count()
+        lines = self.source[self.offset:self.offset + visible]
+        
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(lines))
+        
+        if self.highlight_term:
+            self.highlight_visible(lines)
+        
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def highlight_visible(self, lines):
+        """Destaca o termo de busca apenas nas linhas desenhadas"""
+        ranges = highlight_ranges(lines, self.highlight_term)
+        if ranges:
+            self.text.tag_add("highlight", *ranges)
+
+
+class PortSessionPanel(ttk.LabelFrame):
+    """
+    Painel de uma sessão de captura na aba Multi-porta.
+    
+    Cada painel tem sua própria fila de entrega, área de log (limitada ao
+    buffer configurado), filtro de categoria e LEDs RX/TX. A leitura da
+    porta é feita pelo CaptureHub compartilhado.
+    """
+    
+    def __init__(self, parent, app, engine):
+        super().__init__(parent, text=f"{engine.port} @ {engine.baudrate}")
+        self.app = app
+        self.engine = engine
+        self.queue = deque()  # Lotes (timestamp, linhas)
+        self.formatter = TimestampFormatter()
+        self.rx_pending = False
+        self.rx_active = False
+        self.tx_active = False
+        
+        engine.add_consumer(self.on_lines)
+        engine.on_rx = self.on_rx
+        
+        # Cabeçalho: LEDs, filtro, envio e remoção
+        header = ttk.Frame(self)
+        header.pack(fill=tk.X, padx=5, pady=2)
+        
+        self.rx_led = tk.Canvas(header, width=15, height=15)
+        self.rx_led.pack(side=tk.LEFT)
+        ttk.Label(header, text="RX").pack(side=tk.LEFT, padx=2)
+        self.tx_led = tk.Canvas(header, width=15, height=15)
+        self.tx_led.pack(side=tk.LEFT)
+        ttk.Label(header, text="TX").pack(side=tk.LEFT, padx=2)
+        app.draw_led(self.rx_led, 'off', 'rx')
+        app.draw_led(self.tx_led, 'off', 'tx')
+        
+        ttk.Label(header, text="Filtro:").pack(side=tk.LEFT, padx=5)
+        self.filter_var = tk.StringVar(value=engine.log_filter)
+        filter_combo = ttk.Combobox(header, values=LOG_FILTERS, textvariable=self.filter_var, width=10)
+        filter_combo.pack(side=tk.LEFT, padx=5)
+        filter_combo.bind('<<ComboboxSelected>>', self.on_filter_change)
+        
+        self.send_entry = ttk.Entry(header, width=20)
+        self.send_entry.pack(side=tk.LEFT, padx=5)
+        self.send_entry.bind('<Return>', lambda e: self.send())
+        ttk.Button(header, text="Enviar", command=self.send).pack(side=tk.LEFT)
+        
+        self.status_label = ttk.Label(header, text="conectado")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            header,
+            text="Remover",
+            command=lambda: app.remove_port_session(engine.port)
+        ).pack(side=tk.RIGHT)
+        
+        # Área de log da sessão
+        self.log_area = scrolledtext.ScrolledText(
+            self,
+            wrap=tk.WORD,
+            height=8,
+            font=('Consolas', app.font_size.get()),
+            background=app.current_theme['background'],
+            foreground=app.current_theme['text']
+        )
+        self.log_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
+    
+    def on_rx(self, size):
+        """Chamado pela thread de captura a cada leitura"""
+        self.rx_pending = True
+    
+    def on_lines(self, lines, timestamp):
+        """Consumidor do engine: enfileira o lote para o próximo quadro"""
+        self.queue.append((timestamp, lines))
+    
+    def on_filter_change(self, event=None):
+        """Aplica o filtro de categoria na captura desta porta"""
+        self.engine.log_filter = self.filter_var.get()
+    
+    def send(self):
+        """Envia o texto digitado para a porta desta sessão"""
+        data = self.send_entry.get()
+        if not data:
+            return
+        try:
+            self.engine.write(data + '\n')
+            self.send_entry.delete(0, tk.END)
+            self.blink('tx')
+        except Exception as e:
+            logging.error(f"Erro ao enviar dados ({self.engine.port}): {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao enviar dados: {str(e)}")
+    
+    def blink(self, led_type):
+        """Pisca o LED RX ou TX desta sessão"""
+        attr = f'{led_type}_active'
+        if getattr(self, attr):
+            return
+        setattr(self, attr, True)
+        canvas = self.rx_led if led_type == 'rx' else self.tx_led
+        self.app.draw_led(canvas, 'on', led_type)
+        
+        def reset():
+            setattr(self, attr, False)
+            self.app.draw_led(canvas, 'off', led_type)
+        self.after(self.app.led_blink_duration, reset)
+    
+    def drain(self, budget):
+        """Insere até budget linhas pendentes na área de log da sessão"""
+        if self.rx_pending:
+            self.rx_pending = False
+            self.blink('rx')
+        
+        groups = self.app.take_line_groups(self.queue, budget)
+        if not groups:
+            return
+        
+        max_lines = self.app.max_buffer_lines.get()
+        show_timestamps = self.app.show_timestamps.get()
+        batch = []
+        for timestamp, lines in groups:
+            batch.extend(self.formatter.format_lines(lines, timestamp) if show_timestamps else lines)
+        if 0 < max_lines < len(batch):
+            batch = batch[-max_lines:]
+        
+        self.log_area.insert(tk.END, '\n'.join(batch) + '\n')
+        if max_lines > 0:
+            total_lines = int(self.log_area.index('end-1c').split('.')[0])
+            if total_lines > max_lines:
+                self.log_area.delete('1.0', f'{total_lines - max_lines + 1}.0')
+        self.log_area.see(tk.END)
+    
+    def mark_error(self, error):
+        """Indica que a porta desta sessão falhou"""
+        self.status_label.configure(text=f"erro: {error}")
+
+
+class AdbDevicePane(ttk.Frame):
+    """
+    Aba com a saída dos comandos ADB de um aparelho.
+    
+    As linhas chegam da thread de cada comando em uma fila própria e são
+    inseridas no mesmo quadro da área de log principal, respeitando o
+    limite do buffer.
+    """
+    
+    def __init__(self, parent, app, serial):
+        super().__init__(parent)
+        self.app = app
+        self.serial = serial
+        self.queue = deque()  # Lotes (timestamp, linhas)
+        self.formatter = TimestampFormatter()
+        
+        self.log_area = scrolledtext.ScrolledText(
+            self,
+            wrap=tk.WORD,
+            height=10,
+            font=('Consolas', app.font_size.get()),
+            background=app.current_theme['background'],
+            foreground=app.current_theme['text']
+        )
+        self.log_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
+    
+    def on_lines(self, lines, timestamp):
+        """Enfileira um lote para o próximo quadro (qualquer thread)"""
+        self.queue.append((timestamp, lines))
+    
+    def drain(self, budget):
+        """Insere até budget linhas pendentes na aba"""
+        groups = self.app.take_line_groups(self.queue, budget)
+        if not groups:
+            return
+        
+        show_timestamps = self.app.show_timestamps.get()
+        batch = []
+        for timestamp, lines in groups:
+            batch.extend(self.formatter.format_lines(lines, timestamp) if show_timestamps else lines)
+        
+        self.log_area.insert(tk.END, '\n'.join(batch) + '\n')
+        max_lines = self.app.max_buffer_lines.get()
+        if max_lines > 0:
+            total_lines = int(self.log_area.index('end-1c').split('.')[0])
+            if total_lines > max_lines:
+                self.log_area.delete('1.0', f'{total_lines - max_lines + 1}.0')
+        self.log_area.see(tk.END)
+
+
+class ArchiveSearchWindow(tk.Toplevel):
+    """
+    Janela de busca nos arquivos de log salvos (logs_restorecell_*.txt).
+    
+    A busca roda em um ArchiveSearch (pool de processos sobre arquivos
+    mapeados com mmap); as ocorrências chegam aos poucos, com arquivo,
+    número da linha e linhas de contexto.
+    """
+    
+    def __init__(self, app, directory, term=''):
+        super().__init__(app.root)
+        self.app = app
+        self.job = None
+        self.title("Buscar em arquivos salvos")
+        self.geometry("900x500")
+        
+        # Diretório, termo e controles
+        header = ttk.Frame(self)
+        header.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(header, text="Diretório:").pack(side=tk.LEFT, padx=2)
+        self.directory_var = tk.StringVar(value=directory)
+        ttk.Entry(header, textvariable=self.directory_var, width=40).pack(side=tk.LEFT, padx=2)
+        ttk.Button(header, text="...", width=3, command=self.choose_directory).pack(side=tk.LEFT)
+        
+        ttk.Label(header, text="Buscar:").pack(side=tk.LEFT, padx=5)
+        self.term_var = tk.StringVar(value=term)
+        term_entry = ttk.Entry(header, textvariable=self.term_var, width=25)
+        term_entry.pack(side=tk.LEFT, padx=2)
+        term_entry.bind('<Return>', lambda e: self.search())
+        ttk.Button(header, text="Buscar", command=self.search).pack(side=tk.LEFT, padx=2)
+        ttk.Button(header, text="Parar", command=self.stop).pack(side=tk.LEFT, padx=2)
+        
+        self.status_label = ttk.Label(self, text="")
+        self.status_label.pack(fill=tk.X, padx=5)
+        
+        # Resultados
+        self.results_area = scrolledtext.ScrolledText(
+            self,
+            wrap=tk.NONE,
+            font=('Consolas', app.font_size.get()),
+            background=app.current_theme['background'],
+            foreground=app.current_theme['text']
+        )
+        self.results_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.results_area.tag_configure("location", foreground="#0080FF")
+        self.results_area.tag_configure("highlight", background="yellow", foreground="black")
+        
+        self.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def choose_directory(self):
+        """Seleciona o diretório dos arquivos"""
+        directory = filedialog.askdirectory(
+            parent=self,
+            initialdir=self.directory_var.get() or os.getcwd()
+        )
+        if directory:
+            self.directory_var.set(directory)
+    
+    def search(self):
+        """Inicia a busca nos arquivos do diretório"""
+        term = self.term_var.get()
+        if not term:
+            return
+        try:
+            paths = find_archives(self.directory_var.get() or '.')
+            if not paths:
+                messagebox.showinfo(
+                    "Buscar em arquivos",
+                    f"Nenhum arquivo {ARCHIVE_PATTERN} encontrado",
+                    parent=self
+                )
+                return
+            self.stop()
+            self.job = ArchiveSearch(term, paths)
+            self.results_area.delete('1.0', tk.END)
+            self.job.start()
+            self.update_status()
+            self.after(self.app.ui_refresh_ms.get(), self.poll, self.job)
+        except Exception as e:
+            logging.error(f"Erro na busca em arquivos: {str(e)}")
+            messagebox.showerror("Erro", f"Erro na busca: {str(e)}", parent=self)
+    
+    def stop(self):
+        """Interrompe a busca em andamento"""
+        if self.job is not None:
+            self.job.cancel()
+            self.update_status()
+            self.job = None
+    
+    def close(self):
+        """Fecha a janela interrompendo a busca"""
+        self.stop()
+        self.destroy()
+    
+    def poll(self, job):
+        """Insere as ocorrências prontas, em um único insert por lote"""
+        if job is not self.job:
+            return
+        try:
+            finished = job.finished
+            results = job.take()
+            if results:
+                self.insert_results(results, job.term)
+            self.update_status()
+            if finished:
+                if job.error is not None:
+                    messagebox.showerror("Erro", f"Erro na busca: {str(job.error)}", parent=self)
+                self.job = None
+                return
+        except Exception as e:
+            logging.error(f"Erro ao exibir resultados da busca em arquivos: {str(e)}")
+        self.after(max(1, self.app.ui_refresh_ms.get()), self.poll, job)
+    
+    def insert_results(self, results, term):
+        """Formata as ocorrências como 'arquivo:linha' seguido do contexto"""
+        first_row = int(self.results_area.index('end-1c').split('.')[0])
+        text = []
+        locations = []
+        highlights = []
+        for path, number, line, _, before, after in results:
+            locations.extend((f"{first_row + len(text)}.0", f"{first_row + len(text)}.end"))
+            text.append(f"{os.path.basename(path)}:{number}")
+            for offset, context_line in enumerate(before, start=number - len(before)):
+                text.append(f"  {offset:>8}  {context_line}")
+            row = first_row + len(text)
+            prefix = len(f"> {number:>8}  ")
+            text.append(f"> {number:>8}  {line}")
+            for start, end in pattern_spans(line, term):
+                highlights.extend((f"{row}.{prefix + start}", f"{row}.{prefix + end}"))
+            for offset, context_line in enumerate(after, start=number + 1):
+                text.append(f"  {offset:>8}  {context_line}")
+            text.append('')
+        
+        self.results_area.insert(tk.END, '\n'.join(text) + '\n')
+        self.results_area.tag_add("location", *locations)
+        if highlights:
+            self.results_area.tag_add("highlight", *highlights)
+    
+    def update_status(self):
+        """Progresso da busca"""
+        job = self.job
+        if job is None:
+            return
+        text = f"{job.matched} linhas, {job.occurrences} ocorrências"
+        if job.cancelled:
+            text += " (interrompida)"
+        elif job.truncated:
+            text += f" (limite de {job.max_hits} atingido)"
+        elif not job.finished:
+            text += f" ({job.progress}%)"
+        self.status_label.config(text=text)
+
+
+class TelemetryWindow(tk.Toplevel):
+    """
+    Janela com as estatísticas da telemetria extraída da captura.
+    
+    Mostra contagem, mínimo, máximo e média de cada coluna na sessão e em
+    cada boot, e compara arquivos .telemetry de outras sessões sem reler
+    o texto dos logs.
+    """
+    
+    HEADINGS = ('categoria', 'boot', 'count', 'min', 'max', 'mean')
+    
+    def __init__(self, app):
+        super().__init__(app.root)
+        self.app = app
+        self.title("Telemetria")
+        self.geometry("800x450")
+        
+        header = ttk.Frame(self)
+        header.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(header, text="Atualizar", command=self.refresh).pack(side=tk.LEFT, padx=2)
+        ttk.Button(header, text="Comparar sessões...", command=self.compare).pack(side=tk.LEFT, padx=2)
+        self.status_label = ttk.Label(header, text="")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        
+        self.tree = ttk.Treeview(self, columns=self.HEADINGS)
+        self.tree.heading('#0', text="Coluna")
+        for heading in self.HEADINGS:
+            self.tree.heading(heading, text=heading.capitalize())
+            self.tree.column(heading, width=90, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.refresh()
+    
+    @staticmethod
+    def stats_values(category, boot, stats):
+        """Valores de uma linha da tabela"""
+        if stats is None:
+            return (category, boot, 0, '', '', '')
+        return (category, boot, stats['count'], f"{stats['min']:g}",
+                f"{stats['max']:g}", f"{stats['mean']:.6g}")
+    
+    def refresh(self):
+        """Recalcula as estatísticas da sessão atual"""
+        telemetry = self.app.telemetry
+        self.tree.delete(*self.tree.get_children())
+        for column in sorted(telemetry.columns_list(), key=lambda c: c.name):
+            item = self.tree.insert(
+                '', tk.END, text=column.name,
+                values=self.stats_values(column.category, 'sessão', telemetry.stats(column.name))
+            )
+            for number, (start, stats) in enumerate(telemetry.boot_stats(column.name), start=1):
+                boot = 'antes do 1º'
+                if start is not None:
+                    boot = datetime.fromtimestamp(start).strftime('%H:%M:%S')
+                self.tree.insert(item, tk.END, text=f"boot {number}",
+                                 values=self.stats_values(column.category, boot, stats))
+        self.status_label.config(
+            text=f"{len(telemetry.boots)} boots, {telemetry.memory_usage() / 1024:.0f} KB"
+        )
+    
+    def compare(self):
+        """Estatísticas de cada coluna em arquivos .telemetry de outras sessões"""
+        paths = filedialog.askopenfilenames(
+            parent=self,
+            filetypes=[("Telemetria", "*.telemetry"), ("Todos os arquivos", "*.*")]
+        )
+        if not paths:
+            return
+        try:
+            sessions = [(path, TelemetryStore.load(path)) for path in paths]
+            self.tree.delete(*self.tree.get_children())
+            names = sorted({column.name for _, store in sessions for column in store.columns_list()})
+            for name in names:
+                item = self.tree.insert('', tk.END, text=name, open=True)
+                for path, store in sessions:
+                    column = store.columns.get(name)
+                    category = column.category if column is not None else ''
+                    self.tree.insert(item, tk.END, text=os.path.basename(path),
+                                     values=self.stats_values(category, '', store.stats(name)))
+            self.status_label.config(text=f"{len(sessions)} sessões")
+        except Exception as e:
+            logging.error(f"Erro ao comparar telemetria: {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao comparar telemetria: {str(e)}", parent=self)
+
 
 class RestoreCellTerminal:
     def __init__(self, root):
@@ -60,15 +651,97 @@ class RestoreCellTerminal:
         self.auto_baud_detection = tk.BooleanVar(value=False)
         self.font_size = tk.IntVar(value=10)
         self.max_buffer_lines = tk.IntVar(value=1000)
+        self.virtual_view_mode = tk.BooleanVar(value=False)
+        self.virtual_buffer_lines = tk.IntVar(value=1000000)
+        self.search_index_mb = tk.IntVar(value=64)   # Limite do índice de busca
+        
+        # Gravação contínua em disco (opcional)
+        self.stream_to_disk = tk.BooleanVar(value=False)
+        self.stream_directory = tk.StringVar(value="")
+        self.stream_max_mb = tk.IntVar(value=64)
+        self.stream_rotate_minutes = tk.IntVar(value=60)
+        self.stream_compression = tk.StringVar(value="gzip")
+        self.disk_writers = {}  # porta (ou None para a conexão principal) -> RotatingLogWriter
+        
+        # Captura por gatilho: snapshot das linhas em torno de uma falha
+        self.trigger_enabled = tk.BooleanVar(value=False)
+        self.trigger_patterns = tk.StringVar(value=', '.join(TRIGGER_PATTERNS))
+        self.trigger_pre_seconds = tk.IntVar(value=30)
+        self.trigger_post_seconds = tk.IntVar(value=10)
+        self.trigger_directory = tk.StringVar(value="")
+        self.trigger_capture = None
         self.show_timestamps = tk.BooleanVar(value=True)
         self.dark_mode = tk.BooleanVar(value=False)
         self.current_profile = tk.StringVar(value="Default")
         self.connection_status = tk.StringVar(value="disconnected")
         
+        # Entrega de linhas para a interface em lotes
+        self.ui_refresh_ms = tk.IntVar(value=50)        # Intervalo entre quadros
+        self.ui_frame_budget = tk.IntVar(value=2000)    # Máximo de linhas por quadro
+        self.ui_queue = deque()  # Lotes (timestamp, linhas) vindos da captura
+        self.ui_enqueued = 0     # Alterado pelas threads de captura
+        self.ui_dequeued = 0     # Alterado apenas pelo thread do Tk
+        # Vários produtores (serial, logcat, comandos ADB) disputam a fila e
+        # os contadores abaixo
+        self.ui_lock = threading.Lock()
+        self.ui_queue_max = 200000  # Linhas na fila antes de descartar da exibição
+        self.ui_dropped = 0         # Linhas descartadas da exibição (fila cheia)
+        self.ui_drop_pending = 0    # Descartes ainda não avisados na área de log
+        self.timestamp_formatter = TimestampFormatter()
+        self.rx_pending = False
+        self.drain_job = None
+        
         # Controle de threads
         self.stop_threads = False
         self.threads = []
         
+        # Motor de captura (criado ao conectar)
+        self.engine = None
+        
+        # Captura simultânea de várias portas (aba Multi-porta)
+        self.capture_hub = CaptureHub()
+        self.port_sessions = {}
+        self.sanitizer = LogSanitizer()
+        
+        # Linhas recebidas (base para filtros e buscas); os timestamps
+        # ficam numéricos e só são formatados na exibição
+        self.line_store = LineStore(self.max_buffer_lines.get())
+        self.store_view = FormattedLines(self.line_store, self.show_timestamps.get())
+        # Índice de busca: atualizado a cada quadro, fora da ingestão
+        self.search_index = TrigramIndex(self.search_index_mb.get() * 1024 * 1024)
+        self.show_timestamps.trace('w', lambda *args: self.on_timestamps_toggle())
+        
+        # Filtragem incremental (filtros UART + campo Buscar)
+        self.filter_debounce_ms = 150     # Espera após a última tecla
+        self.filter_job = None
+        self.filter_generation = 0        # Incrementado a cada nova execução
+        self.filter_key = None            # (filtros ativos, busca) exibidos, None = tudo
+        self.filter_select = None         # Predicado da chave atual
+        self.filter_results = None        # LineStore com as linhas aprovadas
+        self.filter_seqs = None           # Sequência de origem de cada linha aprovada
+        self.filter_scanned_seq = 0       # Próxima sequência do line_store a verificar
+        self.filter_pending = False       # Varredura em andamento
+        self.filter_view = None           # FormattedLines do resultado (modo virtual)
+        self.search_job = None            # SearchJob em andamento
+        self.search_hits = []             # (sequência, posições) da última busca
+        
+        # Telemetria extraída na captura (consumidor do engine)
+        self.telemetry = TelemetryStore()
+        
+        # Comandos ADB em segundo plano (saída vai para a fila da interface):
+        # direto no servidor adb quando ele está no ar; senão, comandos
+        # 'shell' reaproveitam sessões abertas do pool
+        self.adb_runner = AdbRunner(pool=AdbShellPool(), client=AdbClient())
+        self.adb_devices = []             # (serial, estado) do último 'adb devices'
+        self.adb_panes = {}               # serial -> AdbDevicePane
+        self.logcat_engine = None         # LogcatEngine em andamento
+        self.logcat_filter_specs = tk.StringVar(value="")
+        
+        # Destaques da área de log: aplicados só à região visível
+        self.highlight_terms = {}         # Tag -> termo destacado
+        self.highlight_margin = 50        # Linhas além da região visível
+        self.highlight_job = None
+        
         # Inicializar profiles
         self.profiles = {}
         
@@ -111,6 +784,9 @@ class RestoreCellTerminal:
             'ram': tk.BooleanVar(value=False),
             'outros': tk.BooleanVar(value=False)
         }
+        self.filter_matcher = None  # Recompilado quando o conjunto de filtros muda
+        self.category_index = None  # Categorias de cada linha do line_store
+        self.get_filter_matcher()
         
         # Criar interface de filtros
         self.create_filter_interface()
@@ -119,6 +795,9 @@ class RestoreCellTerminal:
         self.rx_active = False
         self.tx_active = False
         self.led_blink_duration = 100  # milissegundos
+        
+        # Iniciar entrega periódica de linhas para a interface
+        self.drain_job = self.root.after(self.ui_refresh_ms.get(), self.drain_ui_queue)
 
     def setup_styles(self):
         """Configura os temas disponíveis"""
@@ -156,11 +835,12 @@ class RestoreCellTerminal:
         
         # Configurar área de log (agora já criada)
         if hasattr(self, 'log_area'):
-            self.log_area.configure(
-                bg=theme['background'],
-                fg=theme['text'],
-                insertbackground=theme['text']
-            )
+            for widget in (self.log_area, self.virtual_view.text):
+                widget.configure(
+                    bg=theme['background'],
+                    fg=theme['text'],
+                    insertbackground=theme['text']
+                )
         
         # Atualizar estilo dos botões e widgets
         style = ttk.Style()
@@ -191,6 +871,11 @@ class RestoreCellTerminal:
         main_frame = ttk.Frame(self.notebook)
         self.notebook.add(main_frame, text="Terminal")
         
+        # Aba de captura em várias portas
+        self.multiport_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.multiport_frame, text="Multi-porta")
+        self.create_multiport_tab()
+        
         # Aba de diagnóstico ADB
         self.adb_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.adb_frame, text="Diagnóstico ADB")
@@ -217,7 +902,7 @@ class RestoreCellTerminal:
         # Baud Rate com várias opções
         ttk.Label(controls_frame, text="Baud Rate:").pack(side=tk.LEFT, padx=5)
         self.baud_combo = ttk.Combobox(controls_frame, 
-                                     values=['9600', '19200', '38400', '57600', '115200', '230400', '460800', '921600'],
+                                     values=[str(rate) for rate in BAUD_RATES],
                                      width=10)
         self.baud_combo.set('115200')
         self.baud_combo.pack(side=tk.LEFT, padx=5)
@@ -246,19 +931,7 @@ class RestoreCellTerminal:
         ttk.Label(filter_frame, text="Filtro de Log:").pack(side=tk.LEFT, padx=5)
         
         # Lista atualizada de filtros
-        self.filter_options = [
-            'Bruto',
-            'vproc',
-            'cpu',
-            'pmic',
-            'i2c',
-            'clock',
-            'rpmb',
-            'ufs',
-            'emmc',
-            'ram',
-            'Outros'
-        ]
+        self.filter_options = list(LOG_FILTERS)
         
         self.filter_combo = ttk.Combobox(
             filter_frame, 
@@ -277,6 +950,22 @@ class RestoreCellTerminal:
             style='Custom.TButton'
         )
         self.search_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Busca nos arquivos salvos
+        ttk.Button(
+            filter_frame,
+            text="Buscar em arquivos",
+            command=self.open_archive_search,
+            style='Custom.TButton'
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Estatísticas da telemetria extraída
+        ttk.Button(
+            filter_frame,
+            text="Telemetria",
+            command=lambda: TelemetryWindow(self),
+            style='Custom.TButton'
+        ).pack(side=tk.LEFT, padx=5)
 
     def create_rx_tx_indicators(self, parent):
         """Cria os indicadores visuais de RX/TX"""
@@ -304,13 +993,14 @@ class RestoreCellTerminal:
         self.draw_led(self.rx_led, 'off')
         self.draw_led(self.tx_led, 'off')
 
-    def draw_led(self, canvas, state):
+    def draw_led(self, canvas, state, led_type=None):
         """
         Desenha um LED no canvas especificado
         
         Args:
             canvas: Canvas do Tkinter
             state: 'on' ou 'off'
+            led_type: 'rx' ou 'tx' (padrão: identificado pelo canvas)
         """
         # Limpar canvas
         canvas.delete('all')
@@ -322,7 +1012,8 @@ class RestoreCellTerminal:
         }
         
         # Identificar tipo de LED
-        led_type = 'rx' if canvas == self.rx_led else 'tx'
+        if led_type is None:
+            led_type = 'rx' if canvas == self.rx_led else 'tx'
         color = colors[led_type]['on' if state == 'on' else 'off']
         
         # Desenhar LED com borda
@@ -361,38 +1052,73 @@ class RestoreCellTerminal:
         self.tx_active = False
         self.draw_led(self.tx_led, 'off')
 
-    def read_serial(self):
-        """Thread de leitura serial com indicador RX"""
-        buffer = bytearray()
-        while not self.stop_threads and self.is_connected:
-            try:
-                if self.serial_port and self.serial_port.in_waiting:
-                    # Piscar LED RX
-                    self.root.after(0, self.blink_rx)
-                    
-                    # Ler dados
-                    chunk = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(chunk)
-                    
-                    # Processar buffer
-                    while b'\n' in buffer:
-                        line_end = buffer.find(b'\n')
-                        line = buffer[:line_end + 1]
-                        buffer = buffer[line_end + 1:]
-                        
-                        if line:
-                            processed_data = self.sanitize_log_data(line)
-                            if processed_data:
-                                if self.show_timestamps.get():
-                                    timestamp = datetime.now().strftime('[%Y-%m-%d %H:%M:%S.%f]')
-                                    processed_data = f"{timestamp} {processed_data}"
-                                
-                                self.root.after(0, self.append_to_log, processed_data)
-                
-            except Exception as e:
-                logging.error(f"Erro na leitura serial: {str(e)}")
-                self.root.after(0, self.handle_serial_error)
-                break
+    def on_timestamps_toggle(self):
+        """Atualiza a exibição de timestamps na visualização virtual"""
+        self.store_view.show_timestamps = self.show_timestamps.get()
+        view = getattr(self, 'virtual_view', None)
+        if view is not None and isinstance(view.source, FormattedLines):
+            view.source.show_timestamps = self.show_timestamps.get()
+            view.refresh()
+
+    def on_engine_lines(self, lines, timestamp):
+        """
+        Consumidor do engine principal (thread de captura)
+        
+        Se a interface não acompanha a captura (logcat inundando, por
+        exemplo), os lotes que chegam com a fila cheia são descartados da
+        exibição e contados; a gravação em disco, que é outro consumidor,
+        continua recebendo tudo. Um aviso com a quantidade descartada
+        entra na área de log antes do próximo lote aceito.
+        """
+        with self.ui_lock:
+            if self.ui_enqueued - self.ui_dequeued >= self.ui_queue_max:
+                self.ui_dropped += len(lines)
+                self.ui_drop_pending += len(lines)
+                return
+            if self.ui_drop_pending:
+                dropped, self.ui_drop_pending = self.ui_drop_pending, 0
+                lines = [f"*** {dropped} linhas descartadas da exibição (fila cheia) ***"] + lines
+            self.ui_queue.append((timestamp, lines))
+            self.ui_enqueued += len(lines)
+
+    def format_log_lines(self, items):
+        """
+        Monta o texto exibido de pares (timestamp, linha)
+        
+        Args:
+            items (iterable): Pares (timestamp, linha) do LineStore
+            
+        Returns:
+            list: Linhas com ou sem timestamp, conforme a configuração
+        """
+        if not self.show_timestamps.get():
+            return [line for _, line in items]
+        fmt = self.timestamp_formatter.format
+        return [f"{fmt(timestamp)} {line}" for timestamp, line in items]
+
+    def take_line_groups(self, queue, budget):
+        """
+        Retira lotes (timestamp, linhas) da fila até somar budget linhas
+        
+        Um lote maior que o restante do orçamento é dividido e a sobra
+        volta para o início da fila.
+        """
+        groups = []
+        count = 0
+        while queue and count < budget:
+            timestamp, lines = queue.popleft()
+            room = budget - count
+            if len(lines) > room:
+                queue.appendleft((timestamp, lines[room:]))
+                lines = lines[:room]
+            groups.append((timestamp, lines))
+            count += len(lines)
+        return groups
+
+    def on_serial_rx(self, size):
+        """Chamado pelo motor de captura a cada leitura (thread de captura)"""
+        # Piscar LED RX no próximo quadro
+        self.rx_pending = True
 
     def write_serial(self, data):
         """
@@ -424,82 +1150,209 @@ class RestoreCellTerminal:
             str: Dados sanitizados e formatados
         """
         try:
-            # Tentar diferentes encodings
-            for encoding in ['utf-8', 'ascii', 'latin1', 'cp1252']:
-                try:
-                    decoded = raw_data.decode(encoding, errors='ignore')
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                # Se nenhum encoding funcionar, usar ascii com replace
-                decoded = raw_data.decode('ascii', errors='replace')
-            
-            # Remover caracteres de controle indesejados
-            cleaned = ''
-            for char in decoded:
-                # Manter apenas caracteres printáveis e alguns especiais
-                if char.isprintable() or char in '\n\r\t':
-                    if ord(char) < 128 or char in 'áéíóúàèìòùâêîôûãõñäëïöüçÁÉÍÓÚÀÈÌÒÙÂÊÎÔÛÃÕÑÄËÏÖÜÇ':
-                        cleaned += char
-                    else:
-                        cleaned += ' '
+            return self.sanitizer.sanitize(raw_data)
+        except Exception as e:
+            logging.error(f"Erro ao sanitizar dados: {str(e)}")
+            return None
+
+    def get_ui_queue_depth(self):
+        """Retorna quantas linhas aguardam exibição na interface"""
+        with self.ui_lock:
+            return self.ui_enqueued - self.ui_dequeued
+
+    def drain_ui_queue(self):
+        """
+        Entrega as linhas pendentes para a área de log.
+        
+        Executado periodicamente no thread do Tk: insere até ui_frame_budget
+        linhas por quadro em uma única operação e reagenda a si mesmo.
+        """
+        try:
+            if self.rx_pending:
+                self.rx_pending = False
+                self.blink_rx()
             
-            # Remover múltiplos espaços
-            cleaned = ' '.join(cleaned.split())
+            budget = max(1, self.ui_frame_budget.get())
+            with self.ui_lock:
+                groups = self.take_line_groups(self.ui_queue, budget)
+                self.ui_dequeued += sum(len(lines) for _, lines in groups)
             
-            # Remover linhas vazias
-            if not cleaned.strip():
-                return None
-                
-            return cleaned.strip()
+            if groups:
+                self.append_line_groups_to_log(groups)
+                self.update_status_bar()
+            
+            # Sessões da aba Multi-porta e abas dos aparelhos ADB
+            for panel in self.port_sessions.values():
+                panel.drain(budget)
+            for pane in self.adb_panes.values():
+                pane.drain(budget)
+            
+            # Indexar para busca as linhas novas, dentro do mesmo orçamento
+            self.search_index.update(self.line_store, budget)
             
         except Exception as e:
-            logging.error(f"Erro ao sanitizar dados: {str(e)}")
-            return None
+            logging.error(f"Erro ao entregar logs: {str(e)}")
+        finally:
+            self.drain_job = self.root.after(
+                max(1, self.ui_refresh_ms.get()),
+                self.drain_ui_queue
+            )
 
     def append_to_log(self, data):
         """Adiciona dados ao log com verificações robustas"""
         if not data or not isinstance(data, str):
             return
-            
+        self.append_lines_to_log([data])
+
+    def append_lines_to_log(self, lines, timestamp=None):
+        """
+        Adiciona um lote de linhas ao log com uma única inserção
+        
+        Args:
+            lines (list): Linhas já sanitizadas
+            timestamp (float): Instante de chegada (padrão: agora)
+        """
+        if timestamp is None:
+            timestamp = wall_clock()
+        self.append_line_groups_to_log([(timestamp, lines)])
+
+    def append_line_groups_to_log(self, groups):
+        """
+        Adiciona lotes (timestamp, linhas) ao log com uma única inserção
+        
+        Os timestamps são guardados numéricos no LineStore e formatados
+        apenas para as linhas que de fato entram na área de texto.
+        
+        Args:
+            groups (list): Pares (timestamp, linhas já sanitizadas)
+        """
         try:
             # Verificar tamanho máximo
             MAX_LINE_LENGTH = 1000
-            if len(data) > MAX_LINE_LENGTH:
-                data = data[:MAX_LINE_LENGTH] + "... (truncado)"
-            
-            # Garantir que a string seja válida para Tcl/Tk
-            safe_data = ''
-            for char in data:
-                if ord(char) < 128 or char in 'áéíóúàèìòùâêîôûãõñäëïöüçÁÉÍÓÚÀÈÌÒÙÂÊÎÔÛÃÕÑÄËÏÖÜÇ':
-                    safe_data += char
-                else:
-                    safe_data += '?'
             
-            # Inserir no log
-            self.log_area.insert(tk.END, safe_data + '\n')
+            # Manter cópia para busca (limite acompanha a configuração)
+            if self.line_store.max_lines != self.get_store_limit():
+                self.line_store.max_lines = self.get_store_limit()
             
-            # Manter cópia para busca
-            if not hasattr(self, 'original_log'):
-                self.original_log = ''
-            self.original_log += safe_data + '\n'
+            stored = []
+            for timestamp, lines in groups:
+                lines = [
+                    line[:MAX_LINE_LENGTH] + "... (truncado)" if len(line) > MAX_LINE_LENGTH else line
+                    for line in lines
+                    if line
+                ]
+                if lines:
+                    self.line_store.extend(lines, timestamp)
+                    stored.append((timestamp, lines))
+            if not stored:
+                return
             
-            # Gerenciar buffer
-            self.manage_buffer_size()
+            # Filtro ativo: só as linhas novas passam pelo predicado atual
+            if self.filter_key is not None:
+                self.append_filtered_groups(stored)
+                return
             
-            # Auto-scroll
-            if self.auto_scroll:
-                self.log_area.see(tk.END)
+            # Modo virtual: apenas redesenhar a janela visível
+            if self.virtual_view_mode.get():
+                if self.virtual_view.source is self.store_view:
+                    self.virtual_view.refresh()
+                return
             
-            # Atualizar interface
-            self.root.update_idletasks()
+            self.insert_log_groups(stored)
             
         except tk.TclError as e:
             logging.error(f"Erro Tcl ao inserir log: {str(e)}")
         except Exception as e:
             logging.error(f"Erro ao adicionar log: {str(e)}")
 
+    def insert_log_groups(self, groups):
+        """
+        Insere lotes (timestamp, linhas) no final da área de texto comum
+        
+        Args:
+            groups (list): Pares (timestamp, linhas) já armazenados
+        """
+        lines = []
+        for timestamp, group in groups:
+            if self.show_timestamps.get():
+                group = self.timestamp_formatter.format_lines(group, timestamp)
+            lines.extend(group)
+        self.insert_log_lines(lines)
+
+    def insert_log_lines(self, lines):
+        """
+        Insere linhas já formatadas no final da área de texto comum
+        
+        Args:
+            lines (list): Linhas prontas para exibição
+        """
+        if not lines:
+            return
+        
+        # Linhas que sairiam do buffer no mesmo lote não são inseridas
+        max_lines = self.max_buffer_lines.get()
+        if 0 < max_lines < len(lines):
+            lines = lines[-max_lines:]
+        
+        # Dados já chegam seguros para Tcl/Tk pelo LogSanitizer
+        text = '\n'.join(lines) + '\n'
+        
+        # Inserir no log
+        self.log_area.insert(tk.END, text)
+        
+        # Gerenciar buffer
+        self.manage_buffer_size()
+        
+        # Auto-scroll
+        if self.auto_scroll:
+            self.log_area.see(tk.END)
+
+    def append_filtered_groups(self, groups, first_seq=None):
+        """
+        Verifica apenas as linhas recém-chegadas contra o filtro atual
+        
+        Durante uma busca em andamento nada é feito aqui: ao terminar, a
+        busca confere as linhas chegadas depois da cópia do line_store.
+        
+        Args:
+            groups (list): Pares (timestamp, linhas) já armazenados
+            first_seq (int): Sequência da primeira linha (padrão: os lotes
+                são as últimas linhas do line_store)
+        """
+        if self.filter_pending:
+            return
+        
+        if first_seq is None:
+            first_seq = self.line_store.next_seq - sum(len(lines) for _, lines in groups)
+        seq = first_seq
+        select = self.filter_select
+        matched = []
+        for timestamp, lines in groups:
+            kept = []
+            for line in lines:
+                if select(line):
+                    kept.append(line)
+                    self.filter_seqs.append(seq)
+                seq += 1
+            if kept:
+                self.filter_results.extend(kept, timestamp)
+                matched.append((timestamp, kept))
+        self.filter_scanned_seq = self.line_store.next_seq
+        if not matched:
+            return
+        
+        if self.virtual_view_mode.get():
+            if self.virtual_view.source is self.filter_view:
+                self.virtual_view.refresh()
+            return
+        self.insert_log_groups(matched)
+
+    def get_store_limit(self):
+        """Limite de linhas armazenadas conforme o modo de visualização"""
+        if self.virtual_view_mode.get():
+            return self.virtual_buffer_lines.get()
+        return self.max_buffer_lines.get()
+
     def manage_buffer_size(self):
         """Gerencia o tamanho do buffer de log"""
         try:
@@ -515,11 +1368,6 @@ class RestoreCellTerminal:
                     # Remover do início
                     self.log_area.delete('1.0', f'{lines_to_remove + 1}.0')
                     
-                    # Atualizar log original também
-                    self.original_log = '\n'.join(
-                        self.original_log.splitlines()[lines_to_remove:]
-                    )
-                    
         except Exception as e:
             logging.error(f"Erro ao gerenciar buffer: {str(e)}")
 
@@ -556,98 +1404,295 @@ class RestoreCellTerminal:
 
     def should_display_log(self, data):
         """Verifica se o log deve ser exibido baseado nos filtros ativos"""
-        data_lower = data.lower()
-        current_filter = self.log_filter.get()
-        
-        # Modo bruto mostra tudo
-        if current_filter == 'Bruto':
-            return True
-            
-        # Verificar filtros específicos
-        filter_patterns = {
-            'vproc': ['vproc', 'voltage'],
-            'cpu': ['cpu', 'processor'],
-            'pmic': ['pmic', 'power'],
-            'i2c': ['i2c', 'bus'],
-            'clock': ['clock', 'freq'],
-            'rpmb': ['rpmb', 'secure'],
-            'ufs': ['ufs', 'storage'],
-            'emmc': ['emmc', 'mmc'],
-            'ram': ['ram', 'memory'],
-            'outros': []  # Filtro especial tratado separadamente
-        }
-        
-        # Se o filtro atual existe nos padrões
-        if current_filter.lower() in filter_patterns:
-            patterns = filter_patterns[current_filter.lower()]
-            return any(pattern in data_lower for pattern in patterns)
-        
-        # Filtro "outros" captura logs que não se encaixam nos outros filtros
-        if current_filter == 'Outros':
-            return not any(
-                pattern in data_lower 
-                for patterns in filter_patterns.values() 
-                for pattern in patterns
-            )
-        
-        return False
+        return should_display(data, self.log_filter.get())
 
     def filter_logs(self, data):
         """Filtra os logs de acordo com as configurações"""
-        timestamp = datetime.now().strftime('[%Y-%m-%d %H:%M:%S.%f]') if self.show_timestamps.get() else ''
-        
         # Armazenar log original
-        if not hasattr(self, 'original_log'):
-            self.original_log = ''
-        self.original_log += f"{timestamp} {data}\n"
+        self.line_store.append(data, wall_clock())
         
         # Aplicar filtros ativos
         self.apply_filters()
 
-    def apply_filters(self):
-        """Aplica os filtros selecionados ao log"""
-        if not hasattr(self, 'original_log'):
-            self.original_log = self.log_area.get(1.0, tk.END)
-
-        # Limpar área de log
-        self.log_area.delete(1.0, tk.END)
+    def get_filter_matcher(self):
+        """
+        Retorna o CategoryMatcher dos filtros UART (fixos e personalizados)
+        
+        Os filtros fixos usam as palavras-chave de CATEGORY_PATTERNS e os
+        personalizados casam o próprio texto (ou a expressão, se escritos
+        como /padrão/). O matcher só é recompilado
+        quando um filtro é adicionado; nesse momento o índice de categorias
+        do line_store é refeito (única releitura do texto).
+        """
+        if self.filter_matcher is None:
+            categories = {}
+            for name in self.uart_filters:
+                if name in CATEGORY_PATTERNS:
+                    categories[name] = CATEGORY_PATTERNS[name]
+                else:
+                    categories[name] = [name]
+            self.filter_matcher = CategoryMatcher(categories)
+            if self.category_index is not None:
+                self.line_store.remove_index(self.category_index)
+            self.category_index = CategoryIndex(self.filter_matcher)
+            self.line_store.add_index(self.category_index)
+        return self.filter_matcher
+
+    def apply_filters(self, delay=0):
+        """
+        Agenda a aplicação dos filtros selecionados ao log
+        
+        Uma nova chamada cancela a execução pendente ou em andamento, de
+        modo que só o estado mais recente dos filtros é processado.
+        
+        Args:
+            delay (int): Espera em ms antes de começar (debounce da busca)
+        """
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_generation += 1
+        self.filter_job = self.root.after(delay, self.run_filters, self.filter_generation)
 
-        # Obter filtros ativos
-        active_filters = [
-            name for name, var in self.uart_filters.items() 
-            if var.get()
-        ]
+    def on_search_change(self):
+        """Campo Buscar alterado: filtra após uma pausa na digitação"""
+        self.apply_filters(self.filter_debounce_ms)
 
-        # Obter texto de busca
-        search_text = self.search_var.get().lower()
+    def get_category_select(self, active_filters):
+        """
+        Predicado compilado das categorias ativas, ou None sem categorias
+        
+        O predicado é compilado uma vez por conjunto de filtros; 'outros'
+        aceita linhas sem nenhuma categoria fixa.
+        """
+        if not active_filters:
+            return None
+        return self.get_filter_matcher().selector(
+            [name for name in active_filters if name != 'outros'],
+            others='outros' in active_filters
+        )
 
-        # Processar cada linha do log original
-        for line in self.original_log.splitlines():
-            should_display = False
+    def build_filter_predicate(self, active_filters, search_text):
+        """Monta o predicado line -> bool dos filtros ativos e da busca"""
+        select = self.get_category_select(active_filters)
+        if not search_text:
+            return select
+        search = pattern_predicate(search_text)
+        if select:
+            return lambda line: select(line) or search(line)
+        return search
+
+    def run_filters(self, generation):
+        """
+        Aplica os filtros atuais ao log
+        
+        Só categorias: seleção imediata pelo índice de categorias. Com
+        texto de busca, a verificação roda em um SearchJob (thread própria)
+        e o resultado aparece aos poucos. Se os filtros de categoria não
+        mudaram e a busca nova contém a anterior (não vazia), o resultado
+        novo é um subconjunto do atual e apenas ele é verificado.
+        """
+        self.filter_job = None
+        if generation != self.filter_generation:
+            return
+        try:
+            # Obter filtros ativos
+            active_filters = frozenset(
+                name for name, var in self.uart_filters.items()
+                if var.get()
+            )
+            
+            # Obter texto de busca (/padrão/ para expressão regular)
+            search_text = self.search_var.get()
+            if is_regex(search_text):
+                compile_pattern(search_text)  # Valida antes de mudar o estado
+            else:
+                search_text = search_text.lower()
+            if not search_text:
+                self.show_search_status('')
+            
+            self.cancel_search()
             
-            # Se nenhum filtro está ativo, mostrar tudo
+            # Sem filtros: exibir o armazenamento completo
             if not active_filters and not search_text:
-                should_display = True
+                self.filter_key = None
+                self.filter_select = None
+                self.filter_results = None
+                self.filter_seqs = None
+                self.filter_view = None
+                self.filter_pending = False
+                self.restore_original_log()
+                return
+            
+            previous_key = self.filter_key
+            refine = (
+                previous_key is not None
+                and not self.filter_pending
+                and previous_key[0] == active_filters
+                and previous_key[1]
+                and previous_key[1] in search_text
+                and not is_regex(previous_key[1])
+                and not is_regex(search_text)
+            )
+            if refine:
+                # Cópia do resultado atual, antes de substituí-lo
+                seqs = list(self.filter_seqs)
+                times, lines = self.filter_results.window(0, len(self.filter_results))
+                snapshot_end = self.filter_scanned_seq
+            
+            self.filter_key = (active_filters, search_text)
+            self.filter_select = self.build_filter_predicate(active_filters, search_text)
+            self.filter_results = LineStore(self.get_store_limit())
+            self.filter_seqs = deque(maxlen=self.get_store_limit() or None)
+            self.filter_view = FormattedLines(self.filter_results, self.show_timestamps.get())
+            
+            if not search_text:
+                # Só categorias: máscaras gravadas na ingestão, sem reler o texto
+                self.get_filter_matcher()
+                store = self.line_store
+                seqs = [
+                    seq for seq in self.category_index.select(
+                        [name for name in active_filters if name != 'outros'],
+                        others='outros' in active_filters
+                    )
+                    if seq >= store.first_seq
+                ]
+                self.filter_results.extend_items(store.select_items(seqs))
+                self.filter_seqs.extend(seqs)
+                self.filter_scanned_seq = store.next_seq
+                self.filter_pending = False
+                self.render_filter_results()
+                return
+            
+            select = self.get_category_select(active_filters)
+            if refine:
+                # Refinar: apenas as linhas já aprovadas podem continuar
+                job = SearchJob(search_text, seqs, times, lines, select=select)
             else:
-                # Verificar filtros ativos
-                for filter_name in active_filters:
-                    if filter_name in line.lower():
-                        should_display = True
-                        break
-                
-                # Verificar texto de busca
-                if search_text and search_text in line.lower():
-                    should_display = True
+                # Cópia do line_store; o índice de trigramas só ajuda sem
+                # categorias (elas aprovam linhas sem o termo)
+                seqs, times, lines = self.line_store.snapshot()
+                flags = None
+                if select is None:
+                    flags = self.line_store.search_flags(search_text, self.search_index)
+                job = SearchJob(search_text, seqs, times, lines, flags=flags, select=select)
+                snapshot_end = self.line_store.next_seq
+            
+            self.filter_pending = True
+            self.filter_scanned_seq = snapshot_end
+            self.render_filter_results()
+            self.start_search(job, self.on_filter_results, self.on_filter_done)
+            
+        except re.error as e:
+            # Expressão incompleta durante a digitação: aviso não modal
+            self.show_search_status(f"Expressão inválida: {str(e)}")
+        except Exception as e:
+            logging.error(f"Erro ao aplicar filtros: {str(e)}")
+
+    def on_filter_results(self, results):
+        """Lote de resultados da busca do filtro: acrescenta ao final da exibição"""
+        items = [(timestamp, line) for _, timestamp, line, _ in results]
+        self.filter_results.extend_items(items)
+        self.filter_seqs.extend(seq for seq, _, _, _ in results)
+        if self.virtual_view_mode.get():
+            if self.virtual_view.source is self.filter_view:
+                self.virtual_view.refresh()
+            return
+        self.insert_log_lines(self.format_log_lines(items))
+
+    def on_filter_done(self, job):
+        """Busca do filtro concluída: confere as linhas chegadas durante a busca"""
+        self.filter_pending = False
+        store = self.line_store
+        start = max(self.filter_scanned_seq, store.first_seq)
+        times, lines = store.window(start - store.first_seq, len(store))
+        self.append_filtered_groups(
+            [(timestamp, [line]) for timestamp, line in zip(times, lines)],
+            start
+        )
+
+    def render_filter_results(self):
+        """Exibe o resultado do filtro em uma única operação"""
+        self.clear_highlights()
+        if self.virtual_view_mode.get():
+            self.virtual_view.set_source(self.filter_view)
+            return
+        
+        max_lines = self.max_buffer_lines.get()
+        lines = self.filter_view[-max_lines:] if max_lines > 0 else list(self.filter_view)
+        self.log_area.delete('1.0', tk.END)
+        if lines:
+            self.log_area.insert('1.0', '\n'.join(lines) + '\n')
+        if self.auto_scroll:
+            self.log_area.see(tk.END)
 
-            if should_display:
-                self.log_area.insert(tk.END, line + '\n')
+    def start_search(self, job, on_results, on_done):
+        """
+        Inicia um SearchJob e acompanha seu progresso pelo timer do Tk
+        
+        Args:
+            job (SearchJob): Busca a executar; substitui a busca atual
+            on_results (callable): Recebe cada lote de resultados
+            on_done (callable): Chamado com o job ao final
+        """
+        self.cancel_search()
+        self.search_job = job
+        job.start()
+        self.update_search_counter(job)
+        self.root.after(self.ui_refresh_ms.get(), self.poll_search, job, on_results, on_done)
+
+    def cancel_search(self):
+        """Interrompe a busca em segundo plano, se houver"""
+        if self.search_job is not None:
+            self.search_job.cancel()
+            self.search_job = None
+
+    def poll_search(self, job, on_results, on_done):
+        """Entrega os resultados prontos e atualiza o contador"""
+        if job is not self.search_job:
+            return
+        try:
+            finished = job.finished
+            results = job.take()
+            if results:
+                on_results(results)
+            self.update_search_counter(job)
+            if finished:
+                self.search_job = None
+                on_done(job)
+                return
+        except Exception as e:
+            logging.error(f"Erro ao exibir resultados da busca: {str(e)}")
+        self.root.after(max(1, self.ui_refresh_ms.get()), self.poll_search, job, on_results, on_done)
+
+    def update_search_counter(self, job):
+        """Contador de resultados na barra de status (não modal)"""
+        text = f"Busca: {job.matched} linhas, {job.occurrences} ocorrências"
+        if not job.finished:
+            text += f" ({job.progress}%)"
+        self.show_search_status(text)
+
+    def show_search_status(self, text):
+        """Texto da busca na barra de status"""
+        label = getattr(self, 'search_label', None)
+        if label is not None:
+            label.config(text=text)
 
     def add_custom_filter(self):
         """Adiciona um filtro personalizado"""
         custom_filter = self.custom_filter_entry.get().strip()
         if custom_filter:
+            # Filtros /padrão/ são validados antes de entrar no matcher,
+            # com os limites da thread de captura
+            if is_regex(custom_filter):
+                try:
+                    compile_pattern(custom_filter, capture=True)
+                except re.error as e:
+                    messagebox.showerror("Erro", f"Expressão regular inválida: {str(e)}")
+                    return
             # Adicionar novo filtro ao dicionário
             self.uart_filters[custom_filter] = tk.BooleanVar(value=True)
+            self.filter_matcher = None
+            self.get_filter_matcher()
             # Recriar interface de filtros
             self.create_filter_interface()
             # Aplicar filtros
@@ -668,24 +1713,52 @@ class RestoreCellTerminal:
 
     def highlight_filtered_text(self, text, filter_name):
         """Destaca o texto filtrado com cores diferentes"""
-        start_idx = "1.0"
-        while True:
-            start_idx = self.log_area.search(
-                filter_name, 
-                start_idx, 
-                tk.END, 
-                nocase=True
-            )
-            if not start_idx:
-                break
-                
-            end_idx = f"{start_idx}+{len(filter_name)}c"
-            self.log_area.tag_add(filter_name, start_idx, end_idx)
-            self.log_area.tag_config(
-                filter_name, 
-                foreground=self.get_filter_color(filter_name)
-            )
-            start_idx = end_idx
+        self.log_area.tag_configure(
+            filter_name,
+            foreground=self.get_filter_color(filter_name)
+        )
+        self.highlight_terms[filter_name] = filter_name
+        self.highlight_visible_region()
+
+    def on_log_scroll(self, first, last):
+        """yscrollcommand da área de log: atualiza a barra e os destaques"""
+        self.log_area.vbar.set(first, last)
+        if self.highlight_terms and self.highlight_job is None:
+            self.highlight_job = self.root.after_idle(self.highlight_visible_region)
+
+    def highlight_visible_region(self):
+        """
+        Aplica os destaques apenas às linhas visíveis (mais uma margem)
+        
+        As posições são calculadas em Python sobre o trecho exibido e cada
+        tag recebe um único tag_add; o restante é destacado sob demanda
+        quando a área rola ou recebe novas linhas.
+        """
+        self.highlight_job = None
+        if not self.highlight_terms:
+            return
+        try:
+            height = self.log_area.winfo_height()
+            first = int(self.log_area.index('@0,0').split('.')[0])
+            last = int(self.log_area.index(f'@0,{height}').split('.')[0])
+            first = max(1, first - self.highlight_margin)
+            last += self.highlight_margin
+            
+            start, end = f"{first}.0", f"{last}.end"
+            lines = self.log_area.get(start, end).split('\n')
+            for tag, term in self.highlight_terms.items():
+                self.log_area.tag_remove(tag, start, end)
+                ranges = highlight_ranges(lines, term, first)
+                if ranges:
+                    self.log_area.tag_add(tag, *ranges)
+        except Exception as e:
+            logging.error(f"Erro ao destacar termos: {str(e)}")
+
+    def clear_highlights(self):
+        """Remove todos os destaques da área de log"""
+        for tag in self.highlight_terms:
+            self.log_area.tag_remove(tag, '1.0', tk.END)
+        self.highlight_terms.clear()
 
     def get_filter_color(self, filter_name):
         """Retorna uma cor específica para cada tipo de filtro"""
@@ -763,7 +1836,7 @@ class RestoreCellTerminal:
         # Adicionar campo de busca
         ttk.Label(control_frame, text="Buscar:").pack(side=tk.LEFT, padx=5)
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self.apply_filters())
+        self.search_var.trace('w', lambda *args: self.on_search_change())
         ttk.Entry(
             control_frame,
             textvariable=self.search_var,
@@ -782,6 +1855,30 @@ class RestoreCellTerminal:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Arquivo", menu=file_menu)
         file_menu.add_command(label="Salvar Logs", command=self.save_logs)
+        
+        # Gravação contínua
+        stream_menu = tk.Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Gravação Contínua", menu=stream_menu)
+        stream_menu.add_checkbutton(label="Gravar Sessão em Disco",
+                                  variable=self.stream_to_disk,
+                                  command=self.toggle_disk_streaming)
+        stream_menu.add_separator()
+        stream_menu.add_radiobutton(label="Sem Compressão",
+                                  variable=self.stream_compression,
+                                  value="nenhuma")
+        for name in sorted(COMPRESSORS):
+            stream_menu.add_radiobutton(label=f"Comprimir com {name}",
+                                      variable=self.stream_compression,
+                                      value=name)
+        
+        # Captura por gatilho
+        trigger_menu = tk.Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Captura por Gatilho", menu=trigger_menu)
+        trigger_menu.add_checkbutton(label="Ativar Gatilho",
+                                   variable=self.trigger_enabled,
+                                   command=self.toggle_trigger_capture)
+        trigger_menu.add_command(label="Configurar Gatilho...",
+                               command=self.configure_trigger)
         file_menu.add_separator()
         file_menu.add_command(label="Sair", command=self.root.quit)
         
@@ -795,6 +1892,9 @@ class RestoreCellTerminal:
                                     variable=self.show_timestamps)
         settings_menu.add_checkbutton(label="Detecção Automática de Baud Rate",
                                     variable=self.auto_baud_detection)
+        settings_menu.add_checkbutton(label="Visualização Virtual (sessões longas)",
+                                    variable=self.virtual_view_mode,
+                                    command=self.toggle_view_mode)
         
         # Menu Perfis
         profile_menu = tk.Menu(settings_menu, tearoff=0)
@@ -816,36 +1916,509 @@ class RestoreCellTerminal:
         help_menu.add_command(label="Reportar Problema", command=self.open_github_issues)
         help_menu.add_command(label="Verificar Atualizações", command=self.check_for_updates)
 
+    def toggle_disk_streaming(self):
+        """Liga ou desliga a gravação contínua das sessões em disco"""
+        if not self.stream_to_disk.get():
+            self.close_disk_writers()
+            return
+        
+        directory = filedialog.askdirectory(
+            title="Pasta para gravação contínua",
+            initialdir=self.stream_directory.get() or os.getcwd()
+        )
+        if not directory:
+            self.stream_to_disk.set(False)
+            return
+        self.stream_directory.set(directory)
+        
+        # Sessões já conectadas passam a gravar a partir de agora
+        if self.engine:
+            self.attach_disk_writer(None, self.engine)
+        if self.logcat_engine:
+            self.attach_disk_writer('logcat', self.logcat_engine)
+        for port, panel in self.port_sessions.items():
+            self.attach_disk_writer(port, panel.engine)
+
+    def attach_disk_writer(self, port, engine):
+        """
+        Cria um gravador rotativo e o registra como consumidor do engine
+        
+        Args:
+            port (str): Porta da sessão Multi-porta, ou None para a conexão principal
+            engine (CaptureEngine): Motor de captura da sessão
+        """
+        try:
+            writer = self.disk_writers.get(port)
+            if writer is None:
+                prefix = "logs_restorecell"
+                if port:
+                    prefix += "_" + re.sub(r'\W+', '', os.path.basename(port))
+                compression = self.stream_compression.get()
+                writer = RotatingLogWriter(
+                    directory=self.stream_directory.get() or '.',
+                    prefix=prefix,
+                    max_bytes=self.stream_max_mb.get() * 1024 * 1024,
+                    max_seconds=self.stream_rotate_minutes.get() * 60,
+                    compression=compression if compression in COMPRESSORS else None,
+                    timestamps=self.show_timestamps.get()
+                )
+                writer.start()
+                self.disk_writers[port] = writer
+            if writer.write_lines not in engine.consumers:
+                engine.add_consumer(writer.write_lines)
+        except Exception as e:
+            logging.error(f"Erro ao iniciar gravação em disco: {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao iniciar gravação em disco: {str(e)}")
+
+    def close_disk_writers(self):
+        """Desliga a gravação contínua e fecha os segmentos abertos"""
+        engines = [panel.engine for panel in self.port_sessions.values()]
+        if self.engine:
+            engines.append(self.engine)
+        if self.logcat_engine:
+            engines.append(self.logcat_engine)
+        
+        for writer in self.disk_writers.values():
+            for engine in engines:
+                engine.remove_consumer(writer.write_lines)
+            writer.close()
+            if writer.dropped_lines:
+                logging.warning(f"Gravação em disco descartou {writer.dropped_lines} linhas")
+        self.disk_writers.clear()
+
+    def toggle_trigger_capture(self):
+        """Liga ou desliga a captura por gatilho da conexão principal"""
+        if not self.trigger_enabled.get():
+            self.close_trigger_capture()
+            return
+        
+        directory = filedialog.askdirectory(
+            title="Pasta para os snapshots do gatilho",
+            initialdir=self.trigger_directory.get() or self.stream_directory.get() or os.getcwd()
+        )
+        if not directory:
+            self.trigger_enabled.set(False)
+            return
+        self.trigger_directory.set(directory)
+        if self.engine:
+            self.attach_trigger_capture(self.engine)
+
+    def configure_trigger(self):
+        """Padrões e janelas do gatilho"""
+        patterns = simpledialog.askstring(
+            "Captura por Gatilho",
+            "Padrões que disparam o gatilho (separados por vírgula, /regex/ aceito):",
+            initialvalue=self.trigger_patterns.get(),
+            parent=self.root
+        )
+        if patterns is None:
+            return
+        pre_seconds = simpledialog.askinteger(
+            "Captura por Gatilho", "Segundos antes do disparo:",
+            initialvalue=self.trigger_pre_seconds.get(), minvalue=0, parent=self.root
+        )
+        post_seconds = simpledialog.askinteger(
+            "Captura por Gatilho", "Segundos depois do disparo:",
+            initialvalue=self.trigger_post_seconds.get(), minvalue=0, parent=self.root
+        )
+        self.trigger_patterns.set(patterns)
+        if pre_seconds is not None:
+            self.trigger_pre_seconds.set(pre_seconds)
+        if post_seconds is not None:
+            self.trigger_post_seconds.set(post_seconds)
+        
+        # Um gatilho ativo passa a usar a nova configuração
+        if self.trigger_capture is not None:
+            self.close_trigger_capture()
+            if self.engine:
+                self.attach_trigger_capture(self.engine)
+
+    def attach_trigger_capture(self, engine):
+        """Cria a captura por gatilho e a registra como consumidor do engine"""
+        try:
+            if self.trigger_capture is None:
+                patterns = [p.strip() for p in self.trigger_patterns.get().split(',') if p.strip()]
+                self.trigger_capture = TriggerCapture(
+                    patterns,
+                    directory=self.trigger_directory.get() or '.',
+                    pre_seconds=self.trigger_pre_seconds.get(),
+                    post_seconds=self.trigger_post_seconds.get(),
+                    timestamps=self.show_timestamps.get(),
+                    on_snapshot=self.on_trigger_snapshot
+                )
+            if self.trigger_capture.write_lines not in engine.consumers:
+                engine.add_consumer(self.trigger_capture.write_lines)
+        except Exception as e:
+            logging.error(f"Erro ao iniciar captura por gatilho: {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao iniciar captura por gatilho: {str(e)}")
+
+    def close_trigger_capture(self):
+        """Desliga o gatilho, gravando o disparo em andamento"""
+        if self.trigger_capture is None:
+            return
+        if self.engine:
+            self.engine.remove_consumer(self.trigger_capture.write_lines)
+        self.trigger_capture.close()
+        self.trigger_capture = None
+
+    def on_trigger_snapshot(self, path):
+        """Snapshot gravado (chamado pela thread de gravação do gatilho)"""
+        self.root.after(0, lambda: self.status_label.configure(
+            text=f"Gatilho disparado: {os.path.basename(path)}"
+        ))
+
+    def create_multiport_tab(self):
+        """Cria a aba de captura simultânea em várias portas"""
+        controls = ttk.Frame(self.multiport_frame)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(controls, text="Porta:").pack(side=tk.LEFT, padx=5)
+        self.multi_port_combo = ttk.Combobox(controls, width=12)
+        self.multi_port_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(controls, text="Baud Rate:").pack(side=tk.LEFT, padx=5)
+        self.multi_baud_combo = ttk.Combobox(
+            controls,
+            values=[str(rate) for rate in BAUD_RATES],
+            width=10
+        )
+        self.multi_baud_combo.set('115200')
+        self.multi_baud_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            controls,
+            text="Adicionar Porta",
+            command=self.add_port_session,
+            style='Custom.TButton'
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # Container dos painéis de sessão
+        self.sessions_frame = ttk.Frame(self.multiport_frame)
+        self.sessions_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def add_port_session(self):
+        """Inicia a captura de mais uma porta na aba Multi-porta"""
+        port = self.multi_port_combo.get()
+        if not port:
+            messagebox.showerror("Erro", "Selecione uma porta COM")
+            return
+        if port in self.port_sessions or (self.is_connected and self.serial_port
+                                          and self.serial_port.port == port):
+            messagebox.showwarning("Aviso", f"A porta {port} já está em captura")
+            return
+        
+        try:
+            engine = CaptureEngine(
+                port=port,
+                baudrate=int(self.multi_baud_combo.get())
+            )
+            panel = PortSessionPanel(self.sessions_frame, self, engine)
+            engine.on_error = lambda e: self.root.after(0, self.handle_session_error, port, e)
+            if self.stream_to_disk.get():
+                self.attach_disk_writer(port, engine)
+            self.capture_hub.add_session(engine)
+            
+            panel.pack(fill=tk.BOTH, expand=True, pady=2)
+            self.port_sessions[port] = panel
+            logging.info(f"Sessão iniciada na porta {port}")
+            
+        except Exception as e:
+            logging.error(f"Erro ao iniciar sessão em {port}: {str(e)}")
+            messagebox.showerror("Erro de Conexão", f"Erro ao conectar em {port}: {str(e)}")
+            if 'panel' in locals():
+                panel.destroy()
+
+    def remove_port_session(self, port):
+        """Encerra a sessão de uma porta e remove seu painel"""
+        try:
+            self.capture_hub.remove_session(port)
+            panel = self.port_sessions.pop(port, None)
+            if panel:
+                panel.destroy()
+            logging.info(f"Sessão encerrada na porta {port}")
+        except Exception as e:
+            logging.error(f"Erro ao encerrar sessão em {port}: {str(e)}")
+
+    def handle_session_error(self, port, error):
+        """Trata falhas de leitura de uma sessão Multi-porta"""
+        panel = self.port_sessions.get(port)
+        if panel:
+            panel.mark_error(error)
+        self.capture_hub.remove_session(port)
+
     def create_adb_diagnostics(self):
         buttons_frame = ttk.Frame(self.adb_frame)
         buttons_frame.pack(fill=tk.X, padx=5, pady=5)
         
+        # Argumentos passados ao adb, sem shell
         adb_commands = {
-            "Verificar Dispositivos": "adb devices",
-            "Status da Bateria": "adb shell dumpsys battery",
-            "Status do Sistema": "adb shell dumpsys activity",
-            "Teste de Rede": "adb shell ping -c 4 google.com",
-            "Reiniciar Device": "adb reboot"
+            "Status da Bateria": ["shell", "dumpsys", "battery"],
+            "Status do Sistema": ["shell", "dumpsys", "activity"],
+            "Teste de Rede": ["shell", "ping", "-c", "4", "google.com"],
+            "Reiniciar Device": ["reboot"]
         }
         
+        ttk.Button(buttons_frame,
+                  text="Verificar Dispositivos",
+                  command=self.refresh_adb_devices).pack(side=tk.LEFT, padx=5)
         for label, command in adb_commands.items():
             btn = ttk.Button(buttons_frame,
                            text=label,
                            command=lambda cmd=command: self.execute_adb_command(cmd))
             btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(buttons_frame,
+                  text="Cancelar Comandos",
+                  command=self.cancel_adb_commands).pack(side=tk.LEFT, padx=5)
+        
+        # Aparelhos: os comandos rodam nos selecionados (nenhum = todos)
+        devices_frame = ttk.Frame(self.adb_frame)
+        devices_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(devices_frame, text="Aparelhos:").pack(side=tk.LEFT, padx=5)
+        self.adb_device_list = tk.Listbox(devices_frame,
+                                        selectmode=tk.MULTIPLE,
+                                        height=4,
+                                        exportselection=False)
+        self.adb_device_list.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Label(devices_frame, text="Nenhum selecionado = todos").pack(side=tk.LEFT, padx=5)
+        
+        # Logcat contínuo, pelo mesmo pipeline da captura UART
+        logcat_frame = ttk.Frame(self.adb_frame)
+        logcat_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(logcat_frame, text="Logcat (filterspecs):").pack(side=tk.LEFT, padx=5)
+        ttk.Entry(logcat_frame,
+                 textvariable=self.logcat_filter_specs,
+                 width=40).pack(side=tk.LEFT, padx=5)
+        self.logcat_btn = ttk.Button(logcat_frame,
+                                   text="Iniciar Logcat",
+                                   command=self.toggle_logcat)
+        self.logcat_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Label(logcat_frame, text="ex.: ActivityManager:I *:S").pack(side=tk.LEFT, padx=5)
+        
+        # Resultados: resumo da última execução e uma aba por aparelho
+        self.adb_results = ttk.Notebook(self.adb_frame)
+        self.adb_results.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        summary_frame = ttk.Frame(self.adb_results)
+        self.adb_results.add(summary_frame, text="Resumo")
+        
+        headings = ('aparelho', 'comando', 'situação', 'código', 'linhas', 'tempo')
+        self.adb_summary = ttk.Treeview(summary_frame, columns=headings, show='headings')
+        for heading in headings:
+            self.adb_summary.heading(heading, text=heading.capitalize())
+            self.adb_summary.column(heading, width=90)
+        self.adb_summary.column('comando', width=250)
+        self.adb_summary.column('situação', width=200)
+        self.adb_summary.pack(fill=tk.BOTH, expand=True)
+
+    def get_adb_pane(self, serial):
+        """Aba de saída do aparelho, criada no primeiro uso"""
+        pane = self.adb_panes.get(serial)
+        if pane is None:
+            pane = AdbDevicePane(self.adb_results, self, serial)
+            self.adb_results.add(pane, text=serial)
+            self.adb_panes[serial] = pane
+        return pane
+
+    def selected_adb_serials(self):
+        """Aparelhos selecionados na lista; nenhum selecionado = todos os prontos"""
+        devices = [serial for serial, state in self.adb_devices]
+        selected = [devices[index] for index in self.adb_device_list.curselection()]
+        if selected:
+            return selected
+        return [serial for serial, state in self.adb_devices if state == 'device']
+
+    def refresh_adb_devices(self):
+        """Executa 'adb devices' e atualiza a lista de aparelhos"""
+        if self.current_mode.get() != "ADB":
+            messagebox.showwarning("Aviso", "Ative o modo ADB primeiro!")
+            return
+        
+        lines = []
+        
+        def collect(new_lines, timestamp):
+            lines.extend(new_lines)
+            self.on_engine_lines(new_lines, timestamp)
+        
+        try:
+            self.on_engine_lines(["=== adb devices ==="], wall_clock())
+            self.adb_runner.run(
+                ['devices'],
+                on_lines=collect,
+                on_done=lambda cmd: self.root.after(0, self.on_adb_devices, cmd, lines)
+            )
+        except Exception as e:
+            logging.error(f"Erro ao listar aparelhos ADB: {str(e)}")
+            messagebox.showerror("Erro ADB", f"Erro ao listar aparelhos: {str(e)}")
+
+    def on_adb_devices(self, command, lines):
+        """Lista de aparelhos recebida (executado na thread do Tk)"""
+        self.on_adb_done(command)
+        if command.error is not None or command.cancelled:
+            return
+        
+        self.adb_devices = parse_adb_devices(lines)
+        self.adb_device_list.delete(0, tk.END)
+        for serial, state in self.adb_devices:
+            self.adb_device_list.insert(tk.END, f"{serial} ({state})")
+        self.status_label.configure(text=f"{len(self.adb_devices)} aparelhos ADB encontrados")
 
-    def execute_adb_command(self, command):
+    def execute_adb_command(self, args):
+        """
+        Executa um comando adb em segundo plano
+        
+        A saída é entregue linha a linha à mesma fila da captura serial,
+        com timestamps, filtros e limite do buffer; vários comandos podem
+        rodar ao mesmo tempo sem travar a janela. Com aparelhos listados,
+        o comando roda em paralelo em cada aparelho selecionado (-s), com
+        a saída de cada um também em sua aba e o resultado no resumo.
+        
+        Args:
+            args (list): Argumentos do adb (ex.: ['shell', 'dumpsys', 'battery'])
+        """
         if self.current_mode.get() != "ADB":
             messagebox.showwarning("Aviso", "Ative o modo ADB primeiro!")
             return
             
         try:
-            output = subprocess.check_output(command, shell=True).decode('utf-8')
-            self.log_area.insert(tk.END, f"\n=== {command} ===\n{output}\n")
-            self.log_area.see(tk.END)
+            # Cabeçalho entra na fila antes da primeira linha de saída
+            command_line = subprocess.list2cmdline([self.adb_runner.adb] + list(args))
+            serials = self.selected_adb_serials()
+            if not serials:
+                # Nenhum aparelho listado: aparelho padrão do adb
+                self.on_engine_lines([f"=== {command_line} ==="], wall_clock())
+                self.adb_runner.run(
+                    args,
+                    on_lines=self.on_engine_lines,
+                    on_done=lambda cmd: self.root.after(0, self.on_adb_done, cmd)
+                )
+            else:
+                header = f"=== {command_line} ({len(serials)} aparelhos) ==="
+                timestamp = wall_clock()
+                self.on_engine_lines([header], timestamp)
+                for serial in serials:
+                    self.get_adb_pane(serial).on_lines([f"=== {command_line} ==="], timestamp)
+                self.adb_runner.run_on_devices(
+                    args,
+                    serials,
+                    on_lines=self.on_adb_device_lines,
+                    on_done=lambda run: self.root.after(0, self.on_adb_run_done, run, command_line)
+                )
+            self.status_label.configure(
+                text=f"Executando: {command_line} "
+                     f"({len(self.adb_runner.running)} em andamento)"
+            )
         except Exception as e:
+            logging.error(f"Erro ao executar comando ADB: {str(e)}")
             messagebox.showerror("Erro ADB", f"Erro ao executar comando: {str(e)}")
 
+    def on_adb_device_lines(self, serial, lines, timestamp):
+        """Saída de um aparelho (thread do comando): aba própria e log principal"""
+        pane = self.adb_panes.get(serial)
+        if pane is not None:
+            pane.on_lines(lines, timestamp)
+        self.on_engine_lines([f"[{serial}] {line}" for line in lines], timestamp)
+
+    def on_adb_done(self, command):
+        """Comando adb encerrado (executado na thread do Tk)"""
+        self.status_label.configure(text=f"{command.command_line}: {command.status}")
+        
+        if command.error is not None and not command.timed_out:
+            messagebox.showerror("Erro ADB", f"Erro ao executar comando: {str(command.error)}")
+
+    def on_adb_run_done(self, run, command_line):
+        """Comando encerrado em todos os aparelhos (executado na thread do Tk)"""
+        self.adb_summary.delete(*self.adb_summary.get_children())
+        slowest = 0.0
+        for serial, status, returncode, lines, seconds in run.summary():
+            self.adb_summary.insert('', tk.END, values=(
+                serial,
+                command_line,
+                status,
+                '' if returncode is None else returncode,
+                lines,
+                f"{seconds:.2f} s"
+            ))
+            slowest = max(slowest, seconds)
+        self.status_label.configure(
+            text=f"{command_line}: {len(run.serials)} aparelhos em {run.elapsed:.2f} s "
+                 f"(mais lento: {slowest:.2f} s)"
+        )
+
+    def cancel_adb_commands(self):
+        """Encerra os comandos adb em andamento"""
+        self.adb_runner.cancel_all()
+
+    def toggle_logcat(self):
+        """Inicia ou para o logcat contínuo"""
+        if self.logcat_engine is None:
+            self.start_logcat()
+        else:
+            self.stop_logcat()
+
+    def start_logcat(self):
+        """
+        Inicia o adb logcat como fonte de captura
+        
+        As linhas passam pelo mesmo enquadramento, sanitização, filtros,
+        buffer e gravação contínua da porta serial; as filterspecs são
+        aplicadas no aparelho.
+        """
+        if self.current_mode.get() != "ADB":
+            messagebox.showwarning("Aviso", "Ative o modo ADB primeiro!")
+            return
+        
+        try:
+            specs = parse_logcat_specs(self.logcat_filter_specs.get())
+            serials = self.selected_adb_serials()
+            if len(serials) > 1:
+                messagebox.showwarning("Logcat", "Selecione um único aparelho para o logcat.")
+                return
+            
+            engine = LogcatEngine(
+                serial=serials[0] if serials else None,
+                filter_specs=specs,
+                adb=self.adb_runner.adb,
+                client=self.adb_runner.client
+            )
+            engine.add_consumer(self.on_engine_lines)
+            if self.stream_to_disk.get():
+                self.attach_disk_writer('logcat', engine)
+            engine.on_rx = self.on_serial_rx
+            engine.on_error = lambda e: self.root.after(0, self.on_logcat_error, e)
+            
+            self.on_engine_lines([f"=== {subprocess.list2cmdline(engine.argv)} ==="], wall_clock())
+            engine.start()
+            self.logcat_engine = engine
+            self.logcat_btn.configure(text="Parar Logcat")
+            self.status_label.configure(text=f"Logcat em andamento ({engine.port})")
+            
+        except ValueError as e:
+            messagebox.showerror("Logcat", str(e))
+        except Exception as e:
+            logging.error(f"Erro ao iniciar logcat: {str(e)}")
+            messagebox.showerror("Erro ADB", f"Erro ao iniciar logcat: {str(e)}")
+
+    def stop_logcat(self):
+        """Encerra o logcat contínuo"""
+        engine = self.logcat_engine
+        if engine is None:
+            return
+        self.logcat_engine = None
+        try:
+            engine.stop()
+            writer = self.disk_writers.get('logcat')
+            if writer is not None:
+                engine.remove_consumer(writer.write_lines)
+        except Exception as e:
+            logging.error(f"Erro ao parar logcat: {str(e)}")
+        self.logcat_btn.configure(text="Iniciar Logcat")
+        self.status_label.configure(text=f"Logcat encerrado: {engine.lines_captured} linhas")
+
+    def on_logcat_error(self, error):
+        """O adb logcat terminou sozinho (executado na thread do Tk)"""
+        self.stop_logcat()
+        messagebox.showwarning("Logcat", f"Logcat encerrado: {str(error)}")
+
     def monitor_ports(self):
         """Thread para monitorar mudanças nas portas seriais"""
         last_ports = set()
@@ -894,9 +2467,7 @@ class RestoreCellTerminal:
 
     def detect_baud_rate(self):
         """Detecta automaticamente o baud rate"""
-        common_rates = [9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600]
-        
-        for rate in common_rates:
+        for rate in BAUD_RATES:
             try:
                 with serial.Serial(self.port_combo.get(), rate, timeout=0.5) as ser:
                     # Tenta ler dados
@@ -1279,6 +2850,25 @@ class RestoreCellTerminal:
                     self.font_size.set(general.get('font_size', 10))
                     self.show_timestamps.set(general.get('show_timestamps', True))
                     self.max_buffer_lines.set(general.get('max_buffer', 1000))
+                    self.ui_refresh_ms.set(general.get('ui_refresh_ms', 50))
+                    self.ui_frame_budget.set(general.get('ui_frame_budget', 2000))
+                    self.ui_queue_max = general.get('ui_queue_max', 200000)
+                    self.virtual_view_mode.set(general.get('virtual_view', False))
+                    self.virtual_buffer_lines.set(general.get('virtual_buffer', 1000000))
+                    self.search_index_mb.set(general.get('search_index_mb', 64))
+                    self.search_index.max_bytes = self.search_index_mb.get() * 1024 * 1024
+                    stream = config.get('stream', {})
+                    self.stream_directory.set(stream.get('directory', ''))
+                    self.stream_max_mb.set(stream.get('max_mb', 64))
+                    self.stream_rotate_minutes.set(stream.get('rotate_minutes', 60))
+                    self.stream_compression.set(stream.get('compression', 'gzip'))
+                    trigger = config.get('trigger', {})
+                    self.trigger_patterns.set(trigger.get('patterns', ', '.join(TRIGGER_PATTERNS)))
+                    self.trigger_pre_seconds.set(trigger.get('pre_seconds', 30))
+                    self.trigger_post_seconds.set(trigger.get('post_seconds', 10))
+                    self.trigger_directory.set(trigger.get('directory', ''))
+                    if self.virtual_view_mode.get():
+                        self.toggle_view_mode()
                     
                     # Carregar temas personalizados
                     if 'custom_themes' in config:
@@ -1309,9 +2899,27 @@ class RestoreCellTerminal:
                     'font_size': self.font_size.get(),
                     'show_timestamps': self.show_timestamps.get(),
                     'max_buffer': self.max_buffer_lines.get(),
+                    'ui_refresh_ms': self.ui_refresh_ms.get(),
+                    'ui_frame_budget': self.ui_frame_budget.get(),
+                    'ui_queue_max': self.ui_queue_max,
+                    'virtual_view': self.virtual_view_mode.get(),
+                    'virtual_buffer': self.virtual_buffer_lines.get(),
+                    'search_index_mb': self.search_index_mb.get(),
                     'current_theme': 'dark' if self.dark_mode.get() else 'light',
                     'log_filter': self.log_filter.get()
                 },
+                'stream': {
+                    'directory': self.stream_directory.get(),
+                    'max_mb': self.stream_max_mb.get(),
+                    'rotate_minutes': self.stream_rotate_minutes.get(),
+                    'compression': self.stream_compression.get()
+                },
+                'trigger': {
+                    'patterns': self.trigger_patterns.get(),
+                    'pre_seconds': self.trigger_pre_seconds.get(),
+                    'post_seconds': self.trigger_post_seconds.get(),
+                    'directory': self.trigger_directory.get()
+                },
                 'custom_themes': self.themes,
                 'profiles': self.profiles,
                 'window': {
@@ -1331,6 +2939,22 @@ class RestoreCellTerminal:
             # Parar todas as threads
             self.stop_threads = True
             
+            # Parar entrega de linhas para a interface
+            if self.drain_job:
+                self.root.after_cancel(self.drain_job)
+                self.drain_job = None
+            
+            # Encerrar sessões da aba Multi-porta
+            self.capture_hub.stop()
+            
+            # Encerrar comandos ADB em andamento, sessões abertas e logcat
+            self.adb_runner.close()
+            self.stop_logcat()
+            
+            # Gravar o restante dos logs em disco
+            self.close_disk_writers()
+            self.close_trigger_capture()
+            
             # Aguardar threads terminarem
             for thread in self.threads:
                 if thread.is_alive():
@@ -1379,6 +3003,30 @@ class RestoreCellTerminal:
         )
         version_label.pack(side=tk.RIGHT, padx=5)
         
+        # Métricas de leitura serial
+        self.reads_label = ttk.Label(
+            info_frame,
+            text="Leituras: --",
+            font=('Helvetica', 8)
+        )
+        self.reads_label.pack(side=tk.RIGHT, padx=5)
+        
+        # Progresso da busca (não modal)
+        self.search_label = ttk.Label(
+            info_frame,
+            text="",
+            font=('Helvetica', 8)
+        )
+        self.search_label.pack(side=tk.RIGHT, padx=5)
+        
+        # Linhas aguardando exibição
+        self.queue_label = ttk.Label(
+            info_frame,
+            text="Fila: 0",
+            font=('Helvetica', 8)
+        )
+        self.queue_label.pack(side=tk.RIGHT, padx=5)
+        
         # Buffer size
         self.buffer_label = ttk.Label(
             info_frame,
@@ -1407,10 +3055,14 @@ class RestoreCellTerminal:
         """Atualiza as informações da barra de status"""
         try:
             # Atualizar informação de buffer
-            total_lines = int(self.log_area.index('end-1c').split('.')[0])
             self.buffer_label.config(
-                text=f"Buffer: {total_lines}/{self.max_buffer_lines.get()}"
+                text=f"Buffer: {len(self.line_store)}/{self.get_store_limit()} "
+                     f"({self.line_store.memory_usage() // 1024} KB)"
             )
+            queue_text = f"Fila: {self.get_ui_queue_depth()}"
+            if self.ui_dropped:
+                queue_text += f" (descartadas: {self.ui_dropped})"
+            self.queue_label.config(text=queue_text)
             
             # Atualizar informação de porta e baud rate
             if self.is_connected and self.serial_port:
@@ -1419,6 +3071,16 @@ class RestoreCellTerminal:
             else:
                 self.port_label.config(text="Porta: --")
                 self.baud_label.config(text="Baud: --")
+            
+            # Métricas da thread de leitura
+            if self.engine:
+                stats = self.engine.metrics.snapshot()
+                self.reads_label.config(
+                    text=f"Leituras: {stats['wakeups_per_second']:.0f}/s, "
+                         f"{stats['bytes_per_wakeup']:.0f} B"
+                )
+            else:
+                self.reads_label.config(text="Leituras: --")
                 
         except Exception as e:
             logging.error(f"Erro ao atualizar barra de status: {str(e)}")
@@ -1473,72 +3135,102 @@ class RestoreCellTerminal:
             )
 
     def search_logs(self):
-        """Busca avançada nos logs"""
+        """
+        Busca avançada nos logs
+        
+        A busca roda em segundo plano sobre uma cópia do line_store; as
+        linhas encontradas aparecem aos poucos e o contador da barra de
+        status acompanha o progresso, sem bloquear a captura.
+        """
         try:
             search_term = self.filter_combo.get()
             if not search_term or search_term == 'Bruto':
+                self.cancel_search()
                 self.restore_original_log()
                 return
-                
-            # Salvar posição atual do scroll
-            current_position = self.log_area.yview()
-            
-            # Limpar área de log
-            self.log_area.delete('1.0', tk.END)
             
-            # Filtrar e inserir linhas que contêm o termo
-            count = 0
-            for line in self.original_log.splitlines():
-                if search_term.lower() in line.lower():
-                    self.log_area.insert(tk.END, line + '\n')
-                    count += 1
+            # Cópia do line_store e candidatos do índice de trigramas
+            seqs, times, lines = self.line_store.snapshot()
+            flags = self.line_store.search_flags(search_term.lower(), self.search_index)
+            job = SearchJob(search_term, seqs, times, lines, flags=flags)
             
-            # Destacar termos encontrados
-            self.highlight_search_terms(search_term)
+            # Uma busca do filtro em andamento é substituída por esta
+            if self.filter_pending:
+                self.filter_key = None
+                self.filter_pending = False
             
-            # Restaurar posição do scroll
-            self.log_area.yview_moveto(current_position[0])
-            
-            # Mostrar resultado
-            messagebox.showinfo(
-                "Resultado da Busca",
-                f"Encontrados {count} resultados para '{search_term}'"
+            self.search_hits = []
+            self.search_matches = []
+            if self.virtual_view_mode.get():
+                self.virtual_view.set_source(self.search_matches, highlight_term=search_term)
+            else:
+                self.log_area.delete('1.0', tk.END)
+                # Destaque aplicado aos resultados conforme chegam à área visível
+                self.clear_highlights()
+                self.highlight_search_terms(search_term)
+            
+            self.start_search(
+                job,
+                self.on_search_results,
+                lambda job: self.on_search_done(job, search_term)
             )
             
         except Exception as e:
             messagebox.showerror("Erro", f"Erro na busca: {str(e)}")
             self.restore_original_log()
 
+    def open_archive_search(self):
+        """Abre a busca nos arquivos salvos com save_logs ou pela gravação contínua"""
+        term = self.filter_combo.get()
+        if term == 'Bruto':
+            term = ''
+        ArchiveSearchWindow(self, self.stream_directory.get() or os.getcwd(), term)
+
+    def on_search_results(self, results):
+        """Lote de resultados de search_logs: acrescenta ao final da exibição"""
+        self.search_hits.extend((seq, positions) for seq, _, _, positions in results)
+        lines = self.format_log_lines((timestamp, line) for _, timestamp, line, _ in results)
+        
+        if self.virtual_view_mode.get():
+            self.search_matches.extend(lines)
+            if self.virtual_view.source is self.search_matches:
+                self.virtual_view.refresh()
+            return
+        self.log_area.insert(tk.END, '\n'.join(lines) + '\n')
+
+    def on_search_done(self, job, search_term):
+        """Busca de search_logs concluída"""
+        if job.error is not None:
+            messagebox.showerror("Erro", f"Erro na busca: {str(job.error)}")
+            return
+        logging.info(
+            f"Busca por '{search_term}': {job.matched} linhas, {job.occurrences} ocorrências"
+        )
+
     def restore_original_log(self):
         """Restaura o log original"""
-        if hasattr(self, 'original_log'):
-            self.log_area.delete("1.0", tk.END)
-            self.log_area.insert("1.0", self.original_log)
+        self.cancel_search()
+        self.clear_highlights()
+        if self.virtual_view_mode.get():
+            self.virtual_view.set_source(self.store_view)
+            return
+        
+        # Área de texto comum recebe apenas as linhas dentro do limite
+        max_lines = self.max_buffer_lines.get()
+        self.store_view.show_timestamps = self.show_timestamps.get()
+        lines = self.store_view[-max_lines:] if max_lines > 0 else list(self.store_view)
+        self.log_area.delete("1.0", tk.END)
+        if lines:
+            self.log_area.insert("1.0", '\n'.join(lines) + '\n')
 
     def highlight_search_terms(self, search_term):
         """Destaca os termos encontrados no log"""
         if not search_term or search_term == 'Bruto':
             return
-                
-        start_pos = "1.0"
-        while True:
-            start_pos = self.log_area.search(
-                search_term,
-                start_pos,
-                tk.END,
-                nocase=True
-            )
-            if not start_pos:
-                break
-                
-            end_pos = f"{start_pos}+{len(search_term)}c"
-            self.log_area.tag_add("highlight", start_pos, end_pos)
-            self.log_area.tag_config(
-                "highlight",
-                background="yellow",
-                foreground="black"
-            )
-            start_pos = end_pos
+        
+        self.log_area.tag_remove("highlight", '1.0', tk.END)
+        self.highlight_terms["highlight"] = search_term
+        self.highlight_visible_region()
 
     def clear_logs(self):
         """Limpa a área de logs com confirmação do usuário"""
@@ -1548,8 +3240,17 @@ class RestoreCellTerminal:
                 self.log_area.delete("1.0", tk.END)
                 
                 # Resetar log original
-                if hasattr(self, 'original_log'):
-                    self.original_log = ''
+                self.line_store.clear()
+                self.telemetry.clear()
+                if self.filter_results is not None:
+                    self.filter_results.clear()
+                    self.filter_seqs.clear()
+                    self.filter_scanned_seq = self.line_store.next_seq
+                if self.virtual_view_mode.get():
+                    if self.filter_view is not None:
+                        self.virtual_view.set_source(self.filter_view)
+                    else:
+                        self.virtual_view.set_source(self.store_view)
                 
                 # Feedback visual
                 self.status_label.configure(text="Logs limpos")
@@ -1583,12 +3284,18 @@ class RestoreCellTerminal:
             
             if filename:
                 # Obter conteúdo atual dos logs
-                log_content = self.log_area.get("1.0", tk.END)
+                if self.virtual_view_mode.get():
+                    log_content = '\n'.join(self.virtual_view.source) + '\n'
+                else:
+                    log_content = self.log_area.get("1.0", tk.END)
                 
                 # Salvar arquivo
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write(log_content)
                 
+                # Telemetria da sessão ao lado do log, para comparações futuras
+                self.telemetry.save(os.path.splitext(filename)[0] + '.telemetry')
+                
                 # Feedback visual
                 messagebox.showinfo(
                     "Sucesso",
@@ -1631,12 +3338,22 @@ class RestoreCellTerminal:
                 )
                 return
             
-            # Configurar e abrir porta serial
-            self.serial_port = serial.Serial(
+            # Configurar motor de captura; a janela é um dos consumidores
+            self.engine = CaptureEngine(
                 port=self.port_combo.get(),
-                baudrate=int(self.baud_combo.get()),
-                timeout=0.1
+                baudrate=int(self.baud_combo.get())
             )
+            self.engine.add_consumer(self.on_engine_lines)
+            self.engine.add_consumer(self.telemetry.extend)
+            if self.stream_to_disk.get():
+                self.attach_disk_writer(None, self.engine)
+            if self.trigger_enabled.get():
+                self.attach_trigger_capture(self.engine)
+            self.engine.on_rx = self.on_serial_rx
+            self.engine.on_error = lambda e: self.root.after(0, self.handle_serial_error)
+            
+            # Abrir porta serial
+            self.serial_port = self.engine.open()
             
             # Atualizar estado
             self.is_connected = True
@@ -1644,10 +3361,7 @@ class RestoreCellTerminal:
             self.connect_btn.configure(text="Desconectar")
             
             # Iniciar thread de leitura
-            self.stop_threads = False
-            read_thread = threading.Thread(target=self.read_serial, daemon=True)
-            read_thread.start()
-            self.threads.append(read_thread)
+            self.engine.start()
             
             # Atualizar interface
             self.update_status_indicator()
@@ -1661,16 +3375,11 @@ class RestoreCellTerminal:
     def disconnect(self):
         """Desconecta da porta serial"""
         try:
-            # Parar threads
-            self.stop_threads = True
-            for thread in self.threads:
-                if thread.is_alive():
-                    thread.join(timeout=1.0)
-            self.threads.clear()
-            
-            # Fechar porta serial
-            if self.serial_port and self.serial_port.is_open:
-                self.serial_port.close()
+            # Parar captura e fechar porta serial
+            if self.engine:
+                self.engine.stop()
+                self.close_trigger_capture()
+                self.engine = None
             
             # Atualizar estado
             self.is_connected = False
@@ -1692,6 +3401,7 @@ class RestoreCellTerminal:
         # Frame para área de log
         log_frame = ttk.Frame(self.root)
         log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.log_frame = log_frame
         
         # Criar área de texto com scrollbar
         self.log_area = scrolledtext.ScrolledText(
@@ -1702,6 +3412,8 @@ class RestoreCellTerminal:
             foreground=self.current_theme['text']
         )
         self.log_area.pack(fill=tk.BOTH, expand=True)
+        # Destaques acompanham a rolagem
+        self.log_area.configure(yscrollcommand=self.on_log_scroll)
         
         # Configurar tags para highlight
         self.log_area.tag_configure(
@@ -1710,13 +3422,46 @@ class RestoreCellTerminal:
             foreground="black"
         )
         
+        # Área virtualizada para sessões longas (exibida sob demanda)
+        self.virtual_view = VirtualLogView(
+            log_frame,
+            font=('Consolas', self.font_size.get()),
+            background=self.current_theme['background'],
+            foreground=self.current_theme['text']
+        )
+        
         # Configurar menu de contexto
         self.create_context_menu()
         
         # Bind eventos
-        self.log_area.bind('<Control-c>', self.copy_selection)
-        self.log_area.bind('<Control-a>', self.select_all)
-        self.log_area.bind('<Button-3>', self.show_context_menu)
+        for widget in (self.log_area, self.virtual_view.text):
+            widget.bind('<Control-c>', self.copy_selection)
+            widget.bind('<Control-a>', self.select_all)
+            widget.bind('<Button-3>', self.show_context_menu)
+
+    def active_log_widget(self):
+        """Retorna o widget de texto exibido no modo atual"""
+        if self.virtual_view_mode.get():
+            return self.virtual_view.text
+        return self.log_area
+
+    def toggle_view_mode(self):
+        """Alterna entre a área de texto comum e a visualização virtual"""
+        try:
+            self.line_store.max_lines = self.get_store_limit()
+            if self.virtual_view_mode.get():
+                self.log_area.pack_forget()
+                self.virtual_view.pack(fill=tk.BOTH, expand=True)
+                self.virtual_view.set_source(self.store_view)
+            else:
+                self.virtual_view.pack_forget()
+                self.log_area.pack(fill=tk.BOTH, expand=True)
+                self.restore_original_log()
+                self.log_area.see(tk.END)
+            if self.filter_key is not None:
+                self.apply_filters()
+        except Exception as e:
+            logging.error(f"Erro ao alternar visualização: {str(e)}")
 
     def create_context_menu(self):
         """Cria menu de contexto para a área de log"""
@@ -1737,7 +3482,7 @@ class RestoreCellTerminal:
     def copy_selection(self, event=None):
         """Copia o texto selecionado para a área de transferência"""
         try:
-            selected_text = self.log_area.get(tk.SEL_FIRST, tk.SEL_LAST)
+            selected_text = self.active_log_widget().get(tk.SEL_FIRST, tk.SEL_LAST)
             self.root.clipboard_clear()
             self.root.clipboard_append(selected_text)
         except tk.TclError:
@@ -1746,17 +3491,20 @@ class RestoreCellTerminal:
 
     def select_all(self, event=None):
         """Seleciona todo o texto da área de log"""
-        self.log_area.tag_add(tk.SEL, "1.0", tk.END)
-        self.log_area.mark_set(tk.INSERT, "1.0")
-        self.log_area.see(tk.INSERT)
+        widget = self.active_log_widget()
+        widget.tag_add(tk.SEL, "1.0", tk.END)
+        widget.mark_set(tk.INSERT, "1.0")
+        widget.see(tk.INSERT)
         return 'break'
 
     def update_font_size(self):
         """Atualiza o tamanho da fonte da área de log"""
         current_font = font.Font(font=self.log_area['font'])
-        self.log_area.configure(
-            font=(current_font.actual()['family'], self.font_size.get())
-        )
+        for widget in (self.log_area, self.virtual_view.text):
+            widget.configure(
+                font=(current_font.actual()['family'], self.font_size.get())
+            )
+        self.virtual_view.refresh()
 
     def update_ports_list(self):
         """Atualiza a lista de portas seriais disponíveis"""
@@ -1775,6 +3523,8 @@ class RestoreCellTerminal:
             
             # Atualizar combobox
             self.port_combo['values'] = available_ports
+            if hasattr(self, 'multi_port_combo'):
+                self.multi_port_combo['values'] = available_ports
             
             # Restaurar seleção anterior se ainda disponível
             if current_selection and current_selection in available_ports:
@@ -1796,6 +3546,13 @@ class RestoreCellTerminal:
             messagebox.showerror("Erro", f"Erro ao atualizar lista de portas: {str(e)}")
 
 if __name__ == "__main__":
+    # Busca em arquivos usa processos (executável empacotado no Windows)
+    multiprocessing.freeze_support()
+    
+    # Captura sem interface gráfica (servidores de bancada)
+    if '--headless' in sys.argv[1:]:
+        sys.exit(capture_engine.main(sys.argv[1:]))
+    
     root = tk.Tk()
     app = RestoreCellTerminal(root)
     